@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS contributor_cache (
+    cache_key TEXT PRIMARY KEY,
+    report_json TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    refresh_lease_until REAL NOT NULL DEFAULT 0
+);
@@ -0,0 +1,40 @@
+CREATE INDEX IF NOT EXISTS idx_slack_activity_team_id
+ON slack_activity(team_id, received_at);
+
+CREATE TABLE IF NOT EXISTS slack_activity_daily (
+    day TEXT NOT NULL,
+    team_id TEXT NOT NULL,
+    activity_kind TEXT NOT NULL,
+    command_name TEXT NOT NULL,
+    events INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, team_id, activity_kind, command_name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_slack_activity_daily_team_id
+ON slack_activity_daily(team_id, day);
+
+CREATE TABLE IF NOT EXISTS slack_team_activity (
+    team_id TEXT PRIMARY KEY,
+    events INTEGER NOT NULL DEFAULT 0,
+    first_seen_at TEXT NOT NULL,
+    last_seen_at TEXT NOT NULL
+);
+
+-- Backfill from existing history. The rebuild is idempotent, so it is safe
+-- even if the worker already created the tables and counted some activity.
+DELETE FROM slack_activity_daily;
+
+INSERT INTO slack_activity_daily (day, team_id, activity_kind, command_name, events)
+SELECT substr(received_at, 1, 10), COALESCE(team_id, ''), activity_kind,
+       COALESCE(command_name, ''), COUNT(*)
+FROM slack_activity
+GROUP BY substr(received_at, 1, 10), COALESCE(team_id, ''), activity_kind,
+         COALESCE(command_name, '');
+
+DELETE FROM slack_team_activity;
+
+INSERT INTO slack_team_activity (team_id, events, first_seen_at, last_seen_at)
+SELECT team_id, COUNT(*), MIN(received_at), MAX(received_at)
+FROM slack_activity
+WHERE team_id IS NOT NULL
+GROUP BY team_id;
@@ -0,0 +1,12 @@
+CREATE TABLE IF NOT EXISTS github_http_cache (
+    cache_key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    link TEXT,
+    body_json TEXT NOT NULL,
+    stored_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_github_http_cache_stored_at
+ON github_http_cache(stored_at);
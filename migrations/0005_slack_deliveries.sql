@@ -0,0 +1,7 @@
+CREATE TABLE IF NOT EXISTS slack_deliveries (
+    delivery_key TEXT PRIMARY KEY,
+    received_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_slack_deliveries_received_at
+ON slack_deliveries(received_at);
@@ -0,0 +1,34 @@
+-- One row per counted contribution, keyed by the PR or issue number or the
+-- comment ID rather than by delivery, so an issue closed twice, or the same
+-- closure delivered twice, is counted once. Reconciliation rewrites these
+-- rows, and github_contributor_daily from them, with what GitHub reports.
+CREATE TABLE IF NOT EXISTS github_contributions (
+    repo TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    item TEXT NOT NULL,
+    day TEXT NOT NULL,
+    login TEXT NOT NULL,
+    PRIMARY KEY (repo, metric, item)
+);
+
+CREATE INDEX IF NOT EXISTS idx_github_contributions_repo_day
+ON github_contributions(repo, day);
+
+-- Per-user, per-day contributor counters fed by /github/webhook. The key
+-- serves /contributors as one range scan on (repo, day).
+CREATE TABLE IF NOT EXISTS github_contributor_daily (
+    repo TEXT NOT NULL,
+    day TEXT NOT NULL,
+    login TEXT NOT NULL,
+    prs INTEGER NOT NULL DEFAULT 0,
+    issues INTEGER NOT NULL DEFAULT 0,
+    comments INTEGER NOT NULL DEFAULT 0,
+    reviews INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (repo, day, login)
+);
+
+-- First day each repository's counters are complete for.
+CREATE TABLE IF NOT EXISTS github_counter_coverage (
+    repo TEXT PRIMARY KEY,
+    since_day TEXT NOT NULL
+);
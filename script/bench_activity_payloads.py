@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Report slack_activity payload bytes per event type before and after the
+storage policy (projection, string cap and optional zlib).
+
+Usage: python script/bench_activity_payloads.py
+"""
+
+import json
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src import worker  # noqa: E402
+
+
+def _blocks(count: int) -> list:
+    return [
+        {
+            "type": "section",
+            "block_id": "project_{0}".format(index),
+            "text": {
+                "type": "mrkdwn",
+                "text": "*www-project-{0}*\nOWASP project number {0} with a "
+                "longer description that Slack echoes back".format(index),
+            },
+            "accessory": {
+                "type": "button",
+                "action_id": "project_button_{0}".format(index),
+                "text": {"type": "plain_text", "text": "Open"},
+                "value": "www-project-{0}".format(index),
+            },
+        }
+        for index in range(count)
+    ]
+
+
+SAMPLES = {
+    "slash_command": {
+        "token": "verification-token",
+        "team_id": "T0001",
+        "team_domain": "owasp",
+        "channel_id": "C0001",
+        "channel_name": "project-blt",
+        "user_id": "U0001",
+        "user_name": "alice",
+        "command": "/project",
+        "text": "zap",
+        "api_app_id": "A0001",
+        "is_enterprise_install": "false",
+        "response_url": "https://hooks.slack.com/commands/T0001/1/abc",
+        "trigger_id": "1.2.3",
+    },
+    "interaction": {
+        "type": "block_actions",
+        "api_app_id": "A0001",
+        "token": "verification-token",
+        "trigger_id": "1.2.3",
+        "team": {"id": "T0001", "domain": "owasp"},
+        "user": {"id": "U0001", "username": "alice", "name": "alice"},
+        "channel": {"id": "C0001", "name": "project-blt"},
+        "container": {"type": "message", "message_ts": "1700000000.000100"},
+        "message": {
+            "type": "message",
+            "ts": "1700000000.000100",
+            "blocks": _blocks(40),
+        },
+        "state": {"values": {}},
+        "response_url": "https://hooks.slack.com/actions/T0001/1/abc",
+        "actions": [
+            {
+                "type": "external_select",
+                "action_id": "project_select_action_0",
+                "block_id": "project_select",
+                "selected_option": {
+                    "text": {"type": "plain_text", "text": "www-project-zap"},
+                    "value": "www-project-zap",
+                },
+                "action_ts": "1700000001.000200",
+            }
+        ],
+    },
+    "event": {
+        "token": "verification-token",
+        "team_id": "T0001",
+        "api_app_id": "A0001",
+        "type": "event_callback",
+        "event_id": "Ev0001",
+        "event_time": 1700000000,
+        "authorizations": [{"team_id": "T0001", "user_id": "U0BOT", "is_bot": True}],
+        "event": {
+            "type": "team_join",
+            "event_ts": "1700000000.000100",
+            "user": {
+                "id": "U0002",
+                "name": "bob",
+                "real_name": "Bob",
+                "profile": dict(
+                    (
+                        "image_{0}".format(size),
+                        "https://avatars.example/{0}".format(size),
+                    )
+                    for size in (24, 32, 48, 72, 192, 512, 1024)
+                ),
+            },
+        },
+    },
+    "oauth_callback": {
+        "type": "oauth_callback",
+        "team_id": "T0001",
+        "payload": {
+            "ok": True,
+            "app_id": "A0001",
+            "authed_user": {"id": "U0001", "access_token": "xoxp-" + "x" * 60},
+            "scope": "commands,chat:write,users:read,channels:read",
+            "token_type": "bot",
+            "access_token": "xoxb-" + "x" * 60,
+            "bot_user_id": "U0BOT",
+            "team": {"id": "T0001", "name": "OWASP"},
+            "enterprise": None,
+            "is_enterprise_install": False,
+            "incoming_webhook": {
+                "channel": "#general",
+                "channel_id": "C0001",
+                "configuration_url": "https://owasp.slack.com/services/B0001",
+                "url": "https://hooks.slack.com/services/T0001/B0001/" + "y" * 24,
+            },
+        },
+    },
+}
+
+
+def stored_bytes(value) -> int:
+    if isinstance(value, bytes):
+        return len(value)
+    return len(value.encode("utf-8"))
+
+
+def main() -> None:
+    projected = worker.activity_storage_policy(None)
+    compressed = dict(projected, compression="zlib")
+    whole_compressed = dict(compressed, project=False)
+    print(
+        "{0:<16}{1:>10}{2:>12}{3:>12}{4:>12}".format(
+            "activity_kind", "before", "zlib only", "projected", "both"
+        )
+    )
+    for activity_kind, payload in SAMPLES.items():
+        before = len(json.dumps(payload, sort_keys=True).encode("utf-8"))
+        after = worker.encode_activity_payload(activity_kind, payload, projected)
+        packed = worker.encode_activity_payload(activity_kind, payload, compressed)
+        whole = worker.encode_activity_payload(activity_kind, payload, whole_compressed)
+        assert worker.decode_activity_payload(packed) == json.loads(after)
+        print(
+            "{0:<16}{1:>10}{2:>12}{3:>12}{4:>12}".format(
+                activity_kind,
+                before,
+                stored_bytes(whole),
+                stored_bytes(after),
+                stored_bytes(packed),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Compare cold-start catalog cost: JSON parse plus index build (the old
+import-time path) against loading the compiled artifact.
+
+"load ms" is the catalog read alone. Before the artifact it ran during
+import, so the old import time is "import ms" plus the json "load ms".
+
+Each mode runs in a fresh interpreter so import time and resident memory are
+not shared. The catalog is the real one, replicated to --scale times its size.
+
+Usage: python script/bench_catalog_load.py [--scale 10]
+"""
+
+import argparse
+import json
+import pickle
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+
+def write_scaled_catalogs(directory: Path, scale: int) -> None:
+    for kind in ("projects", "repos"):
+        source = json.loads((ROOT_DIR / "data" / "{0}.json".format(kind)).read_text())
+        scaled = {}
+        for copy in range(scale):
+            for name, values in source.items():
+                key = name if copy == 0 else "{0}-{1}".format(name, copy)
+                scaled[key] = values
+        (directory / "{0}.json".format(kind)).write_text(json.dumps(scaled))
+
+
+def child(mode: str, directory: Path, trace: bool) -> None:
+    started = time.perf_counter()
+    from src import worker
+
+    import_ms = (time.perf_counter() - started) * 1000
+    worker.CATALOG_SOURCES = dict(
+        (kind, directory / "{0}.json".format(kind)) for kind in ("projects", "repos")
+    )
+    worker.CATALOG_ARTIFACT = directory / "{0}.pickle".format(mode)
+
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    worker.project_catalog()
+    load_ms = (time.perf_counter() - started) * 1000
+    worker.catalog_search_index("projects")
+    worker.catalog_search_index("repos")
+    first_use_ms = (time.perf_counter() - started) * 1000
+    retained = tracemalloc.get_traced_memory()[0] if trace else 0
+    print(
+        json.dumps(
+            {
+                "import_ms": import_ms,
+                "load_ms": load_ms,
+                "first_use_ms": first_use_ms,
+                "retained_kib": retained / 1024,
+                "maxrss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                "entries": len(worker.PROJECT_DATA),
+            }
+        )
+    )
+
+
+def run_child(mode: str, directory: Path, trace: bool = False) -> dict:
+    command = [sys.executable, __file__, "--child", mode, str(directory)]
+    if trace:
+        command.append("--trace")
+    output = subprocess.run(
+        command, check=True, capture_output=True, text=True, cwd=str(ROOT_DIR)
+    ).stdout
+    return json.loads(output)
+
+
+def measure(mode: str, directory: Path, rounds: int) -> dict:
+    # Timings come from untraced runs (median); tracemalloc only supplies the
+    # retained size, since tracing slows allocation-heavy code several fold.
+    samples = [run_child(mode, directory) for _ in range(rounds)]
+    result = dict(
+        (key, sorted(sample[key] for sample in samples)[len(samples) // 2])
+        for key in samples[0]
+    )
+    result["retained_kib"] = run_child(mode, directory, trace=True)["retained_kib"]
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child[0], Path(args.child[1]), args.trace)
+        return
+
+    from src import worker
+
+    with tempfile.TemporaryDirectory() as name:
+        directory = Path(name)
+        write_scaled_catalogs(directory, args.scale)
+        sources = dict(
+            (kind, directory / "{0}.json".format(kind))
+            for kind in ("projects", "repos")
+        )
+        artifact = worker.compile_catalogs(sources)
+        (directory / "compiled.pickle").write_bytes(
+            pickle.dumps(artifact, protocol=worker.CATALOG_PICKLE_PROTOCOL)
+        )
+        results = {
+            "json": measure("json", directory, args.rounds),
+            "compiled": measure("compiled", directory, args.rounds),
+        }
+
+    print("entries: {0} ({1}x)".format(results["json"]["entries"], args.scale))
+    print(
+        "{0:<10}{1:>12}{2:>10}{3:>16}{4:>16}{5:>14}".format(
+            "mode",
+            "import ms",
+            "load ms",
+            "first use ms",
+            "retained KiB",
+            "max RSS KiB",
+        )
+    )
+    for mode, result in results.items():
+        print(
+            "{0:<10}{1:>12.1f}{2:>10.1f}{3:>16.1f}{4:>16.0f}{5:>14}".format(
+                mode,
+                result["import_ms"],
+                result["load_ms"],
+                result["first_use_ms"],
+                result["retained_kib"],
+                result["maxrss_kib"],
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
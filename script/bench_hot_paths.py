@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""Microbenchmark the worker's per-request hot paths and compare to a baseline.
+
+Runs against local stand-ins: a sqlite-backed env.DB and a scripted fetch
+(tests/fakes.py). Exits with status 1 when any case is slower than the
+baseline by more than --threshold. Baselines are machine-specific: record
+one with --save-baseline on the host that runs the comparison.
+
+Usage: python script/bench_hot_paths.py [--projects 2000] [--activity 1000]
+           [--output results.json] [--save-baseline] [--threshold 0.25]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src import worker  # noqa: E402
+from tests.fakes import (  # noqa: E402
+    FakeContext,
+    FakeD1,
+    FakeRequest,
+    FakeWorkerResponse,
+    github_env,
+    github_fetch,
+    signed_slack_request,
+)
+
+BASELINE_PATH = ROOT_DIR / "script" / "bench_hot_paths_baseline.json"
+SIGNING_SECRET = "bench-signing-secret"
+WORDS = (
+    "security application web api mobile cloud threat model testing guide "
+    "verification standard top ten cheat sheet proxy scanner crypto wallet "
+    "docker kubernetes supply chain dependency bug bounty firewall juice shop"
+).split()
+QUERIES = ("zap", "security", "www-project-web", "cheat sheet", "kubernetes")
+SLASH_COMMAND_FORM = {
+    "token": "verification-token",
+    "team_id": "T0001",
+    "team_domain": "owasp",
+    "channel_id": "C0001",
+    "channel_name": "project-blt",
+    "user_id": "U0001",
+    "user_name": "alice",
+    "command": "/project",
+    "text": "zap",
+    "api_app_id": "A0001",
+    "response_url": "https://hooks.slack.com/commands/T0001/1/abc",
+    "trigger_id": "1.2.3",
+}
+
+
+def synthetic_catalog(projects: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    catalog = {"www-project-zap": ["OWASP Zed Attack Proxy", ""]}
+    while len(catalog) < projects:
+        name = "www-project-{0}-{1}".format(
+            "-".join(rng.sample(WORDS, rng.randint(1, 3))), len(catalog)
+        )
+        description = " ".join(rng.sample(WORDS, 6)).capitalize()
+        catalog[name] = [description, "https://github.com/OWASP/{0}".format(name)]
+    return catalog
+
+
+def synthetic_activity(items: int, seed: int = 11) -> dict:
+    # Roughly five items per contributor, split across the four REST calls.
+    rng = random.Random(seed)
+    logins = ["contributor-{0}".format(index) for index in range(max(1, items // 5))]
+
+    def authored(count: int) -> list:
+        return [{"user": {"login": rng.choice(logins)}} for _ in range(count)]
+
+    return {
+        "prs": authored(items // 4),
+        "issues": authored(items // 4),
+        "comments": authored(items // 4),
+        "reviews": authored(items - 3 * (items // 4)),
+    }
+
+
+def time_case(function, min_time: float, repeats: int = 5) -> dict:
+    # Calibrates a batch size that runs for about min_time, then keeps the
+    # best of several batches, as timeit does.
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+    best = elapsed
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, time.perf_counter() - started)
+    return {"us_per_op": round(best / number * 1e6, 3), "ops": number}
+
+
+async def settle(tasks: list) -> None:
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def build_cases(projects: int, activity_items: int) -> dict:
+    worker.Response = FakeWorkerResponse
+    worker.PROJECT_DATA = synthetic_catalog(projects)
+    worker.reset_isolate_state()
+    activity = synthetic_activity(activity_items)
+    rows = worker.summarize_contributors(
+        activity["prs"], activity["issues"], activity["comments"], activity["reviews"]
+    )
+
+    worker.fetch = github_fetch(
+        prs={"items": activity["prs"]},
+        issues={"items": activity["issues"]},
+        comments=activity["comments"],
+        reviews=activity["reviews"],
+    )
+    settings = dict(
+        SLACK_SIGNING_SECRET=SIGNING_SECRET,
+        LATENCY_LOG_INTERVAL_SECONDS="86400",
+    )
+    env = github_env(DB=FakeD1(), **settings)
+    uncached_env = github_env(**settings)
+    loop = asyncio.new_event_loop()
+
+    form_body = urlencode(SLASH_COMMAND_FORM)
+    timestamp = str(int(time.time()))
+    signature = signed_slack_request(
+        "/slack/commands", form_body, SIGNING_SECRET
+    ).headers.get("x-slack-signature")
+    routes = {
+        "GET /health": (
+            env,
+            FakeRequest("https://sammich.example.com/health"),
+        ),
+        "POST /slack/commands /project": (
+            env,
+            signed_slack_request("/slack/commands", SLASH_COMMAND_FORM, SIGNING_SECRET),
+        ),
+        "POST /slack/commands /repo": (
+            env,
+            signed_slack_request(
+                "/slack/commands",
+                dict(SLASH_COMMAND_FORM, command="/repo", text="python"),
+                SIGNING_SECRET,
+            ),
+        ),
+        "POST /slack/options block_suggestion": (
+            env,
+            signed_slack_request(
+                "/slack/options",
+                {
+                    "payload": json.dumps(
+                        {
+                            "type": "block_suggestion",
+                            "action_id": "project_select_action_0",
+                            "value": "sec",
+                        }
+                    )
+                },
+                SIGNING_SECRET,
+            ),
+        ),
+        "POST /slack/events message": (
+            env,
+            signed_slack_request(
+                "/slack/events",
+                json.dumps(
+                    {
+                        "type": "event_callback",
+                        "team_id": "T0001",
+                        "event": {
+                            "type": "message",
+                            "user": "U0001",
+                            "channel": "C0001",
+                            "text": "hello",
+                        },
+                    }
+                ),
+                SIGNING_SECRET,
+                content_type="application/json",
+            ),
+        ),
+        "POST /slack/commands /contributors (cache miss)": (
+            uncached_env,
+            signed_slack_request(
+                "/slack/commands",
+                dict(SLASH_COMMAND_FORM, command="/contributors", text=""),
+                SIGNING_SECRET,
+            ),
+        ),
+    }
+
+    def request_case(env, request):
+        def run():
+            worker.CONTRIBUTOR_CACHE.clear()
+            ctx = FakeContext()
+            response = loop.run_until_complete(worker.handle_request(request, env, ctx))
+            # Activity flushes and delivery claims run after the response, in
+            # waitUntil. Cancel them rather than let later cases time them.
+            worker.ACTIVITY_BUFFER.clear()
+            worker.ACTIVITY_BUFFER_OLDEST = None
+            for task in ctx.tasks:
+                task.cancel()
+            loop.run_until_complete(settle(ctx.tasks))
+            if response.status != 200:
+                raise RuntimeError("unexpected HTTP {0}".format(response.status))
+
+        return run
+
+    cases = {
+        "verify_slack_signature": lambda: worker.verify_slack_signature(
+            SIGNING_SECRET, timestamp, form_body, signature
+        ),
+        "parse_form_encoded": lambda: worker.parse_form_encoded(form_body),
+        "search_projects": lambda: [worker.search_projects(query) for query in QUERIES],
+        "summarize_contributors": lambda: worker.summarize_contributors(
+            activity["prs"],
+            activity["issues"],
+            activity["comments"],
+            activity["reviews"],
+        ),
+        "format_contributor_blocks": lambda: worker.format_contributor_blocks(rows),
+    }
+    for name, (route_env, request) in routes.items():
+        cases["handle_request " + name] = request_case(route_env, request)
+    # Warm the schema, catalog index and workspace cache so every case times
+    # its steady state.
+    for function in cases.values():
+        function()
+    return cases
+
+
+def run_benchmarks(projects: int, activity_items: int, min_time: float) -> dict:
+    cases = build_cases(projects, activity_items)
+    return {
+        "params": {"projects": projects, "activity": activity_items},
+        "python": platform.python_version(),
+        "results": dict(
+            (name, time_case(function, min_time)) for name, function in cases.items()
+        ),
+    }
+
+
+def compare_results(current: dict, baseline: dict, threshold: float) -> list:
+    # Returns (name, baseline us, current us, ratio, regressed) per case in
+    # both runs.
+    comparison = []
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        ratio = result["us_per_op"] / max(previous["us_per_op"], 1e-9)
+        comparison.append(
+            (
+                name,
+                previous["us_per_op"],
+                result["us_per_op"],
+                ratio,
+                ratio > 1 + threshold,
+            )
+        )
+    return comparison
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--activity", type=int, default=1000)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args()
+
+    current = run_benchmarks(args.projects, args.activity, args.min_time)
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n")
+        print("saved baseline to {0}".format(args.baseline))
+
+    baseline = None
+    if not args.save_baseline and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("params") != current["params"]:
+            print(
+                "baseline was recorded with {0}; not comparing".format(
+                    baseline.get("params")
+                )
+            )
+            baseline = None
+
+    if baseline is None:
+        for name, result in current["results"].items():
+            print("{0:<64} {1:>10.1f} us".format(name, result["us_per_op"]))
+        return
+
+    regressions = 0
+    for name, before, after, ratio, regressed in compare_results(
+        current, baseline, args.threshold
+    ):
+        regressions += regressed
+        print(
+            "{0:<64} {1:>10.1f} -> {2:>10.1f} us  {3:+6.0%}{4}".format(
+                name, before, after, ratio - 1, "  REGRESSION" if regressed else ""
+            )
+        )
+    if regressions:
+        print(
+            "{0} case(s) slower than baseline by more than {1:.0%}".format(
+                regressions, args.threshold
+            )
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
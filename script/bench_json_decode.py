@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Compare decode time and peak memory for a 100-item GitHub search response.
+
+Strategies:
+  full          json.loads of the whole body, as fetch_json did before
+  fallback      json.loads + project_fields, the path used outside the runtime
+  runtime       what Python does on Workers: json.loads of the key-filtered
+                JSON.stringify output, then project_fields. The JS-side
+                JSON.parse/stringify cost is not measured here.
+
+Usage: python script/bench_json_decode.py [--items 100] [--rounds 50]
+"""
+
+import argparse
+import copy
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src import worker  # noqa: E402
+
+FIXTURE = ROOT_DIR / "tests" / "fixtures" / "github_rest_search_prs.json"
+
+
+def search_response(items: int) -> str:
+    # Full issue objects, as GitHub returns them, with a realistic body.
+    fixture = json.loads(FIXTURE.read_text())
+    template = fixture["items"][0]
+    response = {"total_count": items, "incomplete_results": False, "items": []}
+    for index in range(items):
+        item = copy.deepcopy(template)
+        item["id"] = index
+        item["number"] = 1000 + index
+        item["title"] = "Improve contributor stats, part {0}".format(index)
+        item["body"] = "Detailed description of the change. " * 30
+        item["user"]["login"] = "contributor-{0}".format(index % 40)
+        response["items"].append(item)
+    return json.dumps(response)
+
+
+def key_filtered(body: str, keys: list) -> str:
+    # Python stand-in for JSON.stringify(JSON.parse(body), keys).
+    allowed = set(keys)
+
+    def keep(value):
+        if isinstance(value, list):
+            return [keep(item) for item in value]
+        if isinstance(value, dict):
+            return dict((k, keep(v)) for k, v in value.items() if k in allowed)
+        return value
+
+    return json.dumps(keep(json.loads(body)))
+
+
+def measure(decode, rounds: int) -> tuple:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        decode()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    decode()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings) * 1000, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    projection = worker.GITHUB_SEARCH_AUTHOR_PROJECTION
+    body = search_response(args.items)
+    filtered = key_filtered(body, worker.projection_keys(projection))
+
+    strategies = {
+        "full": lambda: json.loads(body),
+        "fallback": lambda: worker.project_fields(json.loads(body), projection),
+        "runtime": lambda: worker.project_fields(json.loads(filtered), projection),
+    }
+    print(
+        "body: {0:.1f} KiB, after key filter: {1:.1f} KiB".format(
+            len(body) / 1024, len(filtered) / 1024
+        )
+    )
+    for name, decode in strategies.items():
+        decode_ms, peak = measure(decode, args.rounds)
+        print(
+            "{0:<10} {1:>8.3f} ms  {2:>8.1f} KiB peak".format(
+                name, decode_ms, peak / 1024
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Compare the catalog search index against the old linear scan.
+
+Usage: python script/bench_search.py [--entries 10000] [--rounds 200]
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src import worker  # noqa: E402
+
+WORDS = (
+    "security application web api mobile cloud threat model testing guide "
+    "verification standard top ten cheat sheet proxy scanner crypto wallet "
+    "docker kubernetes supply chain dependency bug bounty firewall juice shop"
+).split()
+QUERIES = ("zap", "security", "www-project-web", "cheat sheet", "kubernetes", "q")
+
+
+def synthetic_catalog(entries: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    catalog = {}
+    while len(catalog) < entries:
+        name = "www-project-{0}-{1}".format(
+            "-".join(rng.sample(WORDS, rng.randint(1, 3))), len(catalog)
+        )
+        description = " ".join(rng.sample(WORDS, 6)).capitalize()
+        catalog[name] = [description, "https://github.com/OWASP/{0}".format(name)]
+    catalog["www-project-zap"] = ["OWASP Zed Attack Proxy", ""]
+    return catalog
+
+
+def legacy_search(catalog: dict, query: str, limit: int = 10) -> list:
+    normalized = query.strip().lower()
+    if not normalized:
+        return []
+    matches = []
+    for project_name in sorted(catalog.keys()):
+        if normalized in project_name:
+            matches.append(project_name)
+        if len(matches) >= limit:
+            break
+    return matches
+
+
+def per_query_us(search, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for query in QUERIES:
+            search(query)
+    return (time.perf_counter() - started) / (rounds * len(QUERIES)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(args.entries)
+    worker.PROJECT_DATA = catalog
+
+    started = time.perf_counter()
+    worker.catalog_search_index("projects")
+    build_ms = (time.perf_counter() - started) * 1000
+
+    worker.reset_isolate_state()
+    tracemalloc.start()
+    worker.catalog_search_index("projects")
+    _, index_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    legacy_us = per_query_us(lambda query: legacy_search(catalog, query), args.rounds)
+    indexed_us = per_query_us(worker.search_projects, args.rounds)
+
+    print("entries:          {0}".format(args.entries))
+    print(
+        "index build:      {0:.1f} ms, {1:.1f} MiB peak".format(
+            build_ms, index_peak / 2**20
+        )
+    )
+    print("linear scan:      {0:.1f} us/query".format(legacy_us))
+    print("inverted index:   {0:.1f} us/query".format(indexed_us))
+    print("speedup:          {0:.1f}x".format(legacy_us / indexed_us))
+
+
+if __name__ == "__main__":
+    main()
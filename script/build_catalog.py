@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Compile data/projects.json and data/repos.json into data/catalog.pickle.
+
+The worker loads the artifact on first use instead of parsing the JSON and
+rebuilding the search indexes in every isolate. It trusts whatever artifact
+is deployed and only falls back to the JSON when there is none, so staleness
+is caught here: wrangler runs this script as its [build] step, and --check
+fails when the artifact on disk was built from different sources.
+
+Usage: python script/build_catalog.py [--output data/catalog.pickle] [--check]
+"""
+
+import argparse
+import pickle
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src import worker  # noqa: E402
+
+
+def build(output: Path) -> int:
+    artifact = worker.compile_catalogs(worker.CATALOG_SOURCES)
+    payload = pickle.dumps(artifact, protocol=worker.CATALOG_PICKLE_PROTOCOL)
+    output.write_bytes(payload)
+    return len(payload)
+
+
+def is_current(output: Path) -> bool:
+    artifact = worker.load_catalog_artifact(output)
+    return artifact is not None and artifact.get(
+        "source_digest"
+    ) == worker.catalog_source_digest(worker.CATALOG_SOURCES)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", type=Path, default=worker.CATALOG_ARTIFACT)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="exit 1 if the artifact is missing or out of date, without writing",
+    )
+    args = parser.parse_args()
+
+    if args.check:
+        if not is_current(args.output):
+            print("{0} is out of date; rerun without --check".format(args.output))
+            sys.exit(1)
+        print("{0} is up to date".format(args.output))
+        return
+
+    size = build(args.output)
+    print("wrote {0} ({1:.1f} KiB)".format(args.output, size / 1024))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Profile the cold-start cost of importing src/worker.py.
+
+Every round imports the worker in a fresh interpreter under
+``-X importtime``. The report lists the modules that importing the worker
+pulled in beyond what the runtime preloads (asyncio), by self and
+cumulative time (median across rounds). The
+"module body" row is src.worker's own self time, the module-level work it
+does beyond its imports. With --functions, the import is also run under
+cProfile and the worker functions called at import time are listed. With
+--check, it exits with status 1 when the import or the module body is over
+its budget.
+
+Usage: python script/profile_cold_start.py [--rounds 7] [--top 15] [--functions]
+                                          [--preload asyncio] [--check]
+"""
+
+import argparse
+import compileall
+import cProfile
+import pstats
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+WORKER_MODULE = "src.worker"
+# The Workers runtime has these loaded before our module, so their import
+# cost is not ours to cut.
+RUNTIME_PRELOADED = ("asyncio",)
+# Roughly four times what importing the worker costs today (about 14 ms on
+# top of asyncio, 2.5 ms of it module-level work), so only real regressions
+# such as a new heavy import or eager file loading trip them.
+WORKER_IMPORT_BUDGET_MS = 60
+WORKER_MODULE_BODY_BUDGET_MS = 10
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int, int]]:
+    # Lines look like "import time:  self [us] | cumulative | <indent>name".
+    # A module's imports are printed before it, one level further indented.
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def worker_subtree(
+    entries: List[Tuple[str, int, int, int]], module: str = WORKER_MODULE
+) -> List[Tuple[str, int, int, int]]:
+    for position, entry in enumerate(entries):
+        if entry[0] == module:
+            break
+    else:
+        raise ValueError("{0} was not imported".format(module))
+    subtree = [entries[position]]
+    for entry in reversed(entries[:position]):
+        if entry[3] <= entries[position][3]:
+            break
+        subtree.append(entry)
+    return subtree
+
+
+def import_profile(
+    rounds: int = 5, preload: Tuple[str, ...] = RUNTIME_PRELOADED
+) -> Dict[str, Tuple[int, int]]:
+    """Median (self_us, cumulative_us) per module imported by the worker."""
+    # Write bytecode up front: with PYTHONDONTWRITEBYTECODE set, every fresh
+    # interpreter would otherwise recompile the source, which a deployed
+    # bundle never does.
+    compileall.compile_dir(str(ROOT_DIR / "src"), quiet=1)
+    samples: Dict[str, List[Tuple[int, int]]] = {}
+    for _ in range(rounds):
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                "; ".join("import " + name for name in preload + (WORKER_MODULE,)),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+            cwd=str(ROOT_DIR),
+        )
+        for name, self_us, cumulative_us, _ in worker_subtree(
+            parse_importtime(completed.stderr)
+        ):
+            samples.setdefault(name, []).append((self_us, cumulative_us))
+    return dict(
+        (
+            name,
+            (
+                sorted(sample[0] for sample in values)[len(values) // 2],
+                sorted(sample[1] for sample in values)[len(values) // 2],
+            ),
+        )
+        for name, values in samples.items()
+    )
+
+
+def over_budget(
+    profile: Dict[str, Tuple[int, int]],
+    import_budget_ms: float = WORKER_IMPORT_BUDGET_MS,
+    body_budget_ms: float = WORKER_MODULE_BODY_BUDGET_MS,
+) -> List[str]:
+    body_us, total_us = profile[WORKER_MODULE]
+    return [
+        "{0} took {1:.1f} ms, over its {2} ms budget".format(name, us / 1000, budget)
+        for name, us, budget in (
+            ("import", total_us, import_budget_ms),
+            ("module body", body_us, body_budget_ms),
+        )
+        if us / 1000 >= budget
+    ]
+
+
+def print_import_report(profile: Dict[str, Tuple[int, int]], top: int) -> None:
+    body_us, total_us = profile[WORKER_MODULE]
+    print("import {0}: {1:.1f} ms".format(WORKER_MODULE, total_us / 1000))
+    print("module body:       {0:.1f} ms".format(body_us / 1000))
+    print()
+    print("{0:<36}{1:>12}{2:>14}".format("module", "self ms", "cumulative ms"))
+    ranked = sorted(
+        (item for item in profile.items() if item[0] != WORKER_MODULE),
+        key=lambda item: item[1][0],
+        reverse=True,
+    )
+    for name, (self_us, cumulative_us) in ranked[:top]:
+        print(
+            "{0:<36}{1:>12.2f}{2:>14.2f}".format(
+                name, self_us / 1000, cumulative_us / 1000
+            )
+        )
+
+
+def print_function_report(top: int) -> None:
+    sys.path.insert(0, str(ROOT_DIR))
+    profiler = cProfile.Profile()
+    profiler.enable()
+    __import__(WORKER_MODULE)
+    profiler.disable()
+    stats = pstats.Stats(profiler)
+    worker_file = str(ROOT_DIR / "src" / "worker.py")
+    rows = [
+        (timing[2], timing[3], timing[1], function[2])
+        for function, timing in stats.stats.items()
+        if function[0] == worker_file and function[2] != "<module>"
+    ]
+    print()
+    print(
+        "{0:<36}{1:>12}{2:>14}{3:>8}".format(
+            "worker function", "own ms", "total ms", "calls"
+        )
+    )
+    for own, total, calls, name in sorted(rows, reverse=True)[:top]:
+        print(
+            "{0:<36}{1:>12.3f}{2:>14.3f}{3:>8}".format(
+                name, own * 1000, total * 1000, calls
+            )
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--functions", action="store_true")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument(
+        "--preload",
+        default=",".join(RUNTIME_PRELOADED),
+        help="comma-separated modules imported first and left out of the report",
+    )
+    args = parser.parse_args()
+
+    preload = tuple(name for name in args.preload.split(",") if name)
+    profile = import_profile(args.rounds, preload)
+    print_import_report(profile, args.top)
+    if args.functions:
+        print_function_report(args.top)
+    if args.check:
+        failures = over_budget(profile)
+        for failure in failures:
+            print(failure)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
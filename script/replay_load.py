@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""Replay exported slack_activity rows against the worker as a load test.
+
+Each row's payload is rebuilt into the request Slack sent, re-signed with a
+test signing secret and sent over HTTP to an in-process asyncio server that
+calls handle_request. env.DB is sqlite and GitHub/Slack are scripted fakes
+(tests/fakes.py), answering with the recorded fixtures in tests/fixtures.
+Reports throughput and latency percentiles per route and command.
+
+Export the rows with, for example:
+    wrangler d1 execute blt-sammich --remote --json \\
+        --command "SELECT * FROM slack_activity ORDER BY id DESC LIMIT 5000" \\
+        > activity.json
+
+Usage: python script/replay_load.py activity.json [--rate 50] [--concurrency 16]
+           [--requests 1000] [--github-delay-ms 150] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src import worker  # noqa: E402
+from tests.fakes import (  # noqa: E402
+    FakeContext,
+    FakeD1,
+    FakeEnv,
+    FakeFetch,
+    FakeHeaders,
+    FakeWorkerResponse,
+    github_env,
+    github_fetch,
+)
+
+FIXTURES = ROOT_DIR / "tests" / "fixtures"
+SIGNING_SECRET = "replay-signing-secret"
+RESPONSE_URL = "https://hooks.slack.test/replay"
+HTTP_REASONS = {200: "OK", 302: "Found", 401: "Unauthorized", 404: "Not Found"}
+# The worker acknowledges a repeated delivery without handling it
+# (slack_delivery_key), so every send gets its own copy of these.
+DELIVERY_ID_FIELDS = ("event_id", "trigger_id", "response_url")
+
+
+def load_activity_export(path: Path) -> list:
+    # Accepts a JSON list of rows, `wrangler d1 execute --json` output
+    # (a list of {"results": [...]}) or one JSON row per line.
+    text = path.read_text()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    rows = []
+    for item in data:
+        if isinstance(item, dict) and "results" in item:
+            rows.extend(item["results"])
+        else:
+            rows.append(item)
+    return rows
+
+
+def encode_replay_body(kind: str, payload: dict) -> str:
+    if kind == "event":
+        return json.dumps(payload)
+    if kind == "interaction":
+        return urlencode({"payload": json.dumps(payload)})
+    return urlencode(payload)
+
+
+def replay_request(row: dict) -> dict:
+    # Returns the path, content type, body and a "route command" label for
+    # one slack_activity row, or None when the row cannot be replayed.
+    payload = worker.decode_activity_payload(row.get("payload_json"))
+    if not payload or payload.get("_truncated"):
+        return None
+    kind = row.get("activity_kind")
+    if kind == "slash_command":
+        if payload.get("response_url"):
+            payload["response_url"] = RESPONSE_URL
+        path = "/slack/commands"
+        label = "/slack/commands " + str(payload.get("command", ""))
+    elif kind == "interaction":
+        path = "/slack/events"
+        label = "/slack/events interaction:" + str(payload.get("type", ""))
+    elif kind == "event":
+        event_type = (payload.get("event") or {}).get("type") or payload.get("type")
+        path = "/slack/events"
+        label = "/slack/events event:" + str(event_type)
+    else:
+        return None
+    return {
+        "path": path,
+        "content_type": "application/json"
+        if kind == "event"
+        else "application/x-www-form-urlencoded",
+        "body": encode_replay_body(kind, payload),
+        "label": label,
+        "kind": kind,
+        "payload": payload,
+    }
+
+
+def with_fresh_ids(request: dict, sequence: int) -> dict:
+    # A copy of request that reads as a new delivery: its Slack delivery IDs
+    # carry a per-send suffix.
+    payload = dict(request["payload"])
+    for field in DELIVERY_ID_FIELDS:
+        if payload.get(field):
+            payload[field] = "{0}-{1}".format(payload[field], sequence)
+    return dict(request, body=encode_replay_body(request["kind"], payload))
+
+
+def sign_body(body: str, timestamp: str) -> str:
+    return (
+        "v0="
+        + hmac.new(
+            SIGNING_SECRET.encode("utf-8"),
+            "v0:{0}:{1}".format(timestamp, body).encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+    )
+
+
+def replay_env() -> FakeEnv:
+    return github_env(
+        DB=FakeD1(),
+        SLACK_SIGNING_SECRET=SIGNING_SECRET,
+        SLACK_BOT_TOKEN="xoxb-replay",
+        GITHUB_TOKEN="ghp-replay",
+        LATENCY_LOG_INTERVAL_SECONDS="86400",
+        # Keeps the final drain short; flushes run after the responses anyway.
+        ACTIVITY_FLUSH_MAX_AGE_SECONDS="0.5",
+    )
+
+
+def replay_fetch(github_delay: float) -> FakeFetch:
+    def fixture(name: str) -> str:
+        return (FIXTURES / name).read_text()
+
+    return (
+        github_fetch(
+            delay=github_delay,
+            prs=fixture("github_rest_search_prs.json"),
+            issues=fixture("github_rest_search_issues.json"),
+            comments=fixture("github_rest_issue_comments.json"),
+            reviews=fixture("github_rest_pull_comments.json"),
+        )
+        .add(
+            "api.github.com/repos/",
+            {"html_url": "https://github.com/OWASP-BLT/BLT-Lettuce/issues/1"},
+            status=201,
+            delay=github_delay,
+        )
+        .add("slack.com/api/", {"ok": True})
+        .add(RESPONSE_URL, "ok")
+    )
+
+
+class ReplayRequest:
+    def __init__(self, url: str, method: str, headers: dict, body: str):
+        self.url = url
+        self.method = method
+        self.headers = FakeHeaders(headers)
+        self._body = body
+
+    async def text(self):
+        return self._body
+
+
+class ReplayServer:
+    """Minimal HTTP/1.1 front end (one request per connection) that hands
+    each request to handle_request."""
+
+    def __init__(self, env):
+        self.env = env
+        self.contexts = []
+
+    async def handle_connection(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", "0")))
+            ctx = FakeContext()
+            self.contexts.append(ctx)
+            request = ReplayRequest(
+                "http://{0}{1}".format(headers.get("host", "localhost"), target),
+                method,
+                headers,
+                body.decode("utf-8"),
+            )
+            try:
+                response = await worker.handle_request(request, self.env, ctx)
+            except Exception as error:
+                # Mirrors Default.fetch, so a crash counts as a 500.
+                worker.log_exception_one_line(error, "replay_request_failed")
+                response = worker.build_response("Internal Server Error", status=500)
+            payload = str(response.body).encode("utf-8")
+            writer.write(
+                "HTTP/1.1 {0} {1}\r\nContent-Length: {2}\r\n"
+                "Connection: close\r\n\r\n".format(
+                    response.status,
+                    HTTP_REASONS.get(response.status, "Status"),
+                    len(payload),
+                ).encode("latin-1")
+                + payload
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def drain(self):
+        for ctx in self.contexts:
+            await ctx.drain()
+
+
+async def send_request(host: str, port: int, request: dict) -> int:
+    timestamp = str(int(time.time()))
+    body = request["body"].encode("utf-8")
+    head = (
+        "POST {0} HTTP/1.1\r\nHost: {1}:{2}\r\nContent-Type: {3}\r\n"
+        "Content-Length: {4}\r\nX-Slack-Request-Timestamp: {5}\r\n"
+        "X-Slack-Signature: {6}\r\nConnection: close\r\n\r\n"
+    ).format(
+        request["path"],
+        host,
+        port,
+        request["content_type"],
+        len(body),
+        timestamp,
+        sign_body(request["body"], timestamp),
+    )
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    # samples are (label, status, latency ms) tuples.
+    groups = {"all": []}
+    errors = {"all": 0}
+    for label, status, latency_ms in samples:
+        for key in ("all", label):
+            groups.setdefault(key, []).append(latency_ms)
+            errors[key] = errors.get(key, 0) + (not 200 <= status < 300)
+    report = {}
+    for key, latencies in groups.items():
+        latencies.sort()
+        report[key] = {
+            "requests": len(latencies),
+            "errors": errors[key],
+            "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p90_ms": round(percentile(latencies, 0.90), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+        }
+    return report
+
+
+async def run_replay(
+    requests: list,
+    total: int,
+    rate: float,
+    concurrency: int,
+    github_delay: float = 0.0,
+) -> dict:
+    worker.Response = FakeWorkerResponse
+    worker.fetch = replay_fetch(github_delay)
+    worker.reset_isolate_state()
+    server = ReplayServer(replay_env())
+    listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+    host, port = listener.sockets[0].getsockname()[:2]
+    limit = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(request: dict) -> None:
+        async with limit:
+            started = time.perf_counter()
+            try:
+                status = await send_request(host, port, request)
+            except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+                status = 0
+            samples.append(
+                (request["label"], status, (time.perf_counter() - started) * 1000)
+            )
+
+    started = time.perf_counter()
+    tasks = []
+    # Open-loop arrivals at --rate; with rate 0 the semaphore alone paces.
+    for index, request in enumerate(itertools.islice(itertools.cycle(requests), total)):
+        if rate > 0:
+            delay = started + index / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(one(with_fresh_ids(request, index))))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    await server.drain()
+    listener.close()
+    await listener.wait_closed()
+    return summarize(samples, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("export", type=Path)
+    parser.add_argument("--rate", type=float, default=0.0, help="requests/s, 0 = max")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, help="default: one pass")
+    parser.add_argument("--github-delay-ms", type=float, default=0.0)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    rows = load_activity_export(args.export)
+    requests = [request for request in map(replay_request, rows) if request]
+    if not requests:
+        sys.exit("no replayable rows in {0}".format(args.export))
+    print(
+        "replaying {0} of {1} rows".format(len(requests), len(rows)),
+        file=sys.stderr,
+    )
+
+    report = asyncio.run(
+        run_replay(
+            requests,
+            args.requests or len(requests),
+            args.rate,
+            args.concurrency,
+            args.github_delay_ms / 1000,
+        )
+    )
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(
+        "{0:<48} {1:>7} {2:>6} {3:>8} {4:>9} {5:>9} {6:>9}".format(
+            "route command", "count", "errors", "req/s", "p50 ms", "p90 ms", "p99 ms"
+        )
+    )
+    for label, stats in sorted(report.items(), key=lambda item: item[0] != "all"):
+        print(
+            "{0:<48} {1:>7} {2:>6} {3:>8.1f} {4:>9.2f} {5:>9.2f} {6:>9.2f}".format(
+                label,
+                stats["requests"],
+                stats["errors"],
+                stats["rps"],
+                stats["p50_ms"],
+                stats["p90_ms"],
+                stats["p99_ms"],
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
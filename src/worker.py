@@ -1,18 +1,42 @@
+import asyncio
+import bisect
+import contextvars
 import hashlib
+import heapq
 import hmac
+import itertools
 import json
+import os
+import re
+import string
 import time
-import traceback
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 from urllib.parse import parse_qs, urlencode, urlparse
 
+# array, pickle, traceback and zlib are imported inside the few functions
+# that need them, to keep them off the cold-start path. Measure with
+# script/profile_cold_start.py; tests/test_import_budget.py guards it.
+
 try:
-    from js import Object, fetch
+    from js import JSON, Object, fetch
     from pyodide.ffi import to_js as _to_js
     from workers import Response, WorkerEntrypoint
 except ImportError:
+    JSON = None
     Object = None
     Response = None
     WorkerEntrypoint = object
@@ -20,34 +44,360 @@ except ImportError:
     fetch = None
 
 
-PROJECTS_PER_PAGE = 100
-SCHEMA_STATEMENTS = [
-    (
-        "CREATE TABLE IF NOT EXISTS slack_activity ("
-        "id INTEGER PRIMARY KEY AUTOINCREMENT, "
-        "activity_kind TEXT NOT NULL, "
-        "slack_type TEXT, "
-        "command_name TEXT, "
-        "team_id TEXT, "
-        "user_id TEXT, "
-        "channel_id TEXT, "
-        "payload_json TEXT NOT NULL, "
-        "received_at TEXT NOT NULL"
-        ")"
+PROJECT_SUGGESTION_LIMIT = 50
+FAST_COMMAND = "fast"
+DEFERRED_COMMAND = "deferred"
+# Commands that wait on GitHub are acknowledged immediately and finished in
+# waitUntil, posting their result to the payload's response_url. Anything
+# not listed here is answered inline.
+COMMAND_MODES = {
+    "/contributors": DEFERRED_COMMAND,
+    "/stats": DEFERRED_COMMAND,
+    "/ghissue": DEFERRED_COMMAND,
+}
+SEARCH_NGRAM_SIZE = 3
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+# Upper bounds, in milliseconds, of the latency histogram buckets. A final
+# overflow bucket counts anything slower than the last bound.
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+LATENCY_LOG_INTERVAL_SECONDS = 60.0
+# Fraction of requests traced when TRACE_SAMPLE_RATE is not set; 0 keeps
+# tracing in its no-op mode.
+TRACE_SAMPLE_RATE = 0.0
+TRACE_SQL_MAX_CHARS = 200
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+# Path segments naming one resource (numbers, Slack IDs, response_url tokens)
+# are collapsed so spans group by endpoint and never carry secrets.
+TRACE_ID_SEGMENT = re.compile(r"^(?:\d+|[A-Z0-9]{6,}|[A-Za-z0-9_-]{20,})$")
+SQL_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+RESPONSE_CACHE_SIZE = 128
+GITHUB_FETCH_TIMEOUT_SECONDS = 2.5
+GITHUB_HTTP_CACHE_SIZE = 64
+# Paginated and windowed URLs carry the page and since= date, so their rows
+# go unused within a day or two. The cron trigger drops rows older than this;
+# an entry still in use only costs one full fetch to store again.
+GITHUB_HTTP_CACHE_RETENTION_SECONDS = 2 * 24 * 3600
+# Calls blocked by a rate limit for longer than this are refused outright;
+# shorter waits are slept through.
+GITHUB_RATE_LIMIT_MAX_DEFER_SECONDS = 1.0
+# Back-off for secondary limits that carry no Retry-After, doubling per
+# consecutive hit, plus up to 25% random jitter on every back-off.
+GITHUB_RATE_LIMIT_BACKOFF_SECONDS = 60.0
+GITHUB_RATE_LIMIT_BACKOFF_MAX_SECONDS = 900.0
+GITHUB_RATE_LIMIT_JITTER = 0.25
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+GITHUB_GRAPHQL_MAX_PAGES = 10
+# REST list and search pages: 100 items each, at most 10 pages per stream
+# (search never returns more than 1,000 results), 4 page requests in flight.
+GITHUB_PAGE_SIZE = 100
+GITHUB_MAX_PAGES = 10
+GITHUB_PAGE_CONCURRENCY = 4
+GITHUB_LINK_LAST_PATTERN = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+# One request covers all four REST calls and fetches only author logins.
+# Connections that are exhausted are skipped on later pages via @include.
+# "commented" finds issues and PRs updated in the window; their comments and
+# review comments are then filtered on updatedAt, matching REST
+# issues/comments?since= and pulls/comments?since=.
+CONTRIBUTOR_ACTIVITY_QUERY = """
+query(
+  $prs: String!, $issues: String!, $commented: String!,
+  $prsCursor: String, $issuesCursor: String, $commentedCursor: String,
+  $withPrs: Boolean!, $withIssues: Boolean!, $withCommented: Boolean!
+) {
+  prs: search(type: ISSUE, query: $prs, first: 100, after: $prsCursor)
+    @include(if: $withPrs) {
+    pageInfo { hasNextPage endCursor }
+    nodes { ... on PullRequest { author { __typename login } } }
+  }
+  issues: search(type: ISSUE, query: $issues, first: 100, after: $issuesCursor)
+    @include(if: $withIssues) {
+    pageInfo { hasNextPage endCursor }
+    nodes { ... on Issue { author { __typename login } } }
+  }
+  commented: search(
+    type: ISSUE, query: $commented, first: 50, after: $commentedCursor
+  ) @include(if: $withCommented) {
+    pageInfo { hasNextPage endCursor }
+    nodes {
+      ... on Issue {
+        comments(last: 100) { nodes { author { __typename login } updatedAt } }
+      }
+      ... on PullRequest {
+        comments(last: 100) { nodes { author { __typename login } updatedAt } }
+        reviews(last: 20) {
+          nodes {
+            comments(last: 50) { nodes { author { __typename login } updatedAt } }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+# Author logins are all the contributor counters read from the REST calls;
+# total_count tells a search that hit the 1,000 result cap.
+GITHUB_SEARCH_AUTHOR_FIELDS = ("total_count", "items.user.login")
+GITHUB_COMMENT_AUTHOR_FIELDS = ("user.login",)
+# Reconciliation also needs each item's ID and the timestamp that dates it.
+GITHUB_SEARCH_CONTRIBUTION_FIELDS = GITHUB_SEARCH_AUTHOR_FIELDS + (
+    "items.number",
+    "items.closed_at",
+    "items.pull_request.merged_at",
+)
+GITHUB_COMMENT_CONTRIBUTION_FIELDS = GITHUB_COMMENT_AUTHOR_FIELDS + (
+    "id",
+    "created_at",
+)
+CONTRIBUTOR_WINDOW_DAYS = 7
+CONTRIBUTOR_MAX_WINDOW_DAYS = 365
+CONTRIBUTOR_METRICS = ("prs", "issues", "comments", "reviews")
+CONTRIBUTOR_CACHE_TTL_SECONDS = 300
+CONTRIBUTOR_CACHE_STALE_SECONDS = 3600
+CONTRIBUTOR_REFRESH_LEASE_SECONDS = 30
+WORKSPACE_CACHE_TTL_SECONDS = 600
+WORKSPACE_NEGATIVE_CACHE_TTL_SECONDS = 60
+WORKSPACE_CACHE_SIZE = 1024
+# Slack retries an event up to three times within a few minutes. Deliveries
+# seen within the window are acknowledged without doing the work again.
+SLACK_DELIVERY_WINDOW_SECONDS = 3600
+SLACK_DELIVERY_CACHE_SIZE = 4096
+SLACK_DELIVERY_PRUNE_INTERVAL_SECONDS = 600
+# Webhook event -> (action, object, ID field, timestamp field, metric). An
+# event counts when its object carries the timestamp, so unmerged closed PRs
+# do not. These are the same contributions fetch_contributor_activity reads.
+GITHUB_WEBHOOK_CONTRIBUTIONS = {
+    "pull_request": ("closed", "pull_request", "number", "merged_at", "prs"),
+    "issues": ("closed", "issue", "number", "closed_at", "issues"),
+    "issue_comment": ("created", "comment", "id", "created_at", "comments"),
+    "pull_request_review_comment": (
+        "created",
+        "comment",
+        "id",
+        "created_at",
+        "reviews",
+    ),
+}
+GITHUB_CONTRIBUTION_INSERT_SQL = (
+    "INSERT INTO github_contributions (repo, metric, item, day, login) "
+    "VALUES (?, ?, ?, ?, ?) ON CONFLICT(repo, metric, item) DO NOTHING"
+)
+GITHUB_CONTRIBUTOR_DAILY_UPSERT_SQL = (
+    "INSERT INTO github_contributor_daily "
+    "(repo, day, login, prs, issues, comments, reviews) "
+    "SELECT ?, ?, ?, ?, ?, ?, ? WHERE changes() > 0 "
+    "ON CONFLICT(repo, day, login) DO UPDATE SET "
+    "prs = prs + excluded.prs, issues = issues + excluded.issues, "
+    "comments = comments + excluded.comments, reviews = reviews + excluded.reviews"
+)
+# Full days the scheduled reconciliation rewrites from GitHub. It runs from
+# the cron trigger, not behind a Slack ack, so it can wait far longer.
+GITHUB_RECONCILE_DAYS = 30
+GITHUB_RECONCILE_TIMEOUT_SECONDS = 60.0
+# D1 binds at most 100 parameters per statement, so contributions are written
+# 20 rows per INSERT and a bounded number of INSERTs per batch.
+GITHUB_RECONCILE_ROWS_PER_INSERT = 20
+GITHUB_RECONCILE_STATEMENTS_PER_BATCH = 50
+ACTIVITY_FLUSH_MAX_ROWS = 20
+ACTIVITY_FLUSH_MAX_AGE_SECONDS = 10.0
+ACTIVITY_BUFFER_LIMIT = 500
+ACTIVITY_RETRY_BACKOFF_SECONDS = 2.0
+ACTIVITY_RETRY_BACKOFF_MAX_SECONDS = 60.0
+# A pending flush sleeps inside some request's waitUntil, which the runtime
+# cuts off about 30 s after the response. Longer backoffs are left to a later
+# request or the cron trigger.
+ACTIVITY_FLUSH_MAX_WAIT_SECONDS = 15.0
+ACTIVITY_PAYLOAD_MAX_BYTES = 16384
+ACTIVITY_PAYLOAD_STRING_LIMIT = 1024
+ACTIVITY_PAYLOAD_COMPRESS_MIN_BYTES = 512
+# Fields kept in slack_activity.payload_json per activity kind. Kinds not
+# listed are stored whole. Dotted paths descend into objects and map over
+# lists; OAuth tokens are deliberately left out.
+ACTIVITY_PAYLOAD_FIELDS = {
+    "slash_command": (
+        "api_app_id",
+        "channel_id",
+        "channel_name",
+        "command",
+        "enterprise_id",
+        "is_enterprise_install",
+        "response_url",
+        "team_domain",
+        "team_id",
+        "text",
+        "trigger_id",
+        "user_id",
+        "user_name",
     ),
-    (
-        "CREATE INDEX IF NOT EXISTS idx_slack_activity_received_at "
-        "ON slack_activity(received_at)"
+    "interaction": (
+        "type",
+        "api_app_id",
+        "trigger_id",
+        "team.id",
+        "team.domain",
+        "user.id",
+        "user.name",
+        "channel.id",
+        "channel.name",
+        "container.type",
+        "container.message_ts",
+        "actions.type",
+        "actions.action_id",
+        "actions.block_id",
+        "actions.value",
+        "actions.selected_option.value",
+        "actions.action_ts",
     ),
-    (
-        "CREATE TABLE IF NOT EXISTS workspace_installations ("
-        "team_id TEXT PRIMARY KEY, "
-        "installer_user_id TEXT NOT NULL, "
-        "installed_at TEXT NOT NULL"
-        ")"
+    "event": (
+        "type",
+        "api_app_id",
+        "team_id",
+        "event_id",
+        "event_time",
+        "event.type",
+        "event.subtype",
+        "event.user.id",
+        "event.user.name",
+        "event.channel",
+        "event.channel_type",
+        "event.ts",
+        "event.bot_id",
     ),
-]
+    "oauth_callback": (
+        "type",
+        "team_id",
+        "payload.ok",
+        "payload.error",
+        "payload.app_id",
+        "payload.scope",
+        "payload.bot_user_id",
+        "payload.is_enterprise_install",
+        "payload.team.id",
+        "payload.team.name",
+        "payload.enterprise.id",
+        "payload.authed_user.id",
+    ),
+}
+ACTIVITY_INSERT_SQL = (
+    "INSERT INTO slack_activity ("
+    "activity_kind, slack_type, command_name, team_id, user_id, channel_id, payload_json, received_at"
+    ") VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+SCHEMA_MIGRATIONS_TABLE_SQL = (
+    "CREATE TABLE IF NOT EXISTS schema_migrations ("
+    "version INTEGER PRIMARY KEY, "
+    "name TEXT NOT NULL, "
+    "applied_at TEXT NOT NULL"
+    ")"
+)
+# Wrangler's own tracking table, created here with wrangler's definition.
+# `wrangler d1 migrations apply` and the worker each record what they apply
+# in both tables, so neither replays the other's migrations.
+D1_MIGRATIONS_TABLE_SQL = (
+    "CREATE TABLE IF NOT EXISTS d1_migrations ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+    "name TEXT UNIQUE, "
+    "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL"
+    ")"
+)
+# Tried in order: databases migrated only by wrangler have no
+# schema_migrations, and ones migrated by older workers no d1_migrations.
+SCHEMA_STATE_QUERIES = (
+    "SELECT (SELECT MAX(version) FROM schema_migrations) AS version, "
+    "(SELECT group_concat(name, ',') FROM d1_migrations) AS names",
+    "SELECT NULL AS version, group_concat(name, ',') AS names FROM d1_migrations",
+    "SELECT MAX(version) AS version, NULL AS names FROM schema_migrations",
+)
+SCHEMA_MIGRATION_PATTERN = re.compile(r"^(\d+)_[\w-]+\.sql$")
 SCHEMA_READY = False
+SCHEMA_MIGRATION_TASK: Optional["asyncio.Future[None]"] = None
+# (version, name, statements) parsed from migrations/, loaded once per isolate.
+SCHEMA_MIGRATIONS: Optional[List[Tuple[int, str, List[str]]]] = None
+ACTIVITY_DAILY_UPSERT_SQL = (
+    "INSERT INTO slack_activity_daily "
+    "(day, team_id, activity_kind, command_name, events) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(day, team_id, activity_kind, command_name) "
+    "DO UPDATE SET events = events + excluded.events"
+)
+ACTIVITY_TEAM_UPSERT_SQL = (
+    "INSERT INTO slack_team_activity "
+    "(team_id, events, first_seen_at, last_seen_at) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(team_id) DO UPDATE SET "
+    "events = events + excluded.events, "
+    "first_seen_at = MIN(first_seen_at, excluded.first_seen_at), "
+    "last_seen_at = MAX(last_seen_at, excluded.last_seen_at)"
+)
+# In-isolate tier of the contributor cache, keyed like the D1 rows.
+CONTRIBUTOR_CACHE: Dict[str, Dict[str, Any]] = {}
+CONTRIBUTOR_REFRESHES: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+# Validators and decoded bodies of GitHub GETs, in front of github_http_cache.
+GITHUB_HTTP_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+# Quota by (token fingerprint, resource) from GitHub's X-RateLimit headers.
+GITHUB_RATE_LIMITS: Dict[Tuple[str, str], Dict[str, Any]] = {}
+# Content digest of each catalog with the object it was taken from, so a
+# replaced catalog is hashed once and caches are keyed on what it holds.
+CATALOG_DIGESTS: Dict[str, Tuple[Dict[str, Any], str]] = {}
+SEARCH_INDEXES: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+# workspace_installations rows by team_id; an installer of None records that
+# the team has no row.
+WORKSPACE_CACHE: Dict[str, Dict[str, Any]] = {}
+# Event and interaction keys this isolate has handled, oldest first, in
+# front of the slack_deliveries table.
+SLACK_DELIVERIES: "OrderedDict[str, float]" = OrderedDict()
+SLACK_DELIVERIES_PRUNED_AT = 0.0
+# Background D1 claims still in flight, so a release can wait for them.
+SLACK_DELIVERY_CLAIMS: Dict[str, "asyncio.Future[Any]"] = {}
+# Serialized JSON bodies of the pure command handlers, in LRU order.
+RESPONSE_CACHE: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+RESPONSE_CACHE_FINGERPRINT: Optional[Tuple[str, str]] = None
+# slack_activity rows waiting to be written in one D1 batch.
+ACTIVITY_BUFFER: List[List[Any]] = []
+ACTIVITY_BUFFER_OLDEST: Optional[float] = None
+ACTIVITY_FLUSH_TASK: Optional["asyncio.Future[None]"] = None
+# Sleeps until the buffer is due, then flushes; every request that leaves
+# rows behind registers it with its own waitUntil.
+ACTIVITY_FLUSH_SCHEDULED: Optional["asyncio.Future[None]"] = None
+ACTIVITY_FLUSH_FAILURES = 0
+ACTIVITY_RETRY_AT = 0.0
+# Phase timings by scope ("route:/slack/commands", "command:/project") and
+# phase, logged and cleared once per LATENCY_LOG_INTERVAL_SECONDS.
+LATENCY_HISTOGRAMS: Dict[str, Dict[str, Dict[str, Any]]] = {}
+LATENCY_WINDOW_STARTED: Optional[float] = None
+# The innermost open span of the current request; None when it is not sampled.
+CURRENT_SPAN: "contextvars.ContextVar[Optional[Dict[str, Any]]]" = (
+    contextvars.ContextVar("current_span", default=None)
+)
+ISOLATE_ID = "{0:x}-{1:x}".format(int(time.time() * 1000), id(LATENCY_HISTOGRAMS))
+
+
+def reset_isolate_state() -> None:
+    global ACTIVITY_BUFFER_OLDEST, ACTIVITY_FLUSH_FAILURES, ACTIVITY_FLUSH_TASK
+    global ACTIVITY_FLUSH_SCHEDULED
+    global ACTIVITY_RETRY_AT, LATENCY_WINDOW_STARTED, MESSAGE_TEMPLATES
+    global RESPONSE_CACHE_FINGERPRINT, SCHEMA_MIGRATION_TASK, SCHEMA_READY
+    global SLACK_DELIVERIES_PRUNED_AT
+    SCHEMA_READY = False
+    SCHEMA_MIGRATION_TASK = None
+    ACTIVITY_BUFFER.clear()
+    ACTIVITY_BUFFER_OLDEST = None
+    ACTIVITY_FLUSH_TASK = None
+    ACTIVITY_FLUSH_SCHEDULED = None
+    ACTIVITY_FLUSH_FAILURES = 0
+    ACTIVITY_RETRY_AT = 0.0
+    CONTRIBUTOR_CACHE.clear()
+    CONTRIBUTOR_REFRESHES.clear()
+    GITHUB_HTTP_CACHE.clear()
+    GITHUB_RATE_LIMITS.clear()
+    CATALOG_DIGESTS.clear()
+    SEARCH_INDEXES.clear()
+    WORKSPACE_CACHE.clear()
+    SLACK_DELIVERIES.clear()
+    SLACK_DELIVERY_CLAIMS.clear()
+    SLACK_DELIVERIES_PRUNED_AT = 0.0
+    RESPONSE_CACHE.clear()
+    RESPONSE_CACHE_FINGERPRINT = None
+    MESSAGE_TEMPLATES = None
+    LATENCY_HISTOGRAMS.clear()
+    LATENCY_WINDOW_STARTED = None
 
 
 def _to_js_options(value: Dict[str, Any]) -> Any:
@@ -56,6 +406,12 @@ def _to_js_options(value: Dict[str, Any]) -> Any:
     return _to_js(value, dict_converter=Object.fromEntries)
 
 
+def _to_js_array(items: List[Any]) -> Any:
+    if _to_js is None:
+        return items
+    return _to_js(items)
+
+
 def to_python(value: Any) -> Any:
     try:
         return value.to_py()
@@ -80,6 +436,24 @@ def required_env_value(env: Any, name: str) -> str:
     return value
 
 
+def env_float(env: Any, name: str, default: float) -> float:
+    value = env_value(env, name)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+def has_database(env: Any) -> bool:
+    try:
+        getattr(env, "DB")
+    except Exception:
+        return False
+    return True
+
+
 def load_json_file(path: Path) -> Dict[str, Any]:
     try:
         return json.loads(path.read_text())
@@ -95,24 +469,93 @@ def load_text_file(path: Path) -> Optional[str]:
 
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
-PROJECT_DATA = load_json_file(ROOT_DIR / "data" / "projects.json")
-REPO_DATA = load_json_file(ROOT_DIR / "data" / "repos.json")
+CATALOG_SOURCES = {
+    "projects": ROOT_DIR / "data" / "projects.json",
+    "repos": ROOT_DIR / "data" / "repos.json",
+}
+# Written by script/build_catalog.py; the JSON sources are the fallback
+# when it is missing.
+CATALOG_ARTIFACT = ROOT_DIR / "data" / "catalog.pickle"
+CATALOG_ARTIFACT_VERSION = 1
+CATALOG_PICKLE_PROTOCOL = 4
+MESSAGE_TEMPLATE_DIR = ROOT_DIR / "data"
+MESSAGE_TEMPLATE_PATTERN = re.compile(r"^message-([A-Za-z0-9]+)-(\w+)\.md$")
+TEMPLATE_FORMATTER = string.Formatter()
+MESSAGE_TEMPLATES: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None
+# Loaded on first use rather than at import, see load_catalogs().
+PROJECT_DATA: Optional[Dict[str, Any]] = None
+REPO_DATA: Optional[Dict[str, Any]] = None
+
+
+def compile_message_template(text: str) -> Dict[str, Any]:
+    # Parsed once into (literal, field, format_spec, conversion) pieces so
+    # rendering is a join instead of re-parsing the template per event.
+    return {"text": text, "pieces": list(TEMPLATE_FORMATTER.parse(text))}
+
+
+def render_message_template(template: Dict[str, Any], context: Dict[str, Any]) -> str:
+    parts = []
+    for literal, field_name, format_spec, conversion in template["pieces"]:
+        parts.append(literal)
+        if field_name is None:
+            continue
+        try:
+            value = TEMPLATE_FORMATTER.get_field(field_name, (), context)[0]
+        except (KeyError, AttributeError, IndexError):
+            # Leave unknown placeholders visible rather than failing the event.
+            parts.append("{" + field_name + "}")
+            continue
+        if conversion:
+            value = TEMPLATE_FORMATTER.convert_field(value, conversion)
+        parts.append(TEMPLATE_FORMATTER.format_field(value, format_spec or ""))
+    return "".join(parts)
+
+
+def load_message_templates(directory: Path) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    templates = {}
+    if not directory.is_dir():
+        return templates
+    for path in directory.iterdir():
+        match = MESSAGE_TEMPLATE_PATTERN.match(path.name)
+        if match:
+            text = load_text_file(path)
+            if text:
+                templates[(match.group(1), match.group(2))] = compile_message_template(
+                    text
+                )
+    return templates
+
+
+def message_templates() -> Dict[Tuple[str, str], Dict[str, Any]]:
+    # Every data/message-<team>-<event>.md is discovered on first use, so a
+    # team or event without a template is a dictionary miss, not a disk read.
+    global MESSAGE_TEMPLATES
+    if MESSAGE_TEMPLATES is None:
+        MESSAGE_TEMPLATES = load_message_templates(MESSAGE_TEMPLATE_DIR)
+    return MESSAGE_TEMPLATES
 
 
 def get_team_message_template(team_id: str, event_name: str) -> Optional[str]:
     if not team_id:
         return None
-    template_path = ROOT_DIR / "data" / "message-{0}-{1}.md".format(team_id, event_name)
-    return load_text_file(template_path)
+    template = message_templates().get((team_id, event_name))
+    return template["text"] if template else None
 
 
-def render_team_join_message(
-    event_payload: Dict[str, Any], team_id: str
+def render_team_message(
+    team_id: str, event_name: str, context: Dict[str, Any]
 ) -> Optional[str]:
-    template = get_team_message_template(team_id, "team_join")
-    if not template:
+    if not team_id:
+        return None
+    template = message_templates().get((team_id, event_name))
+    if template is None:
         return None
+    return render_message_template(template, context)
 
+
+def render_team_join_message(
+    event_payload: Dict[str, Any], team_id: str
+) -> Optional[str]:
     user = event_payload.get("user") or {}
     username = (
         user.get("name")
@@ -121,7 +564,11 @@ def render_team_join_message(
         or user.get("id")
         or "there"
     )
-    return template.format(username=username)
+    return render_team_message(
+        team_id,
+        "team_join",
+        {"username": username, "user_id": user.get("id") or "", "team_id": team_id},
+    )
 
 
 def current_config_message(env: Any, team_id: str, installer_user_id: str) -> str:
@@ -176,12 +623,255 @@ def build_response(
     return Response(body, status=status, headers=response_headers)
 
 
-def json_response(payload: Dict[str, Any], status: int = 200) -> Any:
+def json_response(
+    payload: Dict[str, Any],
+    status: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Any:
+    return json_body_response(json.dumps(payload), status=status, headers=headers)
+
+
+def json_body_response(
+    body: str, status: int = 200, headers: Optional[Dict[str, str]] = None
+) -> Any:
+    return build_response(
+        body,
+        status=status,
+        content_type=JSON_CONTENT_TYPE,
+        headers=headers,
+    )
+
+
+def start_request_timing(env: Any, route: str) -> Dict[str, Any]:
+    now = time.perf_counter()
+    return {
+        "env": env,
+        "scopes": ["route:" + route],
+        "phases": {},
+        "started": now,
+        "last": now,
+    }
+
+
+def add_timing_scope(timing: Optional[Dict[str, Any]], scope: str) -> None:
+    if timing is not None and scope not in timing["scopes"]:
+        timing["scopes"].append(scope)
+
+
+def mark_phase(timing: Optional[Dict[str, Any]], phase: str) -> None:
+    # Charges the time since the previous mark to phase.
+    if timing is None:
+        return
+    now = time.perf_counter()
+    phases = timing["phases"]
+    phases[phase] = phases.get(phase, 0.0) + (now - timing["last"]) * 1000
+    timing["last"] = now
+
+
+def observe_latency(scope: str, phase: str, duration_ms: float) -> None:
+    histograms = LATENCY_HISTOGRAMS.setdefault(scope, {})
+    histogram = histograms.get(phase)
+    if histogram is None:
+        histogram = {
+            "counts": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            "count": 0,
+            "sum_ms": 0.0,
+        }
+        histograms[phase] = histogram
+    histogram["counts"][bisect.bisect_left(LATENCY_BUCKETS_MS, duration_ms)] += 1
+    histogram["count"] += 1
+    histogram["sum_ms"] += duration_ms
+
+
+def maybe_emit_latency_histograms(env: Any, now: Optional[float] = None) -> bool:
+    global LATENCY_WINDOW_STARTED
+    now = time.time() if now is None else now
+    if LATENCY_WINDOW_STARTED is None:
+        LATENCY_WINDOW_STARTED = now
+        return False
+    window = now - LATENCY_WINDOW_STARTED
+    interval = env_float(
+        env, "LATENCY_LOG_INTERVAL_SECONDS", LATENCY_LOG_INTERVAL_SECONDS
+    )
+    if window < interval or not LATENCY_HISTOGRAMS:
+        return False
+    histograms = {}
+    for scope, phases in LATENCY_HISTOGRAMS.items():
+        histograms[scope] = dict(
+            (
+                phase,
+                {
+                    "counts": histogram["counts"],
+                    "count": histogram["count"],
+                    "sum_ms": round(histogram["sum_ms"], 3),
+                },
+            )
+            for phase, histogram in phases.items()
+        )
+    payload = {
+        "level": "info",
+        "context": "latency_histograms",
+        "isolate": ISOLATE_ID,
+        "window_seconds": round(window, 3),
+        "buckets_ms": list(LATENCY_BUCKETS_MS),
+        "histograms": histograms,
+    }
+    print(json.dumps(payload, separators=(",", ":")))
+    LATENCY_HISTOGRAMS.clear()
+    LATENCY_WINDOW_STARTED = now
+    return True
+
+
+def finish_request_timing(timing: Dict[str, Any]) -> str:
+    total_ms = (time.perf_counter() - timing["started"]) * 1000
+    phases = list(timing["phases"].items()) + [("total", total_ms)]
+    for scope in timing["scopes"]:
+        for phase, duration_ms in phases:
+            observe_latency(scope, phase, duration_ms)
+    maybe_emit_latency_histograms(timing["env"])
+    return ", ".join(
+        "{0};dur={1:.1f}".format(phase, duration_ms) for phase, duration_ms in phases
+    )
+
+
+def timed_response(
+    timing: Optional[Dict[str, Any]],
+    body: str,
+    status: int = 200,
+    content_type: str = "text/plain; charset=utf-8",
+) -> Any:
+    if timing is None:
+        return build_response(body, status=status, content_type=content_type)
+    mark_phase(timing, "serialize")
     return build_response(
-        json.dumps(payload),
+        body,
         status=status,
-        content_type="application/json; charset=utf-8",
+        content_type=content_type,
+        headers={"Server-Timing": finish_request_timing(timing)},
+    )
+
+
+def timed_json_response(
+    timing: Optional[Dict[str, Any]], payload: Dict[str, Any], status: int = 200
+) -> Any:
+    return timed_response(
+        timing, json.dumps(payload), status=status, content_type=JSON_CONTENT_TYPE
+    )
+
+
+def describe_http_request(method: str, url: str) -> Tuple[str, Dict[str, Any]]:
+    parsed = urlparse(url)
+    path = "/".join(
+        ":id" if TRACE_ID_SEGMENT.match(segment) else segment
+        for segment in parsed.path.split("/")
     )
+    return "{0} {1}{2}".format(method, parsed.netloc, path), {
+        "method": method,
+        "host": parsed.netloc,
+        "path": path,
+    }
+
+
+def sql_fingerprint(sql: str) -> Tuple[str, str]:
+    normalized = " ".join(SQL_LITERAL_PATTERN.sub("?", sql).split())
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+    return normalized[:TRACE_SQL_MAX_CHARS], digest
+
+
+def describe_sql(sql: str) -> Tuple[str, Dict[str, Any]]:
+    normalized, digest = sql_fingerprint(sql)
+    return "d1 " + normalized.split(" ", 1)[0].upper(), {
+        "sql": normalized,
+        "fingerprint": digest,
+    }
+
+
+def describe_sql_batch(sqls: List[str]) -> Tuple[str, Dict[str, Any]]:
+    return "d1 batch", {
+        "statements": len(sqls),
+        "fingerprints": [sql_fingerprint(sql)[1] for sql in sqls],
+    }
+
+
+def _open_span(
+    trace_id: str,
+    parent_id: Optional[str],
+    kind: str,
+    describe: Callable[..., Tuple[str, Dict[str, Any]]],
+    args: Tuple[Any, ...],
+) -> Dict[str, Any]:
+    name, attributes = describe(*args)
+    span = {
+        "trace_id": trace_id,
+        "span_id": os.urandom(8).hex(),
+        "parent_id": parent_id,
+        "kind": kind,
+        "name": name,
+        "attributes": attributes,
+        "started": time.perf_counter(),
+    }
+    span["token"] = CURRENT_SPAN.set(span)
+    return span
+
+
+def start_trace(
+    env: Any,
+    traceparent: Optional[str],
+    describe: Callable[..., Tuple[str, Dict[str, Any]]],
+    *args: Any,
+) -> Optional[Dict[str, Any]]:
+    # Head-based sampling: decided once per request, and every span below
+    # inherits the decision through CURRENT_SPAN. An incoming traceparent
+    # keeps its trace ID and sampled flag.
+    rate = env_float(env, "TRACE_SAMPLE_RATE", TRACE_SAMPLE_RATE)
+    if rate <= 0:
+        return None
+    match = TRACEPARENT_PATTERN.match(traceparent or "")
+    if match:
+        if not int(match.group(3), 16) & 1:
+            return None
+        trace_id, parent_id = match.group(1), match.group(2)
+    elif rate >= 1 or int.from_bytes(os.urandom(4), "big") < rate * 2**32:
+        trace_id, parent_id = os.urandom(16).hex(), None
+    else:
+        return None
+    return _open_span(trace_id, parent_id, "request", describe, args)
+
+
+def start_span(
+    kind: str, describe: Callable[..., Tuple[str, Dict[str, Any]]], *args: Any
+) -> Optional[Dict[str, Any]]:
+    # describe only runs for sampled requests, so the no-op path is one
+    # ContextVar lookup.
+    parent = CURRENT_SPAN.get()
+    if parent is None:
+        return None
+    return _open_span(parent["trace_id"], parent["span_id"], kind, describe, args)
+
+
+def end_span(
+    span: Optional[Dict[str, Any]],
+    error: Optional[Exception] = None,
+    **attributes: Any,
+) -> None:
+    if span is None:
+        return
+    CURRENT_SPAN.reset(span.pop("token"))
+    record = {
+        "context": "span",
+        "trace_id": span["trace_id"],
+        "span_id": span["span_id"],
+        "kind": span["kind"],
+        "name": span["name"],
+        "duration_ms": round((time.perf_counter() - span["started"]) * 1000, 3),
+    }
+    if span["parent_id"]:
+        record["parent_id"] = span["parent_id"]
+    record.update(span["attributes"])
+    record.update(attributes)
+    if error is not None:
+        record["error"] = type(error).__name__
+    print(json.dumps(record, separators=(",", ":")))
 
 
 def html_response(body: str, status: int = 200) -> Any:
@@ -196,11 +886,28 @@ def parse_form_encoded(body: str) -> Dict[str, str]:
     return flatten_form_values(parse_qs(body, keep_blank_values=True))
 
 
+def run_in_background(ctx: Any, awaitable: Awaitable[Any], context: str) -> Any:
+    async def _run() -> Any:
+        try:
+            return await awaitable
+        except Exception as error:
+            log_exception_one_line(error, context)
+            return None
+
+    task = asyncio.ensure_future(_run())
+    wait_until = getattr(ctx, "waitUntil", None) if ctx is not None else None
+    if wait_until is not None:
+        wait_until(task)
+    return task
+
+
 def log_exception_one_line(
     error: Exception,
     context: str,
     extra: Optional[Dict[str, Any]] = None,
 ) -> None:
+    import traceback
+
     stack = "".join(
         traceback.format_exception(type(error), error, error.__traceback__)
     ).replace("\n", "\\n")
@@ -242,49 +949,41 @@ def verify_slack_signature(
     return hmac.compare_digest(expected, signature)
 
 
-def chunked(items: List[str], size: int) -> List[List[str]]:
-    return [items[index : index + size] for index in range(0, len(items), size)]
+def verify_github_signature(secret: str, body: str, signature: str) -> bool:
+    if not secret or not signature:
+        return False
+    expected = (
+        "sha256="
+        + hmac.new(
+            secret.encode("utf-8"), body.encode("utf-8"), hashlib.sha256
+        ).hexdigest()
+    )
+    return hmac.compare_digest(expected, signature)
 
 
 def make_section_block(text: str) -> Dict[str, Any]:
     return {"type": "section", "text": {"type": "mrkdwn", "text": text}}
 
 
-def build_project_selection_blocks(project_names: List[str]) -> List[Dict[str, Any]]:
-    if not project_names:
-        return [make_section_block("No projects are available right now.")]
-
-    blocks = []
-    project_pages = chunked(project_names, PROJECTS_PER_PAGE)
-    for index, page in enumerate(project_pages):
-        options = []
-        for project_name in page:
-            options.append(
-                {
-                    "text": {"type": "plain_text", "text": project_name[:75]},
-                    "value": project_name,
-                }
-            )
-        blocks.append(
-            {
-                "type": "section",
-                "block_id": "project_select_block_{0}".format(index),
-                "text": {
-                    "type": "mrkdwn",
-                    "text": "Select a project (Page {0})".format(index + 1),
-                },
-                "accessory": {
-                    "type": "static_select",
-                    "action_id": "project_select_action_{0}".format(index),
-                    "placeholder": {
-                        "type": "plain_text",
-                        "text": "Choose a project",
-                    },
-                    "options": options,
+def build_project_typeahead_blocks() -> List[Dict[str, Any]]:
+    # Options are served by block_suggestion_response as the user types, so
+    # this payload stays the same size however large the catalog grows.
+    return [
+        {
+            "type": "section",
+            "block_id": "project_select_block_0",
+            "text": {"type": "mrkdwn", "text": "Search for a project"},
+            "accessory": {
+                "type": "external_select",
+                "action_id": "project_select_action_0",
+                "placeholder": {
+                    "type": "plain_text",
+                    "text": "Start typing a project name",
                 },
-            }
-        )
-    return blocks
+                "min_query_length": 0,
+            },
+        }
+    ]
 
 
 def build_repo_selection_blocks(
@@ -312,7 +1011,7 @@ def build_repo_selection_blocks(
 
 
 def make_project_detail(project_name: str) -> Optional[str]:
-    project = PROJECT_DATA.get(project_name)
+    project = project_catalog().get(project_name)
     if not project:
         return None
     description = project[0] if project else "No description available."
@@ -323,141 +1022,452 @@ def make_project_detail(project_name: str) -> Optional[str]:
     return "\n".join(detail_lines)
 
 
-def search_projects(query: str, limit: int = 10) -> List[str]:
+def search_tokens(text: str) -> List[str]:
+    return [token for token in re.split(r"[^a-z0-9]+", text.lower()) if token]
+
+
+def build_search_index(entries: Dict[str, str]) -> Dict[str, Any]:
+    # Every posting list is a tuple of positions in ascending order, and names
+    # are sorted case-insensitively, so each ranking tier can be walked lazily
+    # in alphabetical order and the search stops as soon as it has enough hits.
+    names = tuple(sorted(entries, key=lambda name: (name.lower(), name)))
+    name_grams: Dict[str, Any] = {}
+    name_tokens: Dict[str, Any] = {}
+    description_tokens: Dict[str, Any] = {}
+    for position, name in enumerate(names):
+        lowered = name.lower()
+        grams = set()
+        for size in range(1, SEARCH_NGRAM_SIZE + 1):
+            for start in range(len(lowered) - size + 1):
+                grams.add(lowered[start : start + size])
+        for gram in grams:
+            name_grams.setdefault(gram, []).append(position)
+        for token in set(search_tokens(lowered)):
+            name_tokens.setdefault(token, []).append(position)
+        for token in set(search_tokens(entries[name] or "")):
+            description_tokens.setdefault(token, []).append(position)
+
+    return {
+        "names": names,
+        "lowered": tuple(name.lower() for name in names),
+        "name_grams": dict((key, tuple(value)) for key, value in name_grams.items()),
+        "name_tokens": dict((key, tuple(value)) for key, value in name_tokens.items()),
+        "name_token_keys": tuple(sorted(name_tokens)),
+        "description_tokens": dict(
+            (key, tuple(value)) for key, value in description_tokens.items()
+        ),
+        "description_token_keys": tuple(sorted(description_tokens)),
+    }
+
+
+def _posting_contains(positions: Tuple[int, ...], position: int) -> bool:
+    offset = bisect.bisect_left(positions, position)
+    return offset < len(positions) and positions[offset] == position
+
+
+def _iter_intersection(postings: List[Tuple[int, ...]]) -> Iterator[int]:
+    if not postings:
+        return
+    postings = sorted(postings, key=len)
+    for position in postings[0]:
+        if all(_posting_contains(other, position) for other in postings[1:]):
+            yield position
+
+
+def _iter_token_matches(
+    postings: Dict[str, Tuple[int, ...]], keys: Tuple[str, ...], tokens: List[str]
+) -> Iterator[int]:
+    # All tokens must match exactly except the last, which may be a prefix so
+    # partially typed words still hit.
+    if not tokens:
+        return
+    required = [postings.get(token, ()) for token in tokens[:-1]]
+    prefix = tokens[-1]
+    candidates = []
+    offset = bisect.bisect_left(keys, prefix)
+    while offset < len(keys) and keys[offset].startswith(prefix):
+        candidates.append(postings[keys[offset]])
+        offset += 1
+
+    if required:
+        # Drive the walk from whichever side is smaller and probe the rest, so
+        # a common word such as "project" never forces a full-catalog pass.
+        prefix_hits = set(itertools.chain.from_iterable(candidates))
+        required.sort(key=len)
+        if len(prefix_hits) < len(required[0]):
+            driver: Iterator[int] = iter(sorted(prefix_hits))
+            checks = required
+        else:
+            driver = (position for position in required[0] if position in prefix_hits)
+            checks = required[1:]
+        for position in driver:
+            if all(_posting_contains(positions, position) for positions in checks):
+                yield position
+        return
+
+    previous = -1
+    for position in heapq.merge(*candidates):
+        if position != previous:
+            yield position
+        previous = position
+
+
+def _iter_prefix_matches(lowered: Tuple[str, ...], prefix: str) -> Iterator[int]:
+    position = bisect.bisect_left(lowered, prefix)
+    while position < len(lowered) and lowered[position].startswith(prefix):
+        yield position
+        position += 1
+
+
+def _iter_substring_matches(index: Dict[str, Any], query: str) -> Iterator[int]:
+    if len(query) <= SEARCH_NGRAM_SIZE:
+        yield from index["name_grams"].get(query, ())
+        return
+    grams = set(
+        query[start : start + SEARCH_NGRAM_SIZE]
+        for start in range(len(query) - SEARCH_NGRAM_SIZE + 1)
+    )
+    lowered = index["lowered"]
+    for position in _iter_intersection(
+        [index["name_grams"].get(gram, ()) for gram in grams]
+    ):
+        if query in lowered[position]:
+            yield position
+
+
+def search_index(index: Dict[str, Any], query: str, limit: int = 10) -> List[str]:
+    # Ranking tiers: exact name, name prefix, name tokens, substring of the
+    # name, then description tokens. Names are alphabetical within a tier.
     normalized = query.strip().lower()
-    if not normalized:
+    if not normalized or limit <= 0:
         return []
-    matches = []
-    for project_name in sorted(PROJECT_DATA.keys()):
-        if normalized in project_name:
-            matches.append(project_name)
-        if len(matches) >= limit:
-            break
-    return matches
+    tokens = search_tokens(normalized)
+    tiers = (
+        itertools.takewhile(
+            lambda position: index["lowered"][position] == normalized,
+            _iter_prefix_matches(index["lowered"], normalized),
+        ),
+        _iter_prefix_matches(index["lowered"], normalized),
+        _iter_token_matches(index["name_tokens"], index["name_token_keys"], tokens),
+        _iter_substring_matches(index, normalized),
+        _iter_token_matches(
+            index["description_tokens"], index["description_token_keys"], tokens
+        ),
+    )
+
+    matches: List[int] = []
+    seen: Set[int] = set()
+    for tier in tiers:
+        for position in tier:
+            if position in seen:
+                continue
+            seen.add(position)
+            matches.append(position)
+            if len(matches) >= limit:
+                return [index["names"][match] for match in matches]
+    return [index["names"][match] for match in matches]
+
+
+def catalog_search_entries(kind: str, data: Dict[str, Any]) -> Dict[str, str]:
+    if kind == "projects":
+        return dict(
+            (name, str(values[0]) if values and values[0] != "None" else "")
+            for name, values in data.items()
+        )
+    return dict((name, "") for name in data)
+
+
+def catalog_source_digest(sources: Dict[str, Path]) -> str:
+    digest = hashlib.sha256()
+    for kind in sorted(sources):
+        try:
+            digest.update(sources[kind].read_bytes())
+        except FileNotFoundError:
+            pass
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def compact_search_index(index: Dict[str, Any]) -> Dict[str, Any]:
+    # Posting lists as unsigned int arrays unpickle as flat buffers instead
+    # of one int object per position: several times less memory and load
+    # time, for slightly slower bisects.
+    from array import array
+
+    compacted = dict(index)
+    for key in ("name_grams", "name_tokens", "description_tokens"):
+        compacted[key] = dict(
+            (token, array("I", positions)) for token, positions in index[key].items()
+        )
+    return compacted
+
+
+def compile_catalogs(sources: Dict[str, Path]) -> Dict[str, Any]:
+    # Everything the worker would otherwise derive per isolate: name-sorted
+    # catalogs with tuple values, plus the finished search indexes.
+    catalogs = {}
+    indexes = {}
+    for kind, path in sources.items():
+        raw = load_json_file(path)
+        data = dict((name, tuple(raw[name])) for name in sorted(raw))
+        catalogs[kind] = data
+        indexes[kind] = compact_search_index(
+            build_search_index(catalog_search_entries(kind, data))
+        )
+    return {
+        "version": CATALOG_ARTIFACT_VERSION,
+        "source_digest": catalog_source_digest(sources),
+        "catalogs": catalogs,
+        "indexes": indexes,
+    }
+
+
+def load_catalog_artifact(path: Path) -> Optional[Dict[str, Any]]:
+    # The wrangler [build] step compiles the artifact from the JSON it deploys
+    # with, so the source digest is checked there (build_catalog.py --check)
+    # and a cold start never reads or hashes the sources.
+    import pickle
+
+    try:
+        artifact = pickle.loads(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except Exception as error:
+        log_exception_one_line(error, "catalog_artifact_unreadable", {})
+        return None
+    if (
+        not isinstance(artifact, dict)
+        or artifact.get("version") != CATALOG_ARTIFACT_VERSION
+    ):
+        return None
+    return artifact
+
+
+def load_catalogs() -> None:
+    global PROJECT_DATA, REPO_DATA
+    artifact = load_catalog_artifact(CATALOG_ARTIFACT)
+    if artifact is None:
+        catalogs = dict(
+            (kind, load_json_file(path)) for kind, path in CATALOG_SOURCES.items()
+        )
+    else:
+        catalogs = artifact["catalogs"]
+    if PROJECT_DATA is None:
+        PROJECT_DATA = catalogs["projects"]
+    if REPO_DATA is None:
+        REPO_DATA = catalogs["repos"]
+    if artifact is not None:
+        for kind, data in (("projects", PROJECT_DATA), ("repos", REPO_DATA)):
+            if data is catalogs[kind]:
+                digest = "{0}:{1}".format(kind, artifact["source_digest"])
+                CATALOG_DIGESTS[kind] = (data, digest)
+                SEARCH_INDEXES[kind] = (digest, artifact["indexes"][kind])
+
+
+def project_catalog() -> Dict[str, Any]:
+    if PROJECT_DATA is None:
+        load_catalogs()
+    return PROJECT_DATA
+
+
+def repo_catalog() -> Dict[str, Any]:
+    if REPO_DATA is None:
+        load_catalogs()
+    return REPO_DATA
+
+
+def catalog_digest(kind: str) -> str:
+    # Catalogs are replaced, never edited in place, so the digest of an
+    # object holds for as long as it is the loaded catalog.
+    data = project_catalog() if kind == "projects" else repo_catalog()
+    known = CATALOG_DIGESTS.get(kind)
+    if known is not None and known[0] is data:
+        return known[1]
+    digest = hashlib.sha256(
+        json.dumps(data, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    CATALOG_DIGESTS[kind] = (data, digest)
+    return digest
+
+
+def catalog_search_index(kind: str) -> Dict[str, Any]:
+    data = project_catalog() if kind == "projects" else repo_catalog()
+    fingerprint = catalog_digest(kind)
+    cached = SEARCH_INDEXES.get(kind)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    index = build_search_index(catalog_search_entries(kind, data))
+    SEARCH_INDEXES[kind] = (fingerprint, index)
+    return index
+
+
+def catalog_fingerprint() -> Tuple[str, str]:
+    return (catalog_digest("projects"), catalog_digest("repos"))
+
+
+def search_projects(query: str, limit: int = 10) -> List[str]:
+    return search_index(catalog_search_index("projects"), query, limit)
+
+
+def suggest_projects(query: str, limit: int = PROJECT_SUGGESTION_LIMIT) -> List[str]:
+    if not query.strip():
+        return list(catalog_search_index("projects")["names"][:limit])
+    return search_projects(query, limit)
 
 
 def make_repo_detail(technology: str) -> Optional[str]:
-    repos = REPO_DATA.get(technology)
+    repos = repo_catalog().get(technology)
     if not repos:
         return None
     return "*{0} repositories*\n{1}".format(technology, "\n".join(repos))
 
 
 def search_repo_technologies(query: str, limit: int = 10) -> List[str]:
-    normalized = query.strip().lower()
-    if not normalized:
-        return []
-    matches = []
-    for tech_name in sorted(REPO_DATA.keys()):
-        if normalized in tech_name:
-            matches.append(tech_name)
-        if len(matches) >= limit:
-            break
-    return matches
+    return search_index(catalog_search_index("repos"), query, limit)
+
+
+def make_context_block(text: str) -> Dict[str, Any]:
+    return {"type": "context", "elements": [{"type": "mrkdwn", "text": text}]}
+
 
+def format_contributor_blocks(
+    rows: List[Dict[str, Any]],
+    errors: Optional[List[str]] = None,
+    notice: Optional[str] = None,
+    days: int = CONTRIBUTOR_WINDOW_DAYS,
+) -> Dict[str, Any]:
+    notes = []
+    if notice:
+        notes.append(make_context_block(":hourglass: {0}".format(notice)))
+    if errors:
+        notes.append(
+            make_context_block(
+                ":warning: Partial results, GitHub data is missing: {0}".format(
+                    "; ".join(errors)
+                )
+            )
+        )
+    window = "the last day" if days == 1 else "the last {0} days".format(days)
 
-def format_contributor_blocks(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
     if not rows:
+        message = "No contributor activity was found for {0}.".format(window)
+        if errors:
+            message = "Contributor activity could not be loaded from GitHub."
         return {
             "response_type": "ephemeral",
-            "text": "No contributor activity was found for the last 7 days.",
-            "blocks": [
-                make_section_block(
-                    "No contributor activity was found for the last 7 days."
-                )
-            ],
+            "text": message,
+            "blocks": [make_section_block(message)] + notes,
         }
 
-    user_width = max(len(str(row["user"])) for row in rows)
-    prs_width = max(len("PRs Merged"), max(len(str(row["prs"])) for row in rows))
-    issues_width = max(
-        len("Issues Closed"), max(len(str(row["issues"])) for row in rows)
-    )
-    comments_width = max(
-        len("Comments"), max(len(str(row["comments"])) for row in rows)
-    )
-
-    header = "{0:<{uw}}  {1:<{pw}}  {2:<{iw}}  {3:<{cw}}".format(
-        "User",
-        "PRs Merged",
-        "Issues Closed",
-        "Comments",
-        uw=user_width,
-        pw=prs_width,
-        iw=issues_width,
-        cw=comments_width,
-    )
-    separator = "{0}  {1}  {2}  {3}".format(
-        "-" * user_width,
-        "-" * prs_width,
-        "-" * issues_width,
-        "-" * comments_width,
-    )
-    body_rows = []
+    columns = [
+        ("User", "user"),
+        ("PRs Merged", "prs"),
+        ("Issues Closed", "issues"),
+        ("Comments", "comments"),
+        ("Review Comments", "reviews"),
+    ]
+    widths = [
+        max(len(title), max(len(str(row.get(key, 0))) for row in rows))
+        for title, key in columns
+    ]
+    lines = [
+        "  ".join(
+            "{0:<{1}}".format(title, width)
+            for (title, _), width in zip(columns, widths)
+        ),
+        "  ".join("-" * width for width in widths),
+    ]
     for row in rows:
-        body_rows.append(
-            "{0:<{uw}}  {1:<{pw}}  {2:<{iw}}  {3:<{cw}}".format(
-                row["user"],
-                row["prs"],
-                row["issues"],
-                row["comments"],
-                uw=user_width,
-                pw=prs_width,
-                iw=issues_width,
-                cw=comments_width,
+        lines.append(
+            "  ".join(
+                "{0:<{1}}".format(row.get(key, 0), width)
+                for (_, key), width in zip(columns, widths)
             )
         )
 
-    table = "\n".join([header, separator] + body_rows)
+    table = "\n".join(lines)
     return {
         "response_type": "ephemeral",
-        "text": "Contributor activity for the last 7 days.",
+        "text": "Contributor activity for {0}.".format(window),
         "blocks": [
             make_section_block("*Contributor Activity*\n```{0}```".format(table))
-        ],
+        ]
+        + notes,
     }
 
 
+def count_contributions(
+    counts: Dict[str, Dict[str, int]], metric: str, items: Iterable[Any]
+) -> None:
+    # Folds one page of items into running per-user counters, so a report
+    # holds one small dict per contributor however many pages were read.
+    for item in items:
+        user = ((item or {}).get("user") or {}).get("login")
+        if not user:
+            continue
+        if user not in counts:
+            counts[user] = dict((name, 0) for name in CONTRIBUTOR_METRICS)
+        counts[user][metric] += 1
+
+
+def contributor_rows(counts: Dict[str, Dict[str, int]]) -> List[Dict[str, Any]]:
+    rows = []
+    for user, user_counts in counts.items():
+        row: Dict[str, Any] = {"user": user}
+        row.update(user_counts)
+        row["total"] = sum(user_counts.values())
+        rows.append(row)
+    rows.sort(key=lambda row: (-row["total"], row["user"]))
+    return rows
+
+
 def summarize_contributors(
     pull_requests: List[Dict[str, Any]],
     issues: List[Dict[str, Any]],
     comments: List[Dict[str, Any]],
+    reviews: Optional[List[Dict[str, Any]]] = None,
 ) -> List[Dict[str, Any]]:
-    user_data = {}
-    for collection_name, collection in (
-        ("prs", pull_requests),
-        ("issues", issues),
-        ("comments", comments),
-    ):
-        for item in collection:
-            user = item.get("user", {}).get("login")
-            if not user:
-                continue
-            if user not in user_data:
-                user_data[user] = {"prs": 0, "issues": 0, "comments": 0}
-            user_data[user][collection_name] += 1
-
-    rows = []
-    for user, counts in user_data.items():
-        rows.append(
-            {
-                "user": user,
-                "prs": counts["prs"],
-                "issues": counts["issues"],
-                "comments": counts["comments"],
-                "total": counts["prs"] + counts["issues"] + counts["comments"],
-            }
-        )
-    rows.sort(key=lambda row: (-row["total"], row["user"]))
-    return rows
+    counts: Dict[str, Dict[str, int]] = {}
+    count_contributions(counts, "prs", pull_requests)
+    count_contributions(counts, "issues", issues)
+    count_contributions(counts, "comments", comments)
+    count_contributions(counts, "reviews", reviews or [])
+    return contributor_rows(counts)
+
+
+def projection_keys(spec: Dict[str, Any]) -> List[str]:
+    keys: Set[str] = set()
+    for key, child in spec.items():
+        keys.add(key)
+        if child is not None:
+            keys.update(projection_keys(child))
+    return sorted(keys)
+
+
+async def read_projected_json(response: Any, projection: Dict[str, Any]) -> Any:
+    # Parses with the runtime's JSON.parse and lets JSON.stringify keep only
+    # the projected keys, so the full body never becomes a Python string or
+    # object graph. The key list filters at every depth, so projection
+    # leaves must be scalars; project_fields then applies the exact paths.
+    try:
+        data = await response.json()
+    except Exception:
+        return {}
+    text = JSON.stringify(data, _to_js_array(projection_keys(projection)))
+    return project_fields(json.loads(str(text)), projection)
 
 
-async def fetch_json(
+async def fetch_json_response(
     url: str,
     method: str = "GET",
     headers: Optional[Dict[str, str]] = None,
     body: Optional[str] = None,
-) -> Tuple[bool, Dict[str, Any], int]:
+    projection: Optional[Dict[str, Any]] = None,
+) -> Tuple[bool, Dict[str, Any], int, Any]:
+    # Like fetch_json, plus the response headers object (anything with .get).
+    # A projection (from compile_field_projection) trims successful bodies;
+    # error bodies are always decoded whole so their message survives.
     if fetch is None:
         raise RuntimeError("Cloudflare Workers runtime is required for outbound fetch")
 
@@ -465,179 +1475,1721 @@ async def fetch_json(
     if body is not None:
         options["body"] = body
 
-    response = await fetch(url, _to_js_options(options))
-    text = await response.text()
-    payload = {}
-    if text:
-        payload = json.loads(str(text))
-    return bool(response.ok), payload, int(response.status)
+    span = start_span("http", describe_http_request, method, url)
+    text = None
+    try:
+        response = await fetch(url, _to_js_options(options))
+        native = projection is not None and JSON is not None and bool(response.ok)
+        if native:
+            payload = await read_projected_json(response, projection)
+        else:
+            text = await response.text()
+    except Exception as error:
+        end_span(span, error=error)
+        raise
+    if span is not None:
+        if native:
+            size = _header_number(response.headers, "Content-Length")
+        else:
+            size = len(str(text or "").encode("utf-8"))
+        end_span(span, status=int(response.status), bytes=size)
+    if not native:
+        payload = {}
+        if text:
+            try:
+                payload = json.loads(str(text))
+            except ValueError:
+                # response_url and some Slack endpoints answer with plain "ok".
+                payload = {}
+        if projection is not None and response.ok:
+            payload = project_fields(payload, projection)
+    return bool(response.ok), payload, int(response.status), response.headers
+
+
+async def fetch_json(
+    url: str,
+    method: str = "GET",
+    headers: Optional[Dict[str, str]] = None,
+    body: Optional[str] = None,
+) -> Tuple[bool, Dict[str, Any], int]:
+    ok, payload, status, _ = await fetch_json_response(url, method, headers, body)
+    return ok, payload, status
+
+
+def github_rate_limit_key(
+    url: str, headers: Optional[Dict[str, str]]
+) -> Tuple[str, str]:
+    authorization = (headers or {}).get("Authorization", "")
+    token_id = "anonymous"
+    if authorization:
+        token_id = hashlib.sha256(authorization.encode("utf-8")).hexdigest()[:12]
+    path = urlparse(url).path
+    if path.startswith("/search/"):
+        return token_id, "search"
+    if path == "/graphql":
+        return token_id, "graphql"
+    return token_id, "core"
+
+
+def github_rate_limit_wait(key: Tuple[str, str], now: float) -> float:
+    state = GITHUB_RATE_LIMITS.get(key)
+    if state is None:
+        return 0.0
+    blocked_until = state["retry_at"]
+    if state["remaining"] is not None and state["remaining"] <= 0:
+        blocked_until = max(blocked_until, state["reset_at"])
+    return max(0.0, blocked_until - now)
+
+
+def is_github_rate_limited(status: int, payload: Any) -> bool:
+    if status == 429:
+        return True
+    message = payload.get("message") if isinstance(payload, dict) else None
+    return status == 403 and "rate limit" in str(message or "").lower()
+
+
+def _header_number(headers: Any, name: str) -> Optional[float]:
+    value = headers.get(name) if headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def record_github_rate_limit(
+    key: Tuple[str, str], status: int, payload: Any, headers: Any, now: float
+) -> None:
+    state = GITHUB_RATE_LIMITS.setdefault(
+        key, {"remaining": None, "reset_at": 0.0, "retry_at": 0.0, "failures": 0}
+    )
+    remaining = _header_number(headers, "X-RateLimit-Remaining")
+    reset_at = _header_number(headers, "X-RateLimit-Reset")
+    if remaining is not None:
+        state["remaining"] = int(remaining)
+    if reset_at is not None:
+        state["reset_at"] = reset_at
+    if not is_github_rate_limited(status, payload):
+        state["failures"] = 0
+        return
+    state["failures"] += 1
+    retry_after = _header_number(headers, "Retry-After")
+    if retry_after is not None:
+        delay = retry_after
+    elif state["remaining"] == 0 and state["reset_at"] > now:
+        delay = state["reset_at"] - now
+    else:
+        delay = min(
+            GITHUB_RATE_LIMIT_BACKOFF_SECONDS * 2 ** (state["failures"] - 1),
+            GITHUB_RATE_LIMIT_BACKOFF_MAX_SECONDS,
+        )
+    jitter = int.from_bytes(os.urandom(2), "big") / 65535
+    state["retry_at"] = now + delay * (1 + GITHUB_RATE_LIMIT_JITTER * jitter)
+
+
+async def fetch_github_response(
+    url: str,
+    method: str = "GET",
+    headers: Optional[Dict[str, str]] = None,
+    body: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Tuple[bool, Any, int, Any]:
+    # fetch_json_response that spends GitHub quota carefully: calls that would
+    # overrun a known exhausted budget or land inside a back-off are refused
+    # with a synthetic 429 instead of being sent.
+    key = github_rate_limit_key(url, headers)
+    wait = github_rate_limit_wait(key, time.time())
+    if wait > GITHUB_RATE_LIMIT_MAX_DEFER_SECONDS:
+        message = "GitHub {0} rate limit reached, retry in {1:.0f}s".format(
+            key[1], wait
+        )
+        return False, {"message": message}, 429, None
+    if wait:
+        await asyncio.sleep(wait)
+    state = GITHUB_RATE_LIMITS.get(key)
+    if state is not None and state["remaining"] is not None:
+        # Counts calls in flight so concurrent callers cannot overspend.
+        state["remaining"] -= 1
+    ok, payload, status, response_headers = await fetch_json_response(
+        url, method, headers, body, projection
+    )
+    record_github_rate_limit(key, status, payload, response_headers, time.time())
+    return ok, payload, status, response_headers
+
+
+def github_cache_key(
+    url: str, headers: Dict[str, str], projection: Optional[Dict[str, Any]] = None
+) -> str:
+    # GitHub varies responses on Accept and Authorization, so a token change
+    # must not reuse another token's validators. Bodies are stored
+    # projected, so the projection is part of the key too.
+    parts = [url, headers.get("Accept", ""), headers.get("Authorization", "")]
+    if projection is not None:
+        parts.append(json.dumps(projection, sort_keys=True))
+    identity = "\n".join(parts)
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def remember_github_response(cache_key: str, entry: Dict[str, Any]) -> None:
+    GITHUB_HTTP_CACHE.pop(cache_key, None)
+    GITHUB_HTTP_CACHE[cache_key] = entry
+    while len(GITHUB_HTTP_CACHE) > GITHUB_HTTP_CACHE_SIZE:
+        GITHUB_HTTP_CACHE.popitem(last=False)
+
+
+async def load_github_response(env: Any, cache_key: str) -> Optional[Dict[str, Any]]:
+    entry = GITHUB_HTTP_CACHE.get(cache_key)
+    if entry is not None or not has_database(env):
+        return entry
+    try:
+        await ensure_schema(env)
+        result = await d1_run(
+            env,
+            (
+                "SELECT etag, last_modified, link, body_json, stored_at "
+                "FROM github_http_cache WHERE cache_key = ? LIMIT 1"
+            ),
+            [cache_key],
+        )
+    except Exception as error:
+        log_exception_one_line(error, "github_cache_read_failed")
+        return None
+    rows = result.get("results") or []
+    if not rows:
+        return None
+    entry = {
+        "etag": rows[0].get("etag"),
+        "last_modified": rows[0].get("last_modified"),
+        "link": rows[0].get("link"),
+        "body": json.loads(rows[0]["body_json"]),
+        "stored_at": float(rows[0]["stored_at"]),
+    }
+    remember_github_response(cache_key, entry)
+    return entry
+
+
+async def store_github_response(
+    env: Any, cache_key: str, url: str, entry: Dict[str, Any]
+) -> None:
+    remember_github_response(cache_key, entry)
+    if not has_database(env):
+        return
+    try:
+        await ensure_schema(env)
+        await d1_run(
+            env,
+            (
+                "INSERT INTO github_http_cache "
+                "(cache_key, url, etag, last_modified, link, body_json, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(cache_key) DO UPDATE SET "
+                "url = excluded.url, etag = excluded.etag, "
+                "last_modified = excluded.last_modified, link = excluded.link, "
+                "body_json = excluded.body_json, stored_at = excluded.stored_at"
+            ),
+            [
+                cache_key,
+                url,
+                entry["etag"],
+                entry["last_modified"],
+                entry.get("link"),
+                json.dumps(entry["body"]),
+                entry["stored_at"],
+            ],
+        )
+    except Exception as error:
+        log_exception_one_line(error, "github_cache_write_failed")
+
+
+async def prune_github_http_cache(env: Any, now: float) -> None:
+    if not has_database(env):
+        return
+    await ensure_schema(env)
+    await d1_run(
+        env,
+        "DELETE FROM github_http_cache WHERE stored_at < ?",
+        [now - GITHUB_HTTP_CACHE_RETENTION_SECONDS],
+    )
+
+
+async def fetch_github_page(
+    env: Any,
+    url: str,
+    headers: Dict[str, str],
+    projection: Optional[Dict[str, Any]] = None,
+) -> Tuple[bool, Any, int, Optional[str]]:
+    # Conditional GET: a 304 costs no primary rate limit and no body, and is
+    # answered from the stored copy of the last 200. The Link header is kept
+    # with it so a cached first page still says how many pages follow.
+    cache_key = github_cache_key(url, headers, projection)
+    cached = await load_github_response(env, cache_key)
+    request_headers = dict(headers)
+    if cached is not None:
+        if cached.get("etag"):
+            request_headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            request_headers["If-Modified-Since"] = cached["last_modified"]
+
+    ok, payload, status, response_headers = await fetch_github_response(
+        url, headers=request_headers, projection=projection
+    )
+    if status == 304 and cached is not None:
+        return True, cached["body"], status, cached.get("link")
+    link = response_headers.get("Link") if response_headers else None
+    if ok:
+        etag = response_headers.get("ETag") if response_headers else None
+        last_modified = (
+            response_headers.get("Last-Modified") if response_headers else None
+        )
+        if etag or last_modified:
+            await store_github_response(
+                env,
+                cache_key,
+                url,
+                {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "link": link,
+                    "body": payload,
+                    "stored_at": time.time(),
+                },
+            )
+    return ok, payload, status, link
+
+
+def github_last_page(link: Optional[str]) -> int:
+    match = GITHUB_LINK_LAST_PATTERN.search(link or "")
+    return int(match.group(1)) if match else 1
+
+
+async def fold_github_pages(
+    env: Any,
+    url: str,
+    headers: Dict[str, str],
+    projection: Optional[Dict[str, Any]],
+    fold: Callable[[Any], None],
+) -> Tuple[bool, Any, int, bool]:
+    # Reads page 1, then the remaining pages its Link header announces, up to
+    # GITHUB_MAX_PAGES with GITHUB_PAGE_CONCURRENCY in flight. Each page is
+    # folded as it arrives and then dropped. Returns the first failed page's
+    # (ok, payload, status), or page 1's, plus whether pages were left unread.
+    ok, payload, status, link = await fetch_github_page(env, url, headers, projection)
+    if not ok:
+        return ok, payload, status, False
+    fold(payload)
+    last_page = github_last_page(link)
+    total_count = payload.get("total_count") if isinstance(payload, dict) else None
+    truncated = last_page > GITHUB_MAX_PAGES or (
+        isinstance(total_count, int)
+        and total_count > GITHUB_MAX_PAGES * GITHUB_PAGE_SIZE
+    )
+    limit = asyncio.Semaphore(GITHUB_PAGE_CONCURRENCY)
+    failures: List[Tuple[bool, Any, int]] = []
+
+    async def read_page(page: int) -> None:
+        async with limit:
+            if failures:
+                return
+            page_result = await fetch_github_page(
+                env, "{0}&page={1}".format(url, page), headers, projection
+            )
+        if not page_result[0]:
+            failures.append(page_result[:3])
+            return
+        fold(page_result[1])
+
+    await asyncio.gather(
+        *[read_page(page) for page in range(2, min(last_page, GITHUB_MAX_PAGES) + 1)]
+    )
+    if failures:
+        return failures[0] + (truncated,)
+    return ok, payload, status, truncated
+
+
+async def gather_concurrently(
+    calls: Dict[str, Awaitable[Any]], timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    # Results map each name to its value or raised exception so callers can
+    # report partial data; cancelling the caller cancels every call with it.
+    tasks = dict((name, asyncio.ensure_future(call)) for name, call in calls.items())
+    try:
+        _, pending = await asyncio.wait(list(tasks.values()), timeout=timeout)
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    results = {}
+    for name, task in tasks.items():
+        if task in pending:
+            results[name] = asyncio.TimeoutError("{0} timed out".format(name))
+        elif task.cancelled():
+            results[name] = asyncio.CancelledError()
+        elif task.exception() is not None:
+            results[name] = task.exception()
+        else:
+            results[name] = task.result()
+    return results
+
+
+def _d1_params(params: List[Any]) -> List[Any]:
+    # bytes must cross into JS as a Uint8Array for D1 to store them as a BLOB.
+    if _to_js is None:
+        return params
+    return [
+        _to_js(param) if isinstance(param, (bytes, bytearray)) else param
+        for param in params
+    ]
+
+
+async def d1_run(
+    env: Any, sql: str, params: Optional[List[Any]] = None
+) -> Dict[str, Any]:
+    statement = env.DB.prepare(sql)
+    if params:
+        statement = statement.bind(*_d1_params(params))
+    span = start_span("d1", describe_sql, sql)
+    try:
+        result = to_python(await statement.run())
+    except Exception as error:
+        end_span(span, error=error)
+        raise
+    if span is not None:
+        meta = result.get("meta") or {}
+        end_span(
+            span,
+            rows=len(result.get("results") or []),
+            changes=meta.get("changes"),
+        )
+    return result
+
+
+def split_sql_statements(script: str) -> List[str]:
+    # Good enough for our migrations: no semicolons inside string literals.
+    lines = [line for line in script.splitlines() if not line.strip().startswith("--")]
+    return [
+        statement.strip()
+        for statement in "\n".join(lines).split(";")
+        if statement.strip()
+    ]
+
+
+def load_schema_migrations(directory: Path) -> List[Tuple[int, str, List[str]]]:
+    if not directory.is_dir():
+        return []
+    migrations = []
+    for path in directory.iterdir():
+        match = SCHEMA_MIGRATION_PATTERN.match(path.name)
+        if match:
+            migrations.append(
+                (int(match.group(1)), path.name, split_sql_statements(path.read_text()))
+            )
+    return sorted(migrations)
+
+
+def schema_migrations() -> List[Tuple[int, str, List[str]]]:
+    global SCHEMA_MIGRATIONS
+    if SCHEMA_MIGRATIONS is None:
+        SCHEMA_MIGRATIONS = load_schema_migrations(ROOT_DIR / "migrations")
+    return SCHEMA_MIGRATIONS
+
+
+async def schema_state(env: Any) -> Tuple[int, Set[str]]:
+    # The worker's schema version and the migration files wrangler applied.
+    for sql in SCHEMA_STATE_QUERIES:
+        try:
+            result = await d1_run(env, sql)
+        except Exception:
+            continue
+        rows = result.get("results") or [{}]
+        names = set(filter(None, (rows[0].get("names") or "").split(",")))
+        return int(rows[0].get("version") or 0), names
+    # A fresh database has neither table yet.
+    return 0, set()
+
+
+async def migrate_schema(env: Any) -> None:
+    # One read when the database is current; otherwise every pending
+    # migration and its tracking rows go out in a single batch.
+    global SCHEMA_READY
+    migrations = schema_migrations()
+    current, applied = await schema_state(env)
+    pending = [
+        migration
+        for migration in migrations
+        if migration[0] > current and migration[1] not in applied
+    ]
+    if pending:
+        applied_at = datetime.now(timezone.utc).isoformat()
+        statements: List[Tuple[str, Optional[List[Any]]]] = [
+            (SCHEMA_MIGRATIONS_TABLE_SQL, None),
+            (D1_MIGRATIONS_TABLE_SQL, None),
+        ]
+        for version, name, migration_statements in pending:
+            statements.extend((sql, None) for sql in migration_statements)
+            statements.append(
+                (
+                    "INSERT OR IGNORE INTO schema_migrations "
+                    "(version, name, applied_at) VALUES (?, ?, ?)",
+                    [version, name, applied_at],
+                )
+            )
+            statements.append(
+                ("INSERT OR IGNORE INTO d1_migrations (name) VALUES (?)", [name])
+            )
+        await d1_batch(env, statements)
+    SCHEMA_READY = True
+
+
+async def ensure_schema(env: Any) -> None:
+    global SCHEMA_MIGRATION_TASK
+    if SCHEMA_READY:
+        return
+    if not has_database(env):
+        return
+    if SCHEMA_MIGRATION_TASK is None:
+        SCHEMA_MIGRATION_TASK = asyncio.ensure_future(migrate_schema(env))
+    task = SCHEMA_MIGRATION_TASK
+    try:
+        await asyncio.shield(task)
+    except Exception:
+        if SCHEMA_MIGRATION_TASK is task:
+            SCHEMA_MIGRATION_TASK = None
+        raise
+
+
+async def d1_batch(
+    env: Any, statements: List[Tuple[str, Optional[List[Any]]]]
+) -> List[Dict[str, Any]]:
+    prepared = []
+    for sql, params in statements:
+        statement = env.DB.prepare(sql)
+        if params:
+            statement = statement.bind(*_d1_params(params))
+        prepared.append(statement)
+    span = start_span("d1", describe_sql_batch, [sql for sql, _ in statements])
+    try:
+        results = await env.DB.batch(_to_js_array(prepared))
+    except Exception as error:
+        end_span(span, error=error)
+        raise
+    end_span(span)
+    return to_python(results)
+
+
+def _slack_id(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get("id")
+    return str(value) if value else None
+
+
+def compile_field_projection(paths: Iterable[str]) -> Dict[str, Any]:
+    # Turns dotted paths into a nested spec where None means "keep as is".
+    spec: Dict[str, Any] = {}
+    for path in paths:
+        node = spec
+        parts = path.split(".")
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return spec
+
+
+def project_fields(value: Any, spec: Optional[Dict[str, Any]]) -> Any:
+    if spec is None:
+        return value
+    if isinstance(value, list):
+        return [project_fields(item, spec) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return dict(
+        (key, project_fields(value[key], child))
+        for key, child in spec.items()
+        if key in value
+    )
+
+
+ACTIVITY_PAYLOAD_PROJECTIONS = dict(
+    (activity_kind, compile_field_projection(paths))
+    for activity_kind, paths in ACTIVITY_PAYLOAD_FIELDS.items()
+)
+GITHUB_SEARCH_AUTHOR_PROJECTION = compile_field_projection(GITHUB_SEARCH_AUTHOR_FIELDS)
+GITHUB_COMMENT_AUTHOR_PROJECTION = compile_field_projection(
+    GITHUB_COMMENT_AUTHOR_FIELDS
+)
+GITHUB_SEARCH_CONTRIBUTION_PROJECTION = compile_field_projection(
+    GITHUB_SEARCH_CONTRIBUTION_FIELDS
+)
+GITHUB_COMMENT_CONTRIBUTION_PROJECTION = compile_field_projection(
+    GITHUB_COMMENT_CONTRIBUTION_FIELDS
+)
+
+
+def truncate_long_strings(value: Any, limit: int) -> Any:
+    if isinstance(value, str):
+        if len(value) <= limit:
+            return value
+        return "{0}...[truncated {1} chars]".format(value[:limit], len(value) - limit)
+    if isinstance(value, list):
+        return [truncate_long_strings(item, limit) for item in value]
+    if isinstance(value, dict):
+        return dict(
+            (key, truncate_long_strings(item, limit)) for key, item in value.items()
+        )
+    return value
+
+
+def activity_storage_policy(env: Any) -> Dict[str, Any]:
+    return {
+        "project": env_value(env, "ACTIVITY_PAYLOAD_PROJECTION", "on") != "off",
+        "max_bytes": int(
+            env_float(env, "ACTIVITY_PAYLOAD_MAX_BYTES", ACTIVITY_PAYLOAD_MAX_BYTES)
+        ),
+        "string_limit": int(
+            env_float(
+                env, "ACTIVITY_PAYLOAD_STRING_LIMIT", ACTIVITY_PAYLOAD_STRING_LIMIT
+            )
+        ),
+        "compression": env_value(env, "ACTIVITY_PAYLOAD_COMPRESSION", "none"),
+    }
+
+
+def encode_activity_payload(
+    activity_kind: str, payload: Dict[str, Any], policy: Dict[str, Any]
+) -> Any:
+    # Returns JSON text, or zlib-compressed JSON bytes that D1 stores as a
+    # BLOB in the same payload_json column.
+    if policy["project"]:
+        payload = project_fields(
+            payload, ACTIVITY_PAYLOAD_PROJECTIONS.get(activity_kind)
+        )
+    payload = truncate_long_strings(payload, policy["string_limit"])
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    if len(encoded) > policy["max_bytes"]:
+        encoded = json.dumps(
+            {
+                "_truncated": True,
+                "_original_bytes": len(encoded),
+                "_head": encoded[: policy["max_bytes"]].decode("utf-8", "ignore"),
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+    if (
+        policy["compression"] == "zlib"
+        and len(encoded) >= ACTIVITY_PAYLOAD_COMPRESS_MIN_BYTES
+    ):
+        import zlib
+
+        return zlib.compress(encoded, 6)
+    return encoded.decode("utf-8")
+
+
+def decode_activity_payload(value: Any) -> Dict[str, Any]:
+    # Reads every payload_json format: legacy and projected JSON text, and
+    # zlib BLOBs (which D1 may hand back as a list of byte values).
+    if value is None:
+        return {}
+    if isinstance(value, (list, tuple)):
+        value = bytes(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        import zlib
+
+        value = zlib.decompress(bytes(value)).decode("utf-8")
+    return json.loads(value)
+
+
+def activity_row(
+    activity_kind: str,
+    payload: Dict[str, Any],
+    policy: Optional[Dict[str, Any]] = None,
+) -> List[Any]:
+    event = payload.get("event") or {}
+    return [
+        activity_kind,
+        payload.get("type") or event.get("type"),
+        payload.get("command"),
+        _slack_id(payload.get("team_id")),
+        _slack_id(payload.get("user_id") or event.get("user")),
+        _slack_id(payload.get("channel_id") or payload.get("channel")),
+        encode_activity_payload(
+            activity_kind, payload, policy or activity_storage_policy(None)
+        ),
+        datetime.now(timezone.utc).isoformat(),
+    ]
+
+
+def queue_activity(env: Any, activity_kind: str, payload: Dict[str, Any]) -> None:
+    global ACTIVITY_BUFFER_OLDEST
+    if not ACTIVITY_BUFFER:
+        ACTIVITY_BUFFER_OLDEST = time.time()
+    ACTIVITY_BUFFER.append(
+        activity_row(activity_kind, payload, activity_storage_policy(env))
+    )
+    if len(ACTIVITY_BUFFER) > ACTIVITY_BUFFER_LIMIT:
+        dropped = len(ACTIVITY_BUFFER) - ACTIVITY_BUFFER_LIMIT
+        del ACTIVITY_BUFFER[:dropped]
+        print(
+            json.dumps(
+                {"level": "warn", "context": "activity_rows_dropped", "rows": dropped},
+                separators=(",", ":"),
+            )
+        )
+
+
+def activity_flush_due(env: Any, now: Optional[float] = None) -> bool:
+    if not ACTIVITY_BUFFER:
+        return False
+    now = time.time() if now is None else now
+    if now < ACTIVITY_RETRY_AT:
+        return False
+    max_rows = env_float(env, "ACTIVITY_FLUSH_MAX_ROWS", ACTIVITY_FLUSH_MAX_ROWS)
+    max_age = env_float(
+        env, "ACTIVITY_FLUSH_MAX_AGE_SECONDS", ACTIVITY_FLUSH_MAX_AGE_SECONDS
+    )
+    if len(ACTIVITY_BUFFER) >= max_rows:
+        return True
+    return (
+        ACTIVITY_BUFFER_OLDEST is not None and now - ACTIVITY_BUFFER_OLDEST >= max_age
+    )
+
+
+def activity_rollup_updates(
+    rows: List[List[Any]],
+) -> List[Tuple[str, Optional[List[Any]]]]:
+    # Pre-aggregates a batch of slack_activity rows so the rollups cost one
+    # upsert per (day, team, kind, command) and per team, in the same batch.
+    daily: Dict[Tuple[str, str, str, str], int] = {}
+    teams: Dict[str, List[Any]] = {}
+    for activity_kind, _, command_name, team_id, _, _, _, received_at in rows:
+        key = (received_at[:10], team_id or "", activity_kind, command_name or "")
+        daily[key] = daily.get(key, 0) + 1
+        if not team_id:
+            continue
+        if team_id not in teams:
+            teams[team_id] = [0, received_at, received_at]
+        team = teams[team_id]
+        team[0] += 1
+        team[1] = min(team[1], received_at)
+        team[2] = max(team[2], received_at)
+
+    updates: List[Tuple[str, Optional[List[Any]]]] = [
+        (ACTIVITY_DAILY_UPSERT_SQL, list(key) + [events])
+        for key, events in daily.items()
+    ]
+    updates.extend(
+        (ACTIVITY_TEAM_UPSERT_SQL, [team_id] + values)
+        for team_id, values in teams.items()
+    )
+    return updates
+
+
+async def _write_activity_rows(env: Any) -> None:
+    global ACTIVITY_BUFFER_OLDEST, ACTIVITY_FLUSH_FAILURES, ACTIVITY_RETRY_AT
+    rows = list(ACTIVITY_BUFFER)
+    oldest = ACTIVITY_BUFFER_OLDEST
+    ACTIVITY_BUFFER.clear()
+    ACTIVITY_BUFFER_OLDEST = None
+    try:
+        await ensure_schema(env)
+        await d1_batch(
+            env,
+            [(ACTIVITY_INSERT_SQL, row) for row in rows]
+            + activity_rollup_updates(rows),
+        )
+    except Exception as error:
+        # Put the rows back in front of anything queued meanwhile and retry on
+        # a later request once the backoff has passed.
+        ACTIVITY_BUFFER[:0] = rows
+        ACTIVITY_BUFFER_OLDEST = oldest
+        ACTIVITY_FLUSH_FAILURES += 1
+        ACTIVITY_RETRY_AT = time.time() + min(
+            ACTIVITY_RETRY_BACKOFF_SECONDS * 2 ** (ACTIVITY_FLUSH_FAILURES - 1),
+            ACTIVITY_RETRY_BACKOFF_MAX_SECONDS,
+        )
+        log_exception_one_line(error, "activity_flush_failed", {"rows": len(rows)})
+        return
+    ACTIVITY_FLUSH_FAILURES = 0
+    ACTIVITY_RETRY_AT = 0.0
+
+
+async def flush_activity(env: Any) -> None:
+    global ACTIVITY_FLUSH_TASK
+    if not has_database(env):
+        return
+    while ACTIVITY_FLUSH_TASK is not None and not ACTIVITY_FLUSH_TASK.done():
+        await asyncio.shield(ACTIVITY_FLUSH_TASK)
+    if not ACTIVITY_BUFFER:
+        return
+    ACTIVITY_FLUSH_TASK = asyncio.ensure_future(_write_activity_rows(env))
+    await asyncio.shield(ACTIVITY_FLUSH_TASK)
+
+
+async def flush_activity_when_due(env: Any) -> None:
+    max_age = env_float(
+        env, "ACTIVITY_FLUSH_MAX_AGE_SECONDS", ACTIVITY_FLUSH_MAX_AGE_SECONDS
+    )
+    deadline = time.time() + ACTIVITY_FLUSH_MAX_WAIT_SECONDS
+    while ACTIVITY_BUFFER and not activity_flush_due(env):
+        now = time.time()
+        if now >= deadline:
+            if now < ACTIVITY_RETRY_AT:
+                return
+            break
+        due = max((ACTIVITY_BUFFER_OLDEST or now) + max_age, ACTIVITY_RETRY_AT)
+        await asyncio.sleep(max(0.0, min(due, deadline) - now))
+    await flush_activity(env)
+
+
+def schedule_activity_flush(env: Any, ctx: Any) -> None:
+    # Rows below the size limit wait for more to coalesce with, but never
+    # without a flush pending inside some invocation's waitUntil.
+    global ACTIVITY_FLUSH_SCHEDULED
+    scheduled = ACTIVITY_FLUSH_SCHEDULED
+    if (
+        scheduled is None
+        or scheduled.done()
+        or scheduled.get_loop() is not asyncio.get_event_loop()
+    ):
+        scheduled = run_in_background(
+            None, flush_activity_when_due(env), "activity_flush_failed"
+        )
+        ACTIVITY_FLUSH_SCHEDULED = scheduled
+    wait_until = getattr(ctx, "waitUntil", None) if ctx is not None else None
+    if wait_until is not None:
+        wait_until(scheduled)
+
+
+def log_activity(
+    env: Any, ctx: Any, activity_kind: str, payload: Dict[str, Any]
+) -> None:
+    # Fire-and-forget: the row is buffered and written later in waitUntil, so
+    # D1 latency never sits in front of the Slack response.
+    if not has_database(env):
+        return
+    queue_activity(env, activity_kind, payload)
+    if activity_flush_due(env):
+        run_in_background(ctx, flush_activity(env), "activity_flush_failed")
+    else:
+        schedule_activity_flush(env, ctx)
+
+
+async def record_activity(
+    env: Any, activity_kind: str, payload: Dict[str, Any]
+) -> None:
+    if not has_database(env):
+        return
+    queue_activity(env, activity_kind, payload)
+    await flush_activity(env)
+
+
+async def save_workspace_installer(
+    env: Any, team_id: str, installer_user_id: str
+) -> None:
+    if not team_id or not installer_user_id:
+        return
+    if not has_database(env):
+        return
+
+    await ensure_schema(env)
+    installed_at = datetime.now(timezone.utc).isoformat()
+    await d1_run(
+        env,
+        (
+            "INSERT INTO workspace_installations (team_id, installer_user_id, installed_at) "
+            "VALUES (?, ?, ?) "
+            "ON CONFLICT(team_id) DO UPDATE SET "
+            "installer_user_id = excluded.installer_user_id, "
+            "installed_at = excluded.installed_at"
+        ),
+        [team_id, installer_user_id, installed_at],
+    )
+    store_workspace_installer(team_id, installer_user_id)
+
+
+def store_workspace_installer(team_id: str, installer_user_id: Optional[str]) -> None:
+    WORKSPACE_CACHE.pop(team_id, None)
+    while len(WORKSPACE_CACHE) >= WORKSPACE_CACHE_SIZE:
+        WORKSPACE_CACHE.pop(next(iter(WORKSPACE_CACHE)))
+    WORKSPACE_CACHE[team_id] = {
+        "installer": installer_user_id,
+        "stored_at": time.time(),
+    }
+
+
+def cached_workspace_installer(env: Any, team_id: str) -> Optional[Dict[str, Any]]:
+    entry = WORKSPACE_CACHE.get(team_id)
+    if entry is None:
+        return None
+    if entry["installer"] is None:
+        ttl = env_float(
+            env,
+            "WORKSPACE_NEGATIVE_CACHE_TTL_SECONDS",
+            WORKSPACE_NEGATIVE_CACHE_TTL_SECONDS,
+        )
+    else:
+        ttl = env_float(env, "WORKSPACE_CACHE_TTL_SECONDS", WORKSPACE_CACHE_TTL_SECONDS)
+    if time.time() - entry["stored_at"] > ttl:
+        WORKSPACE_CACHE.pop(team_id, None)
+        return None
+    return entry
+
+
+async def get_workspace_installer(env: Any, team_id: str) -> Optional[str]:
+    if not team_id:
+        return env_value(env, "SLACK_INSTALLER_USER_ID")
+    if not has_database(env):
+        return env_value(env, "SLACK_INSTALLER_USER_ID")
+
+    entry = cached_workspace_installer(env, team_id)
+    if entry is None:
+        await ensure_schema(env)
+        result = await d1_run(
+            env,
+            "SELECT installer_user_id FROM workspace_installations WHERE team_id = ? LIMIT 1",
+            [team_id],
+        )
+        rows = result.get("results") or []
+        installer_user_id = None
+        if rows and rows[0].get("installer_user_id"):
+            installer_user_id = str(rows[0]["installer_user_id"])
+        store_workspace_installer(team_id, installer_user_id)
+        entry = WORKSPACE_CACHE[team_id]
+    return entry["installer"] or env_value(env, "SLACK_INSTALLER_USER_ID")
+
+
+def may_be_installer_message(env: Any, team_id: str, event: Dict[str, Any]) -> bool:
+    # Cheap checks that keep ordinary channel traffic away from D1: bots and
+    # anonymous messages can never be the installer, and a cached team row
+    # answers the question outright.
+    user_id = event.get("user")
+    if not user_id or not isinstance(user_id, str) or not event.get("channel"):
+        return False
+    if event.get("bot_id") or event.get("bot_profile"):
+        return False
+    entry = cached_workspace_installer(env, team_id) if team_id else None
+    if entry is None:
+        return True
+    return user_id == (entry["installer"] or env_value(env, "SLACK_INSTALLER_USER_ID"))
+
+
+def slack_delivery_key(activity_kind: str, payload: Dict[str, Any]) -> Optional[str]:
+    if activity_kind == "event":
+        event_id = payload.get("event_id")
+        return "event:{0}".format(event_id) if event_id else None
+    for field in ("trigger_id", "response_url"):
+        if payload.get(field):
+            return "interaction:{0}".format(payload[field])
+    return None
+
+
+def remember_slack_delivery(key: str, now: float) -> bool:
+    # False when this isolate already handled key within the window.
+    seen_at = SLACK_DELIVERIES.get(key)
+    if seen_at is not None and now - seen_at < SLACK_DELIVERY_WINDOW_SECONDS:
+        return False
+    SLACK_DELIVERIES.pop(key, None)
+    SLACK_DELIVERIES[key] = now
+    while len(SLACK_DELIVERIES) > SLACK_DELIVERY_CACHE_SIZE:
+        SLACK_DELIVERIES.popitem(last=False)
+    return True
+
+
+async def claim_slack_delivery(env: Any, key: str, now: float) -> bool:
+    # One write decides across isolates: the upsert changes a row only for a
+    # new key or one whose previous delivery fell out of the window.
+    global SLACK_DELIVERIES_PRUNED_AT
+    if not has_database(env):
+        return True
+    await ensure_schema(env)
+    cutoff = now - SLACK_DELIVERY_WINDOW_SECONDS
+    statements: List[Tuple[str, Optional[List[Any]]]] = []
+    if now - SLACK_DELIVERIES_PRUNED_AT >= SLACK_DELIVERY_PRUNE_INTERVAL_SECONDS:
+        SLACK_DELIVERIES_PRUNED_AT = now
+        statements.append(
+            ("DELETE FROM slack_deliveries WHERE received_at < ?", [cutoff])
+        )
+    statements.append(
+        (
+            "INSERT INTO slack_deliveries (delivery_key, received_at) VALUES (?, ?) "
+            "ON CONFLICT(delivery_key) DO UPDATE SET received_at = excluded.received_at "
+            "WHERE slack_deliveries.received_at < ?",
+            [key, now, cutoff],
+        )
+    )
+    results = await d1_batch(env, statements)
+    meta = results[-1].get("meta") or {}
+    return bool(meta.get("changes"))
+
+
+async def is_duplicate_slack_delivery(
+    env: Any, ctx: Any, key: Optional[str], retry: bool
+) -> bool:
+    # First deliveries are claimed in the background so they pay no D1
+    # latency; only Slack retries wait for the shared D1 answer.
+    if not key:
+        return False
+    now = time.time()
+    if not remember_slack_delivery(key, now):
+        return True
+    if not retry:
+        claim = run_in_background(
+            ctx, claim_slack_delivery(env, key, now), "slack_delivery_claim_failed"
+        )
+        SLACK_DELIVERY_CLAIMS[key] = claim
+        claim.add_done_callback(
+            lambda done: SLACK_DELIVERY_CLAIMS.pop(key, None)
+            if SLACK_DELIVERY_CLAIMS.get(key) is done
+            else None
+        )
+        return False
+    try:
+        return not await claim_slack_delivery(env, key, now)
+    except Exception as error:
+        log_exception_one_line(error, "slack_delivery_claim_failed", {"key": key})
+        return False
+
+
+async def forget_slack_delivery(
+    env: Any, key: str, claim: Optional["asyncio.Future[Any]"]
+) -> None:
+    # The delete must land after the background claim, or the claim would
+    # re-create the row.
+    if claim is not None:
+        await claim
+    if not has_database(env):
+        return
+    await ensure_schema(env)
+    await d1_run(env, "DELETE FROM slack_deliveries WHERE delivery_key = ?", [key])
+
+
+def release_slack_delivery(env: Any, ctx: Any, key: Optional[str]) -> None:
+    # Handling failed, so Slack's retry must be processed, not acknowledged.
+    if not key:
+        return
+    SLACK_DELIVERIES.pop(key, None)
+    run_in_background(
+        ctx,
+        forget_slack_delivery(env, key, SLACK_DELIVERY_CLAIMS.get(key)),
+        "slack_delivery_release_failed",
+    )
+
+
+async def installed_apps_summary(env: Any) -> str:
+    if not has_database(env):
+        return "D1 is not configured yet. Bind a database to enable installation analytics."
+
+    await ensure_schema(env)
+    # Like the slack_activity count this replaced, events without a team_id
+    # are left out; slack_activity_daily keeps them under team_id ''.
+    result = await d1_run(
+        env,
+        (
+            "SELECT COUNT(*) AS teams, COALESCE(SUM(events), 0) AS events "
+            "FROM slack_team_activity"
+        ),
+    )
+    rows = result.get("results") or []
+    if not rows:
+        return "No Slack activity has been recorded yet."
+    teams = rows[0].get("teams", 0)
+    events = rows[0].get("events", 0)
+    return "Tracked workspaces: {0}\nLogged webhook events: {1}".format(teams, events)
+
+
+async def fetch_contributor_activity(
+    env: Any, days: int = CONTRIBUTOR_WINDOW_DAYS
+) -> Dict[str, Any]:
+    # GraphQL needs a token, so without one the REST backend is used anyway.
+    backend = env_value(env, "GITHUB_ACTIVITY_BACKEND", "rest")
+    if backend == "graphql" and env_value(env, "GITHUB_TOKEN"):
+        return await fetch_contributor_activity_graphql(env, days)
+    return await fetch_contributor_activity_rest(env, days)
+
+
+def github_rest_headers(env: Any) -> Dict[str, str]:
+    headers = {"Accept": "application/vnd.github+json"}
+    token = env_value(env, "GITHUB_TOKEN")
+    if token:
+        headers["Authorization"] = "Bearer {0}".format(token)
+    return headers
+
+
+def github_contribution_urls(owner: str, repo: str, since_date: str) -> Dict[str, str]:
+    # First-page REST URLs of each metric's contributions since a day.
+    since_stamp = "{0}T00:00:00Z".format(since_date)
+    page_size = str(GITHUB_PAGE_SIZE)
+    prs_query = "repo:{0}/{1} is:pr is:merged merged:>={2}".format(
+        owner, repo, since_date
+    )
+    issues_query = "repo:{0}/{1} is:issue is:closed closed:>={2}".format(
+        owner, repo, since_date
+    )
+    return {
+        "prs": "https://api.github.com/search/issues?{0}".format(
+            urlencode({"q": prs_query, "per_page": page_size})
+        ),
+        "issues": "https://api.github.com/search/issues?{0}".format(
+            urlencode({"q": issues_query, "per_page": page_size})
+        ),
+        "comments": "https://api.github.com/repos/{0}/{1}/issues/comments?{2}".format(
+            owner, repo, urlencode({"since": since_stamp, "per_page": page_size})
+        ),
+        "reviews": "https://api.github.com/repos/{0}/{1}/pulls/comments?{2}".format(
+            owner, repo, urlencode({"since": since_stamp, "per_page": page_size})
+        ),
+    }
+
+
+async def fetch_contributor_activity_rest(
+    env: Any, days: int = CONTRIBUTOR_WINDOW_DAYS
+) -> Dict[str, Any]:
+    owner = required_env_value(env, "GITHUB_ACTIVITY_OWNER")
+    repo = required_env_value(env, "GITHUB_ACTIVITY_REPO")
+    since_date = (datetime.now(timezone.utc) - timedelta(days=days)).date().isoformat()
+    headers = github_rest_headers(env)
+    urls = github_contribution_urls(owner, repo, since_date)
+
+    # Counters are shared by the streams, so a stream that times out still
+    # contributes the pages it already read.
+    counts: Dict[str, Dict[str, int]] = {}
+
+    def counter(metric: str) -> Callable[[Any], None]:
+        def fold(payload: Any) -> None:
+            items = payload.get("items") if isinstance(payload, dict) else payload
+            if isinstance(items, list):
+                count_contributions(counts, metric, items)
+
+        return fold
+
+    results = await gather_concurrently(
+        {
+            "pull requests": fold_github_pages(
+                env,
+                urls["prs"],
+                headers,
+                GITHUB_SEARCH_AUTHOR_PROJECTION,
+                counter("prs"),
+            ),
+            "issues": fold_github_pages(
+                env,
+                urls["issues"],
+                headers,
+                GITHUB_SEARCH_AUTHOR_PROJECTION,
+                counter("issues"),
+            ),
+            "comments": fold_github_pages(
+                env,
+                urls["comments"],
+                headers,
+                GITHUB_COMMENT_AUTHOR_PROJECTION,
+                counter("comments"),
+            ),
+            "review comments": fold_github_pages(
+                env,
+                urls["reviews"],
+                headers,
+                GITHUB_COMMENT_AUTHOR_PROJECTION,
+                counter("reviews"),
+            ),
+        },
+        timeout=env_float(
+            env, "GITHUB_FETCH_TIMEOUT_SECONDS", GITHUB_FETCH_TIMEOUT_SECONDS
+        ),
+    )
+
+    errors = []
+    truncated = []
+    for name, result in results.items():
+        if isinstance(result, asyncio.TimeoutError):
+            errors.append("{0} timed out".format(name))
+            continue
+        if isinstance(result, BaseException):
+            log_exception_one_line(
+                result, "github_fetch_failed", {"owner": owner, "repo": repo}
+            )
+            errors.append("{0} request failed".format(name))
+            continue
+        ok, payload, status, more = result
+        if is_github_rate_limited(status, payload):
+            errors.append("{0} rate limited".format(name))
+            continue
+        if not ok:
+            errors.append("{0} returned HTTP {1}".format(name, status))
+            continue
+        if more:
+            truncated.append(name)
+
+    report: Dict[str, Any] = {"rows": contributor_rows(counts), "errors": errors}
+    if truncated:
+        report[
+            "notice"
+        ] = "Only the first {0} {1} were counted, try a shorter window.".format(
+            GITHUB_MAX_PAGES * GITHUB_PAGE_SIZE, " and ".join(truncated)
+        )
+    return report
+
+
+def graphql_author_login(author: Optional[Dict[str, Any]]) -> Optional[str]:
+    # Spell logins the way REST does: deleted accounts are "ghost" and bot
+    # logins carry the "[bot]" suffix.
+    if not author:
+        return "ghost"
+    login = author.get("login")
+    if login and author.get("__typename") == "Bot":
+        return "{0}[bot]".format(login)
+    return login
+
+
+async def fetch_contributor_activity_graphql(
+    env: Any, days: int = CONTRIBUTOR_WINDOW_DAYS
+) -> Dict[str, Any]:
+    token = required_env_value(env, "GITHUB_TOKEN")
+    owner = required_env_value(env, "GITHUB_ACTIVITY_OWNER")
+    repo = required_env_value(env, "GITHUB_ACTIVITY_REPO")
+    since_date = (datetime.now(timezone.utc) - timedelta(days=days)).date().isoformat()
+    since_stamp = "{0}T00:00:00Z".format(since_date)
+    searches = {
+        "prs": "repo:{0}/{1} is:pr is:merged merged:>={2}".format(
+            owner, repo, since_date
+        ),
+        "issues": "repo:{0}/{1} is:issue is:closed closed:>={2}".format(
+            owner, repo, since_date
+        ),
+        "commented": "repo:{0}/{1} updated:>={2}".format(owner, repo, since_date),
+    }
+    headers = {
+        "Accept": "application/vnd.github+json",
+        "Authorization": "Bearer {0}".format(token),
+        "Content-Type": "application/json",
+    }
+    timeout = env_float(
+        env, "GITHUB_FETCH_TIMEOUT_SECONDS", GITHUB_FETCH_TIMEOUT_SECONDS
+    )
+    deadline = asyncio.get_event_loop().time() + timeout
+
+    cursors: Dict[str, Optional[str]] = dict((name, None) for name in searches)
+    pending = list(searches)
+    counts: Dict[str, Dict[str, int]] = {}
+    errors = []
+    for _ in range(GITHUB_GRAPHQL_MAX_PAGES):
+        if not pending:
+            break
+        variables: Dict[str, Any] = dict(searches)
+        for name in searches:
+            variables["{0}Cursor".format(name)] = cursors[name]
+            variables["with{0}".format(name.capitalize())] = name in pending
+        remaining = deadline - asyncio.get_event_loop().time()
+        try:
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            ok, payload, status, _ = await asyncio.wait_for(
+                fetch_github_response(
+                    GITHUB_GRAPHQL_URL,
+                    method="POST",
+                    headers=headers,
+                    body=json.dumps(
+                        {"query": CONTRIBUTOR_ACTIVITY_QUERY, "variables": variables}
+                    ),
+                ),
+                remaining,
+            )
+        except asyncio.TimeoutError:
+            errors.append("graphql timed out")
+            break
+        except Exception as error:
+            log_exception_one_line(
+                error, "github_graphql_failed", {"owner": owner, "repo": repo}
+            )
+            errors.append("graphql request failed")
+            break
+        graphql_errors = payload.get("errors") or []
+        if is_github_rate_limited(status, payload) or any(
+            error.get("type") == "RATE_LIMITED" for error in graphql_errors
+        ):
+            errors.append("graphql rate limited")
+            break
+        if not ok:
+            errors.append("graphql returned HTTP {0}".format(status))
+            break
+        if graphql_errors:
+            errors.append(
+                "graphql returned errors: {0}".format(
+                    graphql_errors[0].get("message") or "unknown error"
+                )
+            )
+        data = payload.get("data") or {}
+        if not data:
+            break
+
+        for name in list(pending):
+            connection = data.get(name) or {}
+            for node in connection.get("nodes") or []:
+                if name != "commented":
+                    if node and "author" in node:
+                        login = graphql_author_login(node["author"])
+                        count_contributions(counts, name, [{"user": {"login": login}}])
+                    continue
+                threads = [("comments", (node or {}).get("comments"))]
+                for review in ((node or {}).get("reviews") or {}).get("nodes") or []:
+                    threads.append(("reviews", (review or {}).get("comments")))
+                for metric, thread in threads:
+                    for comment in (thread or {}).get("nodes") or []:
+                        if (comment.get("updatedAt") or "") >= since_stamp:
+                            login = graphql_author_login(comment.get("author"))
+                            count_contributions(
+                                counts, metric, [{"user": {"login": login}}]
+                            )
+            page_info = connection.get("pageInfo") or {}
+            if page_info.get("hasNextPage") and page_info.get("endCursor"):
+                cursors[name] = page_info["endCursor"]
+            else:
+                pending.remove(name)
+
+    return {"rows": contributor_rows(counts), "errors": errors}
+
+
+def parse_contributor_window(text: str) -> Optional[int]:
+    # "", "30", "30d" and "30 days" are accepted; anything else is None.
+    text = text.strip().lower()
+    if not text:
+        return CONTRIBUTOR_WINDOW_DAYS
+    match = re.fullmatch(r"(\d{1,4})\s*(?:d|days?)?", text)
+    if not match:
+        return None
+    days = int(match.group(1))
+    if not 1 <= days <= CONTRIBUTOR_MAX_WINDOW_DAYS:
+        return None
+    return days
+
+
+def contributor_cache_key(owner: str, repo: str, days: int) -> str:
+    return "{0}/{1}:{2}d".format(owner.lower(), repo.lower(), days)
+
 
+async def load_counted_contributor_report(
+    env: Any, owner: str, repo: str, days: int
+) -> Optional[Dict[str, Any]]:
+    # Webhook counters answer a window once they cover all of it; earlier
+    # windows, or deployments without the webhook, fall back to GitHub.
+    if not has_database(env) or not env_value(env, "GITHUB_WEBHOOK_SECRET"):
+        return None
+    full_name = "{0}/{1}".format(owner, repo).lower()
+    since_date = (datetime.now(timezone.utc) - timedelta(days=days)).date().isoformat()
+    try:
+        await ensure_schema(env)
+        coverage, totals = await d1_batch(
+            env,
+            [
+                (
+                    "SELECT since_day FROM github_counter_coverage WHERE repo = ?",
+                    [full_name],
+                ),
+                (
+                    "SELECT login, SUM(prs) AS prs, SUM(issues) AS issues, "
+                    "SUM(comments) AS comments, SUM(reviews) AS reviews "
+                    "FROM github_contributor_daily WHERE repo = ? AND day >= ? "
+                    "GROUP BY login",
+                    [full_name, since_date],
+                ),
+            ],
+        )
+    except Exception as error:
+        log_exception_one_line(error, "contributor_counters_read_failed")
+        return None
+    covered = coverage.get("results") or []
+    if not covered or covered[0]["since_day"] > since_date:
+        return None
+    counts = dict(
+        (
+            row["login"],
+            dict((name, int(row[name] or 0)) for name in CONTRIBUTOR_METRICS),
+        )
+        for row in totals.get("results") or []
+    )
+    return {"rows": contributor_rows(counts), "errors": []}
 
-async def d1_run(
-    env: Any, sql: str, params: Optional[List[Any]] = None
-) -> Dict[str, Any]:
-    statement = env.DB.prepare(sql)
-    if params:
-        statement = statement.bind(*params)
-    result = await statement.run()
-    return to_python(result)
+
+async def load_cached_contributor_report(
+    env: Any, cache_key: str
+) -> Optional[Dict[str, Any]]:
+    if not has_database(env):
+        return None
+    try:
+        await ensure_schema(env)
+        result = await d1_run(
+            env,
+            "SELECT report_json, stored_at FROM contributor_cache WHERE cache_key = ?",
+            [cache_key],
+        )
+    except Exception as error:
+        log_exception_one_line(error, "contributor_cache_read_failed")
+        return None
+    rows = result.get("results") or []
+    if not rows:
+        return None
+    return {
+        "report": json.loads(rows[0]["report_json"]),
+        "stored_at": float(rows[0]["stored_at"]),
+    }
 
 
-async def ensure_schema(env: Any) -> None:
-    global SCHEMA_READY
-    if SCHEMA_READY:
+async def store_cached_contributor_report(
+    env: Any, cache_key: str, entry: Dict[str, Any]
+) -> None:
+    if not has_database(env):
         return
     try:
-        getattr(env, "DB")
-    except Exception:
-        return
-    for sql in SCHEMA_STATEMENTS:
-        await d1_run(env, sql)
-    SCHEMA_READY = True
+        await ensure_schema(env)
+        await d1_run(
+            env,
+            (
+                "INSERT INTO contributor_cache (cache_key, report_json, stored_at, "
+                "refresh_lease_until) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT(cache_key) DO UPDATE SET "
+                "report_json = excluded.report_json, "
+                "stored_at = excluded.stored_at, "
+                "refresh_lease_until = 0"
+            ),
+            [cache_key, json.dumps(entry["report"]), entry["stored_at"]],
+        )
+    except Exception as error:
+        log_exception_one_line(error, "contributor_cache_write_failed")
 
 
-async def record_activity(
-    env: Any, activity_kind: str, payload: Dict[str, Any]
-) -> None:
+async def claim_contributor_refresh(env: Any, cache_key: str, now: float) -> bool:
+    # Lets a single isolate revalidate a stale D1 row while the others keep
+    # serving it.
+    if not has_database(env):
+        return True
     try:
-        getattr(env, "DB")
-    except Exception:
-        return
+        result = await d1_run(
+            env,
+            (
+                "UPDATE contributor_cache SET refresh_lease_until = ? "
+                "WHERE cache_key = ? AND refresh_lease_until < ?"
+            ),
+            [now + CONTRIBUTOR_REFRESH_LEASE_SECONDS, cache_key, now],
+        )
+    except Exception as error:
+        log_exception_one_line(error, "contributor_cache_lease_failed")
+        return True
+    return bool((result.get("meta") or {}).get("changes"))
 
-    await ensure_schema(env)
-    received_at = datetime.now(timezone.utc).isoformat()
-    slack_type = payload.get("type") or payload.get("event", {}).get("type")
-    command_name = payload.get("command")
-    team_id = payload.get("team_id")
-    user_id = payload.get("user_id") or payload.get("event", {}).get("user")
-    channel_id = payload.get("channel_id") or payload.get("channel", {}).get("id")
-    payload_json = json.dumps(payload, sort_keys=True)
 
-    await d1_run(
-        env,
-        (
-            "INSERT INTO slack_activity ("
-            "activity_kind, slack_type, command_name, team_id, user_id, channel_id, payload_json, received_at"
-            ") VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
-        ),
-        [
-            activity_kind,
-            slack_type,
-            command_name,
-            team_id,
-            user_id,
-            channel_id,
-            payload_json,
-            received_at,
-        ],
-    )
+async def refresh_contributor_report(
+    env: Any, cache_key: str, days: int
+) -> Dict[str, Any]:
+    pending = CONTRIBUTOR_REFRESHES.get(cache_key)
+    if pending is None:
+
+        async def _refresh() -> Dict[str, Any]:
+            report = await fetch_contributor_activity(env, days)
+            if not report["errors"]:
+                entry = {"report": report, "stored_at": time.time()}
+                CONTRIBUTOR_CACHE[cache_key] = entry
+                await store_cached_contributor_report(env, cache_key, entry)
+            elif any(error.endswith("rate limited") for error in report["errors"]):
+                # Older complete counts beat fresh partial ones that would
+                # read as zeros.
+                cached = CONTRIBUTOR_CACHE.get(cache_key)
+                if cached is not None:
+                    minutes = max(1, int((time.time() - cached["stored_at"]) // 60))
+                    return dict(
+                        cached["report"],
+                        notice="GitHub rate limit reached, showing cached data "
+                        "from {0} min ago.".format(minutes),
+                    )
+            return report
 
+        pending = asyncio.ensure_future(_refresh())
+        CONTRIBUTOR_REFRESHES[cache_key] = pending
+        pending.add_done_callback(lambda _: CONTRIBUTOR_REFRESHES.pop(cache_key, None))
+    return await asyncio.shield(pending)
 
-async def save_workspace_installer(
-    env: Any, team_id: str, installer_user_id: str
-) -> None:
-    if not team_id or not installer_user_id:
-        return
-    try:
-        getattr(env, "DB")
-    except Exception:
-        return
 
-    await ensure_schema(env)
-    installed_at = datetime.now(timezone.utc).isoformat()
-    await d1_run(
-        env,
-        (
-            "INSERT INTO workspace_installations (team_id, installer_user_id, installed_at) "
-            "VALUES (?, ?, ?) "
-            "ON CONFLICT(team_id) DO UPDATE SET "
-            "installer_user_id = excluded.installer_user_id, "
-            "installed_at = excluded.installed_at"
-        ),
-        [team_id, installer_user_id, installed_at],
+async def get_contributor_report(
+    env: Any, ctx: Any = None, days: int = CONTRIBUTOR_WINDOW_DAYS
+) -> Dict[str, Any]:
+    owner = required_env_value(env, "GITHUB_ACTIVITY_OWNER")
+    repo = required_env_value(env, "GITHUB_ACTIVITY_REPO")
+    ttl = env_float(env, "CONTRIBUTOR_CACHE_TTL_SECONDS", CONTRIBUTOR_CACHE_TTL_SECONDS)
+    stale = env_float(
+        env, "CONTRIBUTOR_CACHE_STALE_SECONDS", CONTRIBUTOR_CACHE_STALE_SECONDS
     )
+    counted = await load_counted_contributor_report(env, owner, repo, days)
+    if counted is not None:
+        return counted
+    cache_key = contributor_cache_key(owner, repo, days)
+    now = time.time()
+
+    entry = CONTRIBUTOR_CACHE.get(cache_key)
+    if entry is None or now - entry["stored_at"] > ttl:
+        stored = await load_cached_contributor_report(env, cache_key)
+        if stored and (entry is None or stored["stored_at"] > entry["stored_at"]):
+            entry = stored
+            CONTRIBUTOR_CACHE[cache_key] = entry
+
+    if entry is not None:
+        age = now - entry["stored_at"]
+        if age <= ttl:
+            return entry["report"]
+        if age <= ttl + stale:
+            if cache_key not in CONTRIBUTOR_REFRESHES and (
+                await claim_contributor_refresh(env, cache_key, now)
+            ):
+                run_in_background(
+                    ctx,
+                    refresh_contributor_report(env, cache_key, days),
+                    "contributor_cache_refresh_failed",
+                )
+            return entry["report"]
 
+    return await refresh_contributor_report(env, cache_key, days)
 
-async def get_workspace_installer(env: Any, team_id: str) -> Optional[str]:
-    if not team_id:
-        return env_value(env, "SLACK_INSTALLER_USER_ID")
-    try:
-        getattr(env, "DB")
-    except Exception:
-        return env_value(env, "SLACK_INSTALLER_USER_ID")
-
-    await ensure_schema(env)
-    result = await d1_run(
-        env,
-        "SELECT installer_user_id FROM workspace_installations WHERE team_id = ? LIMIT 1",
-        [team_id],
-    )
-    rows = result.get("results") or []
-    if rows and rows[0].get("installer_user_id"):
-        return str(rows[0]["installer_user_id"])
-    return env_value(env, "SLACK_INSTALLER_USER_ID")
 
+def github_webhook_contribution(
+    event: str, payload: Dict[str, Any]
+) -> Optional[Tuple[str, str, str, str]]:
+    # Returns (metric, item, day, login) for a delivery that adds to the
+    # counters.
+    spec = GITHUB_WEBHOOK_CONTRIBUTIONS.get(event)
+    if spec is None:
+        return None
+    action, key, id_field, stamp_field, metric = spec
+    item = payload.get(key) or {}
+    login = (item.get("user") or {}).get("login")
+    item_id = item.get(id_field)
+    stamp = item.get(stamp_field)
+    if payload.get("action") != action or not login or not stamp or item_id is None:
+        return None
+    return metric, str(item_id), str(stamp)[:10], login
 
-async def installed_apps_summary(env: Any) -> str:
-    try:
-        getattr(env, "DB")
-    except Exception:
-        return "D1 is not configured yet. Bind a database to enable installation analytics."
 
+async def record_github_delivery(
+    env: Any, event: str, payload: Dict[str, Any], now: float
+) -> bool:
+    # One batch: note counter coverage for the repository, claim the
+    # contribution, then bump the counters only if the claim inserted a row,
+    # so a redelivery, or a second closure of the same issue, changes
+    # nothing. Returns whether anything was counted.
+    repo = str((payload.get("repository") or {}).get("full_name") or "").lower()
+    if not repo or not has_database(env):
+        return False
     await ensure_schema(env)
-    result = await d1_run(
-        env,
+    # The day the hook is installed (usually with a ping) is incomplete, so
+    # counters cover windows from the next day on.
+    since_day = (
+        (datetime.fromtimestamp(now, timezone.utc) + timedelta(days=1))
+        .date()
+        .isoformat()
+    )
+    statements: List[Tuple[str, Optional[List[Any]]]] = [
         (
-            "SELECT COUNT(DISTINCT team_id) AS teams, COUNT(*) AS events "
-            "FROM slack_activity WHERE team_id IS NOT NULL"
-        ),
+            "INSERT INTO github_counter_coverage (repo, since_day) VALUES (?, ?) "
+            "ON CONFLICT(repo) DO NOTHING",
+            [repo, since_day],
+        )
+    ]
+    contribution = github_webhook_contribution(event, payload)
+    if contribution is None:
+        await d1_batch(env, statements)
+        return False
+    metric, item, day, login = contribution
+    statements.append((GITHUB_CONTRIBUTION_INSERT_SQL, [repo] + list(contribution)))
+    statements.append(
+        (
+            GITHUB_CONTRIBUTOR_DAILY_UPSERT_SQL,
+            [repo, day, login] + [int(name == metric) for name in CONTRIBUTOR_METRICS],
+        )
     )
-    rows = result.get("results") or []
-    if not rows:
-        return "No Slack activity has been recorded yet."
-    teams = rows[0].get("teams", 0)
-    events = rows[0].get("events", 0)
-    return "Tracked workspaces: {0}\nLogged webhook events: {1}".format(teams, events)
+    results = await d1_batch(env, statements)
+    meta = results[-1].get("meta") or {}
+    return bool(meta.get("changes"))
+
+
+async def handle_github_webhook(request: Any, env: Any) -> Any:
+    timing = start_request_timing(env, "/github/webhook")
+    body_text = str(await request.text())
+    mark_phase(timing, "body_read")
+    verified = verify_github_signature(
+        env_value(env, "GITHUB_WEBHOOK_SECRET", "") or "",
+        body_text,
+        request.headers.get("x-hub-signature-256", ""),
+    )
+    mark_phase(timing, "verify")
+    if not verified:
+        return timed_response(timing, "Invalid GitHub signature.", status=401)
+
+    event = request.headers.get("x-github-event", "")
+    add_timing_scope(timing, "github_event:" + event)
+    if "application/x-www-form-urlencoded" in request.headers.get("content-type", ""):
+        body_text = parse_form_encoded(body_text).get("payload", "")
+    try:
+        payload = json.loads(body_text or "{}")
+    except json.JSONDecodeError:
+        return timed_response(timing, "Invalid JSON payload.", status=400)
+    mark_phase(timing, "parse")
+    counted = await record_github_delivery(env, event, payload, time.time())
+    mark_phase(timing, "handler")
+    return timed_json_response(timing, {"ok": True, "counted": counted})
+
+
+def github_item_contribution(
+    metric: str, item: Any
+) -> Optional[Tuple[str, str, str, str]]:
+    # The REST counterpart of github_webhook_contribution. Search results
+    # carry the number and comments the ID; a merged PR's merged_at is its
+    # closed_at, which older search results only have.
+    if not isinstance(item, dict):
+        return None
+    login = (item.get("user") or {}).get("login")
+    item_id = item.get("number", item.get("id"))
+    stamp = (
+        (item.get("pull_request") or {}).get("merged_at")
+        or item.get("closed_at")
+        or item.get("created_at")
+    )
+    if not login or not stamp or item_id is None:
+        return None
+    return metric, str(item_id), str(stamp)[:10], login
 
 
-async def fetch_contributor_activity(env: Any) -> List[Dict[str, Any]]:
-    token = env_value(env, "GITHUB_TOKEN")
+async def reconcile_contributor_counters(env: Any, days: Optional[int] = None) -> bool:
+    # Rewrites the counters of the last `days` full days from GitHub, which
+    # adds contributions whose deliveries were lost and drops deleted ones,
+    # then extends coverage back to the first of those days. Today is left
+    # to the webhook, since search results trail it. Nothing is written
+    # unless every stream was read in full.
+    if not has_database(env) or not env_value(env, "GITHUB_WEBHOOK_SECRET"):
+        return False
+    if days is None:
+        days = int(env_float(env, "GITHUB_RECONCILE_DAYS", GITHUB_RECONCILE_DAYS))
+    days = max(1, min(days, CONTRIBUTOR_MAX_WINDOW_DAYS))
     owner = required_env_value(env, "GITHUB_ACTIVITY_OWNER")
     repo = required_env_value(env, "GITHUB_ACTIVITY_REPO")
-    since_date = (datetime.now(timezone.utc) - timedelta(days=7)).date().isoformat()
-    since_stamp = "{0}T00:00:00Z".format(since_date)
-
-    headers = {"Accept": "application/vnd.github+json"}
-    if token:
-        headers["Authorization"] = "Bearer {0}".format(token)
-
-    prs_query = "repo:{0}/{1} is:pr is:merged merged:>={2}".format(
-        owner, repo, since_date
-    )
-    issues_query = "repo:{0}/{1} is:issue is:closed closed:>={2}".format(
-        owner, repo, since_date
+    full_name = "{0}/{1}".format(owner, repo).lower()
+    today = datetime.now(timezone.utc).date()
+    since_date = (today - timedelta(days=days)).isoformat()
+    until_date = today.isoformat()
+    headers = github_rest_headers(env)
+    urls = github_contribution_urls(owner, repo, since_date)
+    contributions: List[Tuple[str, str, str, str]] = []
+
+    def collector(metric: str) -> Callable[[Any], None]:
+        def fold(payload: Any) -> None:
+            items = payload.get("items") if isinstance(payload, dict) else payload
+            for item in items if isinstance(items, list) else []:
+                contribution = github_item_contribution(metric, item)
+                if contribution and since_date <= contribution[2] < until_date:
+                    contributions.append(contribution)
+
+        return fold
+
+    results = await gather_concurrently(
+        dict(
+            (
+                metric,
+                fold_github_pages(
+                    env,
+                    url,
+                    headers,
+                    GITHUB_SEARCH_CONTRIBUTION_PROJECTION
+                    if "/search/" in url
+                    else GITHUB_COMMENT_CONTRIBUTION_PROJECTION,
+                    collector(metric),
+                ),
+            )
+            for metric, url in urls.items()
+        ),
+        timeout=env_float(
+            env, "GITHUB_RECONCILE_TIMEOUT_SECONDS", GITHUB_RECONCILE_TIMEOUT_SECONDS
+        ),
     )
+    incomplete = []
+    for metric, result in results.items():
+        if isinstance(result, BaseException):
+            if not isinstance(result, asyncio.TimeoutError):
+                log_exception_one_line(
+                    result, "github_reconcile_failed", {"repo": full_name}
+                )
+            incomplete.append(metric)
+        elif not result[0] or result[3]:
+            incomplete.append(metric)
+    if incomplete:
+        print(
+            json.dumps(
+                {
+                    "level": "warn",
+                    "context": "github_reconcile_skipped",
+                    "repo": full_name,
+                    "incomplete": sorted(incomplete),
+                },
+                separators=(",", ":"),
+            )
+        )
+        return False
 
-    prs_url = "https://api.github.com/search/issues?{0}".format(
-        urlencode({"q": prs_query, "per_page": "100"})
-    )
-    issues_url = "https://api.github.com/search/issues?{0}".format(
-        urlencode({"q": issues_query, "per_page": "100"})
+    window = [full_name, since_date, until_date]
+    statements: List[Tuple[str, Optional[List[Any]]]] = [
+        (
+            "DELETE FROM github_contributions "
+            "WHERE repo = ? AND day >= ? AND day < ?",
+            window,
+        )
+    ]
+    for start in range(0, len(contributions), GITHUB_RECONCILE_ROWS_PER_INSERT):
+        rows = contributions[start : start + GITHUB_RECONCILE_ROWS_PER_INSERT]
+        statements.append(
+            (
+                "INSERT INTO github_contributions (repo, metric, item, day, login) "
+                "VALUES {0} ON CONFLICT(repo, metric, item) DO UPDATE "
+                "SET day = excluded.day, login = excluded.login".format(
+                    ", ".join(["(?, ?, ?, ?, ?)"] * len(rows))
+                ),
+                [value for row in rows for value in [full_name] + list(row)],
+            )
+        )
+    metric_sums = ", ".join(
+        "SUM(metric = '{0}')".format(name) for name in CONTRIBUTOR_METRICS
     )
-    comments_url = "https://api.github.com/repos/{0}/{1}/issues/comments?{2}".format(
-        owner,
-        repo,
-        urlencode({"since": since_stamp, "per_page": "100"}),
+    await ensure_schema(env)
+    for start in range(0, len(statements), GITHUB_RECONCILE_STATEMENTS_PER_BATCH):
+        await d1_batch(
+            env, statements[start : start + GITHUB_RECONCILE_STATEMENTS_PER_BATCH]
+        )
+    # The counters are rebuilt in a batch of their own, after every
+    # contribution has landed.
+    await d1_batch(
+        env,
+        [
+            (
+                "DELETE FROM github_contributor_daily "
+                "WHERE repo = ? AND day >= ? AND day < ?",
+                window,
+            ),
+            (
+                "INSERT INTO github_contributor_daily "
+                "(repo, day, login, prs, issues, comments, reviews) "
+                "SELECT repo, day, login, {0} FROM github_contributions "
+                "WHERE repo = ? AND day >= ? AND day < ? "
+                "GROUP BY day, login".format(metric_sums),
+                window,
+            ),
+            (
+                "INSERT INTO github_counter_coverage (repo, since_day) VALUES (?, ?) "
+                "ON CONFLICT(repo) DO UPDATE "
+                "SET since_day = MIN(since_day, excluded.since_day)",
+                [full_name, since_date],
+            ),
+        ],
     )
-
-    _, prs_payload, _ = await fetch_json(prs_url, headers=headers)
-    _, issues_payload, _ = await fetch_json(issues_url, headers=headers)
-    _, comments_payload, _ = await fetch_json(comments_url, headers=headers)
-
-    prs = prs_payload.get("items") or []
-    issues = issues_payload.get("items") or []
-    comments = comments_payload if isinstance(comments_payload, list) else []
-    return summarize_contributors(prs, issues, comments)
+    return True
 
 
 async def create_github_issue(title: str, env: Any) -> Tuple[bool, str]:
@@ -657,7 +3209,7 @@ async def create_github_issue(title: str, env: Any) -> Tuple[bool, str]:
         "Authorization": "Bearer {0}".format(token),
         "Content-Type": "application/json",
     }
-    ok, payload, _ = await fetch_json(
+    ok, payload, _, _ = await fetch_github_response(
         url,
         method="POST",
         headers=headers,
@@ -672,7 +3224,7 @@ async def create_github_issue(title: str, env: Any) -> Tuple[bool, str]:
 def help_response() -> Dict[str, Any]:
     text = (
         "Available commands:\n"
-        "• /contributors or /stats\n"
+        "• /contributors or /stats [days]\n"
         "• /project [name]\n"
         "• /repo [technology]\n"
         "• /ghissue [title]\n"
@@ -794,11 +3346,10 @@ def project_response(text: str) -> Dict[str, Any]:
             "blocks": [make_section_block("Project not found.")],
         }
 
-    blocks = build_project_selection_blocks(sorted(PROJECT_DATA.keys()))
     return {
         "response_type": "ephemeral",
         "text": "Choose a project to inspect.",
-        "blocks": blocks,
+        "blocks": build_project_typeahead_blocks(),
     }
 
 
@@ -830,24 +3381,101 @@ def repo_response(text: str) -> Dict[str, Any]:
     return {
         "response_type": "ephemeral",
         "text": "Choose a technology to inspect.",
-        "blocks": build_repo_selection_blocks(REPO_DATA),
+        "blocks": build_repo_selection_blocks(repo_catalog()),
+    }
+
+
+def gsoc_response() -> Dict[str, Any]:
+    return {
+        "response_type": "ephemeral",
+        "text": "Use /discover with a technology or mentor keyword to explore matches.",
+        "blocks": [
+            make_section_block(
+                "Use `/discover <keyword>` to search the bundled project and repository data for GSoC-relevant terms."
+            )
+        ],
     }
 
 
-async def command_response(form: Dict[str, str], env: Any) -> Dict[str, Any]:
+def normalize_lookup_text(text: str) -> str:
+    return text.strip().lower()
+
+
+def ignore_command_text(text: str) -> str:
+    return ""
+
+
+# Commands whose response depends only on the bundled catalogs and the
+# normalized command text, mapped to (normalizer, handler).
+PURE_COMMAND_HANDLERS: Dict[
+    str, Tuple[Callable[[str], str], Callable[[str], Dict[str, Any]]]
+] = {
+    "/project": (normalize_lookup_text, project_response),
+    "/repo": (normalize_lookup_text, repo_response),
+    "/discover": (str.strip, discover_response),
+    "/contrib": (ignore_command_text, lambda _: contrib_response()),
+    "/gsoc25": (ignore_command_text, lambda _: gsoc_response()),
+    "/blt": (ignore_command_text, lambda _: help_response()),
+}
+
+
+def pure_command_body(command_name: str, text: str) -> Optional[str]:
+    global RESPONSE_CACHE_FINGERPRINT
+    handler = PURE_COMMAND_HANDLERS.get(command_name)
+    if handler is None:
+        return None
+    normalize, build = handler
+
+    fingerprint = catalog_fingerprint()
+    if fingerprint != RESPONSE_CACHE_FINGERPRINT:
+        RESPONSE_CACHE.clear()
+        RESPONSE_CACHE_FINGERPRINT = fingerprint
+
+    key = (command_name, normalize(text))
+    body = RESPONSE_CACHE.get(key)
+    if body is not None:
+        RESPONSE_CACHE.move_to_end(key)
+        return body
+
+    body = json.dumps(build(key[1]))
+    RESPONSE_CACHE[key] = body
+    while len(RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+        RESPONSE_CACHE.popitem(last=False)
+    return body
+
+
+async def command_response(
+    form: Dict[str, str],
+    env: Any,
+    ctx: Any = None,
+    timing: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     command_name = form.get("command", "")
     command_text = form.get("text", "")
+    add_timing_scope(timing, "command:" + command_name)
 
     if command_name in ("/contributors", "/stats"):
+        days = parse_contributor_window(command_text)
+        if days is None:
+            usage = "Usage: {0} [days], where days is 1 to {1}.".format(
+                command_name, CONTRIBUTOR_MAX_WINDOW_DAYS
+            )
+            return {
+                "response_type": "ephemeral",
+                "text": usage,
+                "blocks": [make_section_block(usage)],
+            }
         try:
-            rows = await fetch_contributor_activity(env)
+            report = await get_contributor_report(env, ctx, days)
         except ValueError as error:
             return {
                 "response_type": "ephemeral",
                 "text": str(error),
                 "blocks": [make_section_block(str(error))],
             }
-        return format_contributor_blocks(rows)
+        return format_contributor_blocks(
+            report["rows"], report["errors"], report.get("notice"), days
+        )
     if command_name == "/ghissue":
         title = command_text.strip()
         if not title:
@@ -872,24 +3500,9 @@ async def command_response(form: Dict[str, str], env: Any) -> Dict[str, Any]:
             "text": message,
             "blocks": [make_section_block(message)],
         }
-    if command_name == "/project":
-        return project_response(command_text)
-    if command_name == "/repo":
-        return repo_response(command_text)
-    if command_name == "/discover":
-        return discover_response(command_text)
-    if command_name == "/contrib":
-        return contrib_response()
-    if command_name == "/gsoc25":
-        return {
-            "response_type": "ephemeral",
-            "text": "Use /discover with a technology or mentor keyword to explore matches.",
-            "blocks": [
-                make_section_block(
-                    "Use `/discover <keyword>` to search the bundled project and repository data for GSoC-relevant terms."
-                )
-            ],
-        }
+    if command_name in PURE_COMMAND_HANDLERS:
+        normalize, build = PURE_COMMAND_HANDLERS[command_name]
+        return build(normalize(command_text))
     if command_name == "/installed_apps":
         summary = await installed_apps_summary(env)
         return {
@@ -899,8 +3512,6 @@ async def command_response(form: Dict[str, str], env: Any) -> Dict[str, Any]:
         }
     if command_name == "/blt-app-url":
         return blt_app_url_response(env)
-    if command_name == "/blt":
-        return help_response()
 
     return {
         "response_type": "ephemeral",
@@ -909,6 +3520,67 @@ async def command_response(form: Dict[str, str], env: Any) -> Dict[str, Any]:
     }
 
 
+def command_mode(command_name: str) -> str:
+    return COMMAND_MODES.get(command_name, FAST_COMMAND)
+
+
+def should_defer_command(form: Dict[str, str], ctx: Any) -> bool:
+    if command_mode(form.get("command", "")) != DEFERRED_COMMAND:
+        return False
+    if not form.get("response_url"):
+        return False
+    return ctx is not None and getattr(ctx, "waitUntil", None) is not None
+
+
+def deferred_ack_response(form: Dict[str, str]) -> Dict[str, Any]:
+    message = "Working on `{0}`, the result will be posted here shortly.".format(
+        form.get("command", "")
+    )
+    return {
+        "response_type": "ephemeral",
+        "text": message,
+        "blocks": [make_section_block(":hourglass_flowing_sand: " + message)],
+    }
+
+
+async def complete_deferred_command(
+    form: Dict[str, str], env: Any, ctx: Any = None
+) -> None:
+    timing = start_request_timing(env, "deferred_command")
+    try:
+        response = await command_response(form, env, ctx, timing)
+    except Exception as error:
+        log_exception_one_line(
+            error, "deferred_command_failed", {"command": form.get("command", "")}
+        )
+        message = "Sorry, `{0}` failed. Please try again.".format(
+            form.get("command", "")
+        )
+        response = {
+            "response_type": "ephemeral",
+            "text": message,
+            "blocks": [make_section_block(message)],
+        }
+    mark_phase(timing, "handler")
+    body = json.dumps(response)
+    mark_phase(timing, "serialize")
+
+    ok, _, status = await fetch_json(
+        form["response_url"],
+        method="POST",
+        headers={"Content-Type": "application/json"},
+        body=body,
+    )
+    mark_phase(timing, "deliver")
+    finish_request_timing(timing)
+    if not ok:
+        log_exception_one_line(
+            RuntimeError("response_url returned HTTP {0}".format(status)),
+            "deferred_command_delivery_failed",
+            {"command": form.get("command", "")},
+        )
+
+
 def interaction_response(payload: Dict[str, Any]) -> Dict[str, Any]:
     actions = payload.get("actions") or []
     if not actions:
@@ -937,6 +3609,20 @@ def interaction_response(payload: Dict[str, Any]) -> Dict[str, Any]:
     return {"text": "Interaction received.", "replace_original": False}
 
 
+def block_suggestion_response(payload: Dict[str, Any]) -> Dict[str, Any]:
+    if not str(payload.get("action_id", "")).startswith("project_select_action_"):
+        return {"options": []}
+    return {
+        "options": [
+            {
+                "text": {"type": "plain_text", "text": project_name[:75]},
+                "value": project_name,
+            }
+            for project_name in suggest_projects(str(payload.get("value") or ""))
+        ]
+    }
+
+
 async def slack_api_post_message(channel_id: str, text: str, env: Any) -> None:
     token = env_value(env, "SLACK_BOT_TOKEN")
     if not token:
@@ -952,9 +3638,11 @@ async def slack_api_post_message(channel_id: str, text: str, env: Any) -> None:
     )
 
 
-async def handle_event_payload(payload: Dict[str, Any], env: Any) -> Any:
+async def handle_event_payload(
+    payload: Dict[str, Any], env: Any, timing: Optional[Dict[str, Any]] = None
+) -> Any:
     if payload.get("type") == "url_verification":
-        return json_response({"challenge": payload.get("challenge", "")})
+        return timed_json_response(timing, {"challenge": payload.get("challenge", "")})
 
     event = payload.get("event") or {}
     if event.get("type") == "app_mention":
@@ -973,8 +3661,12 @@ async def handle_event_payload(payload: Dict[str, Any], env: Any) -> Any:
             await slack_api_post_message(user_id, welcome_message, env)
     if event.get("type") == "message":
         if event.get("subtype"):
-            return json_response({"ok": True})
+            mark_phase(timing, "handler")
+            return timed_json_response(timing, {"ok": True})
         team_id = payload.get("team_id", "")
+        if not may_be_installer_message(env, team_id, event):
+            mark_phase(timing, "handler")
+            return timed_json_response(timing, {"ok": True})
         user_id = event.get("user", "")
         channel_id = event.get("channel", "")
         installer_user_id = await get_workspace_installer(env, team_id)
@@ -984,7 +3676,8 @@ async def handle_event_payload(payload: Dict[str, Any], env: Any) -> Any:
                 current_config_message(env, team_id, installer_user_id),
                 env,
             )
-    return json_response({"ok": True})
+    mark_phase(timing, "handler")
+    return timed_json_response(timing, {"ok": True})
 
 
 async def handle_oauth_callback(request_url: Any, env: Any) -> Any:
@@ -1065,7 +3758,27 @@ async def handle_oauth_callback(request_url: Any, env: Any) -> Any:
     )
 
 
-async def handle_request(request: Any, env: Any) -> Any:
+async def handle_request(request: Any, env: Any, ctx: Any = None) -> Any:
+    method = str(request.method).upper()
+    span = start_trace(
+        env,
+        request.headers.get("traceparent"),
+        describe_http_request,
+        method,
+        str(request.url),
+    )
+    if span is None:
+        return await route_request(request, env, ctx)
+    try:
+        response = await route_request(request, env, ctx)
+    except Exception as error:
+        end_span(span, error=error)
+        raise
+    end_span(span, status=getattr(response, "status", None))
+    return response
+
+
+async def route_request(request: Any, env: Any, ctx: Any = None) -> Any:
     parsed_url = urlparse(request.url)
     path = parsed_url.path or "/"
     method = str(request.method).upper()
@@ -1095,8 +3808,17 @@ async def handle_request(request: Any, env: Any) -> Any:
             headers={"location": install_url},
         )
 
-    if method == "POST" and path in ("/slack/commands", "/slack/events"):
+    if method == "POST" and path == "/github/webhook":
+        return await handle_github_webhook(request, env)
+
+    if method == "POST" and path in (
+        "/slack/commands",
+        "/slack/events",
+        "/slack/options",
+    ):
+        timing = start_request_timing(env, path)
         body_text = str(await request.text())
+        mark_phase(timing, "body_read")
 
         # Slack URL verification can be sent before signing secret wiring is complete.
         if path == "/slack/events":
@@ -1105,30 +3827,92 @@ async def handle_request(request: Any, env: Any) -> Any:
             except json.JSONDecodeError:
                 verification_payload = {}
             if verification_payload.get("type") == "url_verification":
-                return json_response(
-                    {"challenge": verification_payload.get("challenge", "")}
+                mark_phase(timing, "parse")
+                return timed_json_response(
+                    timing, {"challenge": verification_payload.get("challenge", "")}
                 )
 
         signing_secret = env_value(env, "SLACK_SIGNING_SECRET", "") or ""
         timestamp = request.headers.get("x-slack-request-timestamp", "")
         signature = request.headers.get("x-slack-signature", "")
-        if not verify_slack_signature(signing_secret, timestamp, body_text, signature):
-            return build_response("Invalid Slack signature.", status=401)
+        verified = verify_slack_signature(
+            signing_secret, timestamp, body_text, signature
+        )
+        mark_phase(timing, "verify")
+        if not verified:
+            return timed_response(timing, "Invalid Slack signature.", status=401)
 
         content_type = request.headers.get("content-type", "")
         if "application/x-www-form-urlencoded" in content_type:
             form = parse_form_encoded(body_text)
-            if path == "/slack/events" and form.get("payload"):
+            if path in ("/slack/events", "/slack/options") and form.get("payload"):
                 payload = json.loads(form["payload"])
-                await record_activity(env, "interaction", payload)
-                return json_response(interaction_response(payload))
-
-            await record_activity(env, "slash_command", form)
-            return json_response(await command_response(form, env))
+                mark_phase(timing, "parse")
+                # Typeahead lookups fire on every keystroke, so they answer
+                # straight from memory and are not logged as activity.
+                if payload.get("type") == "block_suggestion":
+                    result = block_suggestion_response(payload)
+                    mark_phase(timing, "handler")
+                    return timed_json_response(timing, result)
+                delivery_key = slack_delivery_key("interaction", payload)
+                duplicate = await is_duplicate_slack_delivery(
+                    env,
+                    ctx,
+                    delivery_key,
+                    bool(request.headers.get("x-slack-retry-num")),
+                )
+                mark_phase(timing, "dedupe")
+                if duplicate:
+                    return timed_json_response(timing, {"ok": True})
+                log_activity(env, ctx, "interaction", payload)
+                mark_phase(timing, "activity_log")
+                try:
+                    result = interaction_response(payload)
+                except Exception:
+                    release_slack_delivery(env, ctx, delivery_key)
+                    raise
+                mark_phase(timing, "handler")
+                return timed_json_response(timing, result)
+
+            mark_phase(timing, "parse")
+            add_timing_scope(timing, "command:" + form.get("command", ""))
+            log_activity(env, ctx, "slash_command", form)
+            mark_phase(timing, "activity_log")
+            body = pure_command_body(form.get("command", ""), form.get("text", ""))
+            if body is not None:
+                mark_phase(timing, "handler")
+                return timed_response(timing, body, content_type=JSON_CONTENT_TYPE)
+            if should_defer_command(form, ctx):
+                run_in_background(
+                    ctx,
+                    complete_deferred_command(form, env, ctx),
+                    "deferred_command_failed",
+                )
+                mark_phase(timing, "handler")
+                return timed_json_response(timing, deferred_ack_response(form))
+            result = await command_response(form, env, ctx, timing)
+            mark_phase(timing, "handler")
+            return timed_json_response(timing, result)
 
         payload = json.loads(body_text or "{}")
-        await record_activity(env, "event", payload)
-        return await handle_event_payload(payload, env)
+        mark_phase(timing, "parse")
+        delivery_key = slack_delivery_key("event", payload)
+        duplicate = await is_duplicate_slack_delivery(
+            env,
+            ctx,
+            delivery_key,
+            bool(request.headers.get("x-slack-retry-num")),
+        )
+        mark_phase(timing, "dedupe")
+        if duplicate:
+            return timed_json_response(timing, {"ok": True})
+        log_activity(env, ctx, "event", payload)
+        mark_phase(timing, "activity_log")
+        try:
+            return await handle_event_payload(payload, env, timing)
+        except Exception:
+            release_slack_delivery(env, ctx, delivery_key)
+            raise
 
     try:
         return await env.ASSETS.fetch(request)
@@ -1139,10 +3923,27 @@ async def handle_request(request: Any, env: Any) -> Any:
         return build_response("Not Found", status=404)
 
 
+async def handle_scheduled(env: Any) -> None:
+    # The daily cron trigger. A failed job is logged and the rest still run.
+    jobs: List[Tuple[str, Callable[[], Awaitable[Any]]]] = [
+        (
+            "scheduled_cache_prune_failed",
+            lambda: prune_github_http_cache(env, time.time()),
+        ),
+        ("scheduled_reconcile_failed", lambda: reconcile_contributor_counters(env)),
+        ("scheduled_activity_flush_failed", lambda: flush_activity(env)),
+    ]
+    for context, job in jobs:
+        try:
+            await job()
+        except Exception as error:
+            log_exception_one_line(error, context)
+
+
 class Default(WorkerEntrypoint):
     async def fetch(self, request: Any) -> Any:
         try:
-            return await handle_request(request, self.env)
+            return await handle_request(request, self.env, self.ctx)
         except Exception as error:
             log_exception_one_line(
                 error,
@@ -1153,3 +3954,6 @@ class Default(WorkerEntrypoint):
                 },
             )
             return build_response("Internal Server Error", status=500)
+
+    async def scheduled(self, controller: Any) -> None:
+        await handle_scheduled(self.env)
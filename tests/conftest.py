@@ -0,0 +1,16 @@
+import pytest
+
+from src import worker
+from tests.fakes import FakeWorkerResponse
+
+
+@pytest.fixture(autouse=True)
+def reset_worker_state():
+    worker.reset_isolate_state()
+    yield
+    worker.reset_isolate_state()
+
+
+@pytest.fixture(autouse=True)
+def worker_response(monkeypatch):
+    monkeypatch.setattr(worker, "Response", FakeWorkerResponse)
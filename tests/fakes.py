@@ -0,0 +1,240 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import sqlite3
+import time
+from urllib.parse import urlencode
+
+SIGNING_SECRET = "test-signing-secret"
+# URL fragments of the REST calls behind the contributor report, by metric.
+GITHUB_ACTIVITY_ROUTES = (
+    ("prs", "is%3Apr"),
+    ("issues", "is%3Aissue"),
+    ("comments", "/issues/comments"),
+    ("reviews", "/pulls/comments"),
+)
+
+
+class FakeFetchResponse:
+    def __init__(self, status=200, body=None, headers=None):
+        self.status = status
+        self.ok = 200 <= status < 300
+        if body is None:
+            self._text = ""
+        elif isinstance(body, str):
+            self._text = body
+        else:
+            self._text = json.dumps(body)
+        self.headers = FakeHeaders(headers or {})
+
+    async def text(self):
+        return self._text
+
+
+class FakeHeaders:
+    def __init__(self, values):
+        self._values = dict((key.lower(), value) for key, value in values.items())
+
+    def get(self, name, default=None):
+        return self._values.get(name.lower(), default)
+
+    def items(self):
+        return self._values.items()
+
+
+class FakeFetch:
+    """Scripted stand-in for the runtime ``fetch``.
+
+    Routes are matched by substring against the requested URL, in the order
+    they were added. Each route can delay its reply to simulate upstream
+    latency. A callable body is called with ``(url, options)`` and returns
+    the ``FakeFetchResponse`` itself.
+    """
+
+    def __init__(self):
+        self.routes = []
+        self.calls = []
+
+    def add(self, url_part, body=None, status=200, headers=None, delay=0.0):
+        self.routes.append((url_part, body, status, headers, delay))
+        return self
+
+    async def __call__(self, url, options=None):
+        self.calls.append((url, options or {}))
+        for url_part, body, status, headers, delay in self.routes:
+            if url_part in url:
+                if delay:
+                    await asyncio.sleep(delay)
+                if isinstance(body, Exception):
+                    raise body
+                if callable(body):
+                    return body(url, options or {})
+                return FakeFetchResponse(status, body, headers)
+        return FakeFetchResponse(404, {"message": "Not Found"})
+
+
+class FakeEnv:
+    def __init__(self, **values):
+        for name, value in values.items():
+            setattr(self, name, value)
+
+
+class FakeD1Statement:
+    def __init__(self, database, sql, params=()):
+        self.database = database
+        self.sql = sql
+        self.params = params
+
+    def bind(self, *params):
+        return FakeD1Statement(self.database, self.sql, params)
+
+    def execute(self):
+        self.database.executed.append(self.sql)
+        cursor = self.database.connection.execute(self.sql, self.params)
+        rows = [dict(row) for row in cursor.fetchall()] if cursor.description else []
+        return {
+            "success": True,
+            "results": rows,
+            "meta": {"changes": cursor.rowcount, "last_row_id": cursor.lastrowid},
+        }
+
+    async def run(self):
+        if self.database.delay:
+            await asyncio.sleep(self.database.delay)
+        result = self.execute()
+        self.database.connection.commit()
+        return result
+
+
+class FakeD1:
+    """sqlite-backed stand-in for a D1 binding (``env.DB``)."""
+
+    def __init__(self, path=":memory:", delay=0.0):
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.delay = delay
+        self.executed = []
+        self.batches = []
+        self.failing_batches = 0
+
+    def prepare(self, sql):
+        return FakeD1Statement(self, sql)
+
+    async def batch(self, statements):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.failing_batches:
+            self.failing_batches -= 1
+            raise RuntimeError("D1_ERROR: simulated batch failure")
+        self.batches.append([statement.sql for statement in statements])
+        try:
+            results = [statement.execute() for statement in statements]
+        except Exception:
+            self.connection.rollback()
+            raise
+        self.connection.commit()
+        return results
+
+    def query(self, sql, params=()):
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+
+class FakeContext:
+    def __init__(self):
+        self.tasks = []
+
+    def waitUntil(self, task):
+        self.tasks.append(task)
+
+    async def drain(self):
+        while self.tasks:
+            await self.tasks.pop(0)
+
+
+class FakeWorkerResponse:
+    """Stand-in for ``workers.Response`` outside the Workers runtime."""
+
+    def __init__(self, body, status=200, headers=None):
+        self.body = body
+        self.status = status
+        self.headers = dict(headers or {})
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class FakeRequest:
+    def __init__(self, url, method="GET", body="", headers=None):
+        self.url = url
+        self.method = method
+        self._body = body
+        self.headers = FakeHeaders(headers or {})
+
+    async def text(self):
+        return self._body
+
+
+def github_env(**values):
+    """``FakeEnv`` whose contributor report reads OWASP-BLT/BLT-Lettuce."""
+    settings = {
+        "GITHUB_ACTIVITY_OWNER": "OWASP-BLT",
+        "GITHUB_ACTIVITY_REPO": "BLT-Lettuce",
+    }
+    settings.update(values)
+    return FakeEnv(**settings)
+
+
+def github_fetch(delay=0.0, delays=None, statuses=None, headers=None, **bodies):
+    """``FakeFetch`` answering the contributor report's REST calls.
+
+    Bodies are passed per metric (``prs``, ``issues``, ``comments``,
+    ``reviews``) and default to an empty result. ``delays``, ``statuses``
+    and ``headers`` map a metric to its route's latency, status and
+    response headers. More routes can be chained on with ``add``.
+    """
+    fake_fetch = FakeFetch()
+    for metric, url_part in GITHUB_ACTIVITY_ROUTES:
+        if metric in bodies:
+            body = bodies[metric]
+        else:
+            body = {"items": []} if metric in ("prs", "issues") else []
+        fake_fetch.add(
+            url_part,
+            body,
+            status=(statuses or {}).get(metric, 200),
+            headers=(headers or {}).get(metric),
+            delay=(delays or {}).get(metric, delay),
+        )
+    return fake_fetch
+
+
+def signed_slack_request(
+    path,
+    body,
+    signing_secret,
+    content_type="application/x-www-form-urlencoded",
+    headers=None,
+):
+    if isinstance(body, dict):
+        body = urlencode(body)
+    timestamp = str(int(time.time()))
+    signature = (
+        "v0="
+        + hmac.new(
+            signing_secret.encode("utf-8"),
+            "v0:{0}:{1}".format(timestamp, body).encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+    )
+    return FakeRequest(
+        "https://sammich.example.com{0}".format(path),
+        method="POST",
+        body=body,
+        headers={
+            "content-type": content_type,
+            "x-slack-request-timestamp": timestamp,
+            "x-slack-signature": signature,
+            **(headers or {}),
+        },
+    )
@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+from src import worker
+from tests.fakes import (
+    SIGNING_SECRET,
+    FakeContext,
+    FakeD1,
+    FakeEnv,
+    signed_slack_request,
+)
+
+
+def _project_request(index=0):
+    return signed_slack_request(
+        "/slack/commands",
+        {"command": "/project", "text": "", "team_id": "T1", "user_id": str(index)},
+        SIGNING_SECRET,
+    )
+
+
+def test_project_latency_does_not_wait_for_d1_writes():
+    database = FakeD1(delay=0.3)
+    env = FakeEnv(
+        DB=database, SLACK_SIGNING_SECRET=SIGNING_SECRET, ACTIVITY_FLUSH_MAX_ROWS="1"
+    )
+    ctx = FakeContext()
+
+    async def scenario():
+        started = time.perf_counter()
+        response = await worker.handle_request(_project_request(), env, ctx)
+        latency = time.perf_counter() - started
+        await ctx.drain()
+        return response, latency
+
+    response, latency = asyncio.run(scenario())
+
+    assert response.status == 200
+    assert latency < 0.1
+    rows = database.query("SELECT command_name, team_id FROM slack_activity")
+    assert rows == [{"command_name": "/project", "team_id": "T1"}]
+
+
+def test_activity_rows_coalesce_into_one_batch():
+    database = FakeD1()
+    env = FakeEnv(
+        DB=database, SLACK_SIGNING_SECRET=SIGNING_SECRET, ACTIVITY_FLUSH_MAX_ROWS="3"
+    )
+    ctx = FakeContext()
+
+    async def scenario():
+        for index in range(3):
+            await worker.handle_request(_project_request(index), env, ctx)
+        await ctx.drain()
+
+    asyncio.run(scenario())
+
+    activity_batches = [
+        batch for batch in database.batches if worker.ACTIVITY_INSERT_SQL in batch
+    ]
+    assert len(activity_batches) == 1
+    assert activity_batches[0] == [worker.ACTIVITY_INSERT_SQL] * 3 + [
+        worker.ACTIVITY_DAILY_UPSERT_SQL,
+        worker.ACTIVITY_TEAM_UPSERT_SQL,
+    ]
+    assert worker.ACTIVITY_BUFFER == []
+
+
+def test_failed_flush_keeps_rows_for_a_later_retry(monkeypatch):
+    database = FakeD1()
+    env = FakeEnv(DB=database, ACTIVITY_FLUSH_MAX_ROWS="1")
+
+    async def scenario():
+        await worker.ensure_schema(env)
+        database.failing_batches = 1
+        worker.log_activity(env, None, "event", {"type": "event_callback"})
+        await asyncio.sleep(0)
+        await worker.ACTIVITY_FLUSH_TASK
+        assert len(worker.ACTIVITY_BUFFER) == 1
+        assert not worker.activity_flush_due(env)
+
+        monkeypatch.setattr(worker, "ACTIVITY_RETRY_AT", 0.0)
+        worker.log_activity(env, None, "event", {"type": "event_callback"})
+        await asyncio.sleep(0)
+        await worker.ACTIVITY_FLUSH_TASK
+
+    asyncio.run(scenario())
+
+    assert worker.ACTIVITY_BUFFER == []
+    assert database.query("SELECT COUNT(*) AS rows FROM slack_activity") == [
+        {"rows": 2}
+    ]
+
+
+def test_single_request_leaves_a_pending_flush_in_wait_until():
+    database = FakeD1()
+    env = FakeEnv(
+        DB=database,
+        SLACK_SIGNING_SECRET=SIGNING_SECRET,
+        ACTIVITY_FLUSH_MAX_AGE_SECONDS="0.05",
+    )
+    ctx = FakeContext()
+
+    async def scenario():
+        await worker.handle_request(_project_request(), env, ctx)
+        assert len(ctx.tasks) == 1
+        assert len(worker.ACTIVITY_BUFFER) == 1
+        await ctx.drain()
+
+    asyncio.run(scenario())
+
+    assert worker.ACTIVITY_BUFFER == []
+    assert database.query("SELECT command_name FROM slack_activity") == [
+        {"command_name": "/project"}
+    ]
+
+
+def test_pending_flush_never_outwaits_the_request(monkeypatch):
+    database = FakeD1()
+    env = FakeEnv(DB=database, ACTIVITY_FLUSH_MAX_AGE_SECONDS="60")
+    monkeypatch.setattr(worker, "ACTIVITY_FLUSH_MAX_WAIT_SECONDS", 0.05)
+
+    async def scenario():
+        await worker.ensure_schema(env)
+        worker.log_activity(env, None, "event", {"type": "event_callback"})
+        await asyncio.wait_for(worker.flush_activity_when_due(env), 1.0)
+        assert worker.ACTIVITY_BUFFER == []
+
+        worker.log_activity(env, None, "event", {"type": "event_callback"})
+        monkeypatch.setattr(worker, "ACTIVITY_RETRY_AT", time.time() + 60)
+        await asyncio.wait_for(worker.flush_activity_when_due(env), 1.0)
+        assert len(worker.ACTIVITY_BUFFER) == 1
+
+        await worker.handle_scheduled(env)
+
+    asyncio.run(scenario())
+
+    assert worker.ACTIVITY_BUFFER == []
+    assert database.query("SELECT COUNT(*) AS rows FROM slack_activity") == [
+        {"rows": 2}
+    ]
@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+from src import worker
+from tests.fakes import FakeD1, FakeEnv
+
+OAUTH_PAYLOAD = {
+    "type": "oauth_callback",
+    "team_id": "T1",
+    "payload": {
+        "ok": True,
+        "access_token": "xoxb-secret",
+        "authed_user": {"id": "U1", "access_token": "xoxp-secret"},
+        "team": {"id": "T1", "name": "OWASP"},
+        "scope": "commands",
+    },
+}
+
+
+def test_projection_keeps_queried_fields_and_drops_tokens():
+    policy = worker.activity_storage_policy(FakeEnv())
+
+    stored = worker.encode_activity_payload("oauth_callback", OAUTH_PAYLOAD, policy)
+
+    assert "secret" not in stored
+    assert worker.decode_activity_payload(stored) == {
+        "type": "oauth_callback",
+        "team_id": "T1",
+        "payload": {
+            "ok": True,
+            "authed_user": {"id": "U1"},
+            "team": {"id": "T1", "name": "OWASP"},
+            "scope": "commands",
+        },
+    }
+
+
+def test_size_cap_marks_truncated_payloads():
+    policy = worker.activity_storage_policy(
+        FakeEnv(ACTIVITY_PAYLOAD_STRING_LIMIT="10", ACTIVITY_PAYLOAD_MAX_BYTES="200")
+    )
+    payload = {"command": "/project", "text": "z" * 50}
+
+    capped = worker.decode_activity_payload(
+        worker.encode_activity_payload("slash_command", payload, policy)
+    )
+    assert capped["text"] == "zzzzzzzzzz...[truncated 40 chars]"
+
+    wide = {"type": "custom", "values": ["v{0}".format(index) for index in range(100)]}
+    marker = worker.decode_activity_payload(
+        worker.encode_activity_payload("custom", wide, policy)
+    )
+    assert marker["_truncated"] is True
+    assert marker["_original_bytes"] > 200
+    assert len(marker["_head"]) == 200
+
+
+def test_reader_decodes_legacy_text_and_zlib_blobs_from_d1():
+    database = FakeD1()
+    env = FakeEnv(DB=database, ACTIVITY_PAYLOAD_COMPRESSION="zlib")
+    blocks = [{"type": "section", "text": "x" * 40} for _ in range(30)]
+    payload = {"type": "custom", "blocks": blocks}
+
+    async def scenario():
+        await worker.ensure_schema(env)
+        await worker.d1_run(
+            env,
+            worker.ACTIVITY_INSERT_SQL,
+            ["legacy", None, None, None, None, None, json.dumps(payload), "now"],
+        )
+        await worker.record_activity(env, "custom", payload)
+
+    asyncio.run(scenario())
+
+    rows = database.query("SELECT payload_json FROM slack_activity ORDER BY id")
+    assert isinstance(rows[0]["payload_json"], str)
+    assert isinstance(rows[1]["payload_json"], bytes)
+    assert len(rows[1]["payload_json"]) < len(rows[0]["payload_json"])
+    assert [worker.decode_activity_payload(row["payload_json"]) for row in rows] == [
+        payload,
+        payload,
+    ]
+    assert worker.decode_activity_payload(list(rows[1]["payload_json"])) == payload
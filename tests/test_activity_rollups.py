@@ -0,0 +1,162 @@
+import asyncio
+
+from src import worker
+from tests.fakes import FakeD1, FakeEnv
+
+ROOT_DIR = worker.ROOT_DIR
+
+
+def _record(env, activity_kind, payload):
+    asyncio.run(worker.record_activity(env, activity_kind, payload))
+
+
+def _rollups(database):
+    daily = database.query(
+        "SELECT team_id, activity_kind, command_name, SUM(events) AS events "
+        "FROM slack_activity_daily "
+        "GROUP BY team_id, activity_kind, command_name "
+        "ORDER BY team_id, activity_kind, command_name"
+    )
+    teams = database.query(
+        "SELECT team_id, events FROM slack_team_activity ORDER BY team_id"
+    )
+    return daily, teams
+
+
+def test_rollups_are_maintained_as_activity_is_recorded():
+    database = FakeD1()
+    env = FakeEnv(DB=database)
+
+    _record(env, "slash_command", {"command": "/project", "team_id": "T1"})
+    _record(env, "slash_command", {"command": "/project", "team_id": "T1"})
+    _record(env, "slash_command", {"command": "/stats", "team_id": "T2"})
+    _record(env, "event", {"type": "event_callback", "team_id": "T2"})
+
+    daily, teams = _rollups(database)
+    assert daily == [
+        {
+            "team_id": "T1",
+            "activity_kind": "slash_command",
+            "command_name": "/project",
+            "events": 2,
+        },
+        {"team_id": "T2", "activity_kind": "event", "command_name": "", "events": 1},
+        {
+            "team_id": "T2",
+            "activity_kind": "slash_command",
+            "command_name": "/stats",
+            "events": 1,
+        },
+    ]
+    assert teams == [{"team_id": "T1", "events": 2}, {"team_id": "T2", "events": 2}]
+    assert asyncio.run(worker.installed_apps_summary(env)) == (
+        "Tracked workspaces: 2\nLogged webhook events: 4"
+    )
+    assert "FROM slack_team_activity" in database.executed[-1]
+
+
+def test_summary_leaves_out_events_without_a_team():
+    database = FakeD1()
+    env = FakeEnv(DB=database)
+    _record(env, "slash_command", {"command": "/project", "team_id": "T1"})
+    _record(env, "event", {"type": "url_verification"})
+
+    summary = asyncio.run(worker.installed_apps_summary(env))
+    history = database.query(
+        "SELECT COUNT(DISTINCT team_id) AS teams, COUNT(*) AS events "
+        "FROM slack_activity WHERE team_id IS NOT NULL"
+    )[0]
+
+    assert (
+        summary
+        == "Tracked workspaces: {teams}\nLogged webhook events: {events}".format(
+            **history
+        )
+    )
+    assert summary.endswith("events: 1")
+
+
+def test_rollup_migration_rebuilds_drifted_rollups():
+    database = FakeD1()
+    env = FakeEnv(DB=database)
+    _record(env, "slash_command", {"command": "/project", "team_id": "T1"})
+    _record(env, "event", {"type": "event_callback"})
+    expected = _rollups(database)
+    backfill = (ROOT_DIR / "migrations" / "0003_activity_rollups.sql").read_text()
+
+    database.connection.execute("DELETE FROM slack_activity_daily")
+    database.connection.execute("UPDATE slack_team_activity SET events = 99")
+    database.connection.executescript(backfill)
+    database.connection.executescript(backfill)
+
+    assert _rollups(database) == expected
+
+
+def test_rollup_migration_backfills_existing_history():
+    database = FakeD1()
+    database.connection.executescript(
+        (ROOT_DIR / "migrations" / "0001_initial.sql").read_text()
+    )
+    database.connection.executemany(
+        worker.ACTIVITY_INSERT_SQL,
+        [
+            [
+                "slash_command",
+                None,
+                "/stats",
+                "T1",
+                "U1",
+                None,
+                "{}",
+                "2026-01-01T10:00",
+            ],
+            [
+                "slash_command",
+                None,
+                "/stats",
+                "T1",
+                "U2",
+                None,
+                "{}",
+                "2026-01-01T11:00",
+            ],
+            [
+                "event",
+                "event_callback",
+                None,
+                "T2",
+                "U1",
+                None,
+                "{}",
+                "2026-01-02T09:00",
+            ],
+        ],
+    )
+    database.connection.executescript(
+        (ROOT_DIR / "migrations" / "0003_activity_rollups.sql").read_text()
+    )
+
+    assert database.query(
+        "SELECT day, team_id, command_name, events FROM slack_activity_daily "
+        "ORDER BY day"
+    ) == [
+        {"day": "2026-01-01", "team_id": "T1", "command_name": "/stats", "events": 2},
+        {"day": "2026-01-02", "team_id": "T2", "command_name": "", "events": 1},
+    ]
+    assert database.query(
+        "SELECT team_id, events, first_seen_at, last_seen_at "
+        "FROM slack_team_activity ORDER BY team_id"
+    ) == [
+        {
+            "team_id": "T1",
+            "events": 2,
+            "first_seen_at": "2026-01-01T10:00",
+            "last_seen_at": "2026-01-01T11:00",
+        },
+        {
+            "team_id": "T2",
+            "events": 1,
+            "first_seen_at": "2026-01-02T09:00",
+            "last_seen_at": "2026-01-02T09:00",
+        },
+    ]
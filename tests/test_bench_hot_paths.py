@@ -0,0 +1,33 @@
+from script.bench_hot_paths import compare_results, run_benchmarks
+from src import worker
+
+
+def test_benchmark_suite_covers_helpers_and_routes(monkeypatch):
+    for name in ("Response", "fetch", "PROJECT_DATA"):
+        monkeypatch.setattr(worker, name, getattr(worker, name))
+
+    results = run_benchmarks(projects=50, activity_items=30, min_time=0.0001)
+
+    assert results["params"] == {"projects": 50, "activity": 30}
+    names = set(results["results"])
+    assert "search_projects" in names
+    assert "handle_request POST /slack/commands /contributors (cache miss)" in names
+    assert all(result["us_per_op"] > 0 for result in results["results"].values())
+
+
+def test_compare_results_flags_cases_past_the_threshold():
+    baseline = {"results": {"fast": {"us_per_op": 10.0}, "slow": {"us_per_op": 10.0}}}
+    current = {
+        "results": {
+            "fast": {"us_per_op": 11.0},
+            "slow": {"us_per_op": 13.0},
+            "new": {"us_per_op": 1.0},
+        }
+    }
+
+    comparison = compare_results(current, baseline, threshold=0.25)
+
+    assert [(name, regressed) for name, _, _, _, regressed in comparison] == [
+        ("fast", False),
+        ("slow", True),
+    ]
@@ -0,0 +1,100 @@
+import json
+import pickle
+
+import pytest
+
+from script import build_catalog
+from src import worker
+
+
+@pytest.fixture
+def catalog_paths(monkeypatch, tmp_path):
+    sources = {
+        "projects": tmp_path / "projects.json",
+        "repos": tmp_path / "repos.json",
+    }
+    sources["projects"].write_text(
+        json.dumps(
+            {
+                "www-project-zap": ["OWASP Zed Attack Proxy", "https://zap"],
+                "www-project-amass": ["Attack surface mapping", "https://amass"],
+            }
+        )
+    )
+    sources["repos"].write_text(json.dumps({"python": ["https://github.com/a/b"]}))
+    artifact = tmp_path / "catalog.pickle"
+    monkeypatch.setattr(worker, "CATALOG_SOURCES", sources)
+    monkeypatch.setattr(worker, "CATALOG_ARTIFACT", artifact)
+    monkeypatch.setattr(worker, "PROJECT_DATA", None)
+    monkeypatch.setattr(worker, "REPO_DATA", None)
+    return sources, artifact
+
+
+def _write_artifact(sources, artifact):
+    artifact.write_bytes(
+        pickle.dumps(
+            worker.compile_catalogs(sources), protocol=worker.CATALOG_PICKLE_PROTOCOL
+        )
+    )
+
+
+def test_compiled_artifact_serves_catalog_without_rebuilding(
+    monkeypatch, catalog_paths
+):
+    _write_artifact(*catalog_paths)
+
+    def rebuild(entries):
+        raise AssertionError("index should come from the artifact")
+
+    monkeypatch.setattr(worker, "build_search_index", rebuild)
+
+    assert worker.search_projects("attack") == ["www-project-amass", "www-project-zap"]
+    assert worker.search_repo_technologies("py") == ["python"]
+    assert worker.make_project_detail("www-project-zap") == (
+        "*www-project-zap*\nOWASP Zed Attack Proxy\nhttps://zap"
+    )
+    assert list(worker.PROJECT_DATA) == ["www-project-amass", "www-project-zap"]
+
+
+def test_artifact_matches_search_over_json_sources(catalog_paths):
+    sources, artifact = catalog_paths
+    from_json = [worker.search_projects(query) for query in ("zap", "a", "map")]
+
+    _write_artifact(sources, artifact)
+    worker.PROJECT_DATA = None
+    worker.REPO_DATA = None
+    worker.reset_isolate_state()
+
+    assert [worker.search_projects(query) for query in ("zap", "a", "map")] == (
+        from_json
+    )
+
+
+def test_cold_start_loads_artifact_without_reading_sources(monkeypatch, catalog_paths):
+    _write_artifact(*catalog_paths)
+
+    def digest(sources):
+        raise AssertionError("sources are checked at build time")
+
+    monkeypatch.setattr(worker, "catalog_source_digest", digest)
+    monkeypatch.setattr(worker, "load_json_file", digest)
+
+    assert worker.search_projects("zap") == ["www-project-zap"]
+
+
+def test_build_check_flags_artifact_from_other_sources(catalog_paths):
+    sources, artifact = catalog_paths
+    assert not build_catalog.is_current(artifact)
+
+    _write_artifact(sources, artifact)
+    assert build_catalog.is_current(artifact)
+
+    sources["projects"].write_text(json.dumps({"www-project-new": ["New", ""]}))
+    assert not build_catalog.is_current(artifact)
+
+
+def test_missing_artifact_falls_back_to_json(catalog_paths):
+    sources, artifact = catalog_paths
+    sources["projects"].write_text(json.dumps({"www-project-new": ["New", ""]}))
+
+    assert worker.search_projects("new") == ["www-project-new"]
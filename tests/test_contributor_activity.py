@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+from src import worker
+from tests.fakes import github_env, github_fetch
+
+
+def _github_fetch(**delays):
+    return github_fetch(
+        delays=delays,
+        prs={"items": [{"user": {"login": "alice"}}]},
+        issues={"items": [{"user": {"login": "bob"}}]},
+        comments=[{"user": {"login": "bob"}}, {"user": {"login": "carol"}}],
+        reviews=[{"user": {"login": "alice"}}],
+    )
+
+
+def test_fetch_contributor_activity_latency_tracks_slowest_call(monkeypatch):
+    fake_fetch = _github_fetch(prs=0.1, issues=0.15, comments=0.2)
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+
+    started = time.perf_counter()
+    report = asyncio.run(worker.fetch_contributor_activity(github_env()))
+    elapsed = time.perf_counter() - started
+
+    assert len(fake_fetch.calls) == 4
+    assert elapsed < 0.35
+    assert report["errors"] == []
+    assert [row["user"] for row in report["rows"]] == ["alice", "bob", "carol"]
+
+
+def test_fetch_contributor_activity_reports_partial_results(monkeypatch):
+    fake_fetch = github_fetch(
+        statuses={"comments": 502},
+        prs={"items": [{"user": {"login": "alice"}}]},
+        issues=RuntimeError("connection reset"),
+        comments={"message": "Server Error"},
+    )
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+
+    report = asyncio.run(worker.fetch_contributor_activity(github_env()))
+
+    assert [row["user"] for row in report["rows"]] == ["alice"]
+    assert report["errors"] == [
+        "issues request failed",
+        "comments returned HTTP 502",
+    ]
+    response = worker.format_contributor_blocks(report["rows"], report["errors"])
+    note = response["blocks"][-1]
+    assert note["type"] == "context"
+    assert "comments returned HTTP 502" in note["elements"][0]["text"]
+
+
+def test_fetch_contributor_activity_cancels_calls_past_the_deadline(monkeypatch):
+    fake_fetch = _github_fetch(comments=5.0)
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+
+    started = time.perf_counter()
+    report = asyncio.run(
+        worker.fetch_contributor_activity(
+            github_env(GITHUB_FETCH_TIMEOUT_SECONDS="0.1")
+        )
+    )
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 1.0
+    assert report["errors"] == ["comments timed out"]
+    assert [row["user"] for row in report["rows"]] == ["alice", "bob"]
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from src import worker
+from tests.fakes import FakeContext, FakeD1, github_env, github_fetch
+
+
+def _github_fetch(delay=0.0):
+    return github_fetch(delay=delay, prs={"items": [{"user": {"login": "alice"}}]})
+
+
+def test_contributor_report_is_served_from_cache_while_fresh(monkeypatch):
+    fake_fetch = _github_fetch()
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    env = github_env()
+
+    async def scenario():
+        first = await worker.get_contributor_report(env)
+        second = await worker.get_contributor_report(env)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first is second
+    assert len(fake_fetch.calls) == 4
+
+
+def test_concurrent_misses_share_one_upstream_fetch(monkeypatch):
+    fake_fetch = _github_fetch(delay=0.05)
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    env = github_env()
+
+    async def scenario():
+        return await asyncio.gather(
+            *[worker.get_contributor_report(env) for _ in range(5)]
+        )
+
+    reports = asyncio.run(scenario())
+
+    assert len(fake_fetch.calls) == 4
+    assert all(report["rows"][0]["user"] == "alice" for report in reports)
+
+
+def test_stale_report_is_returned_and_refreshed_in_background(monkeypatch):
+    fake_fetch = _github_fetch()
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    env = github_env(CONTRIBUTOR_CACHE_TTL_SECONDS="60")
+    cache_key = worker.contributor_cache_key("OWASP-BLT", "BLT-Lettuce", 7)
+    stale_report = {"rows": [], "errors": []}
+    worker.CONTRIBUTOR_CACHE[cache_key] = {
+        "report": stale_report,
+        "stored_at": time.time() - 120,
+    }
+    ctx = FakeContext()
+
+    async def scenario():
+        served = await worker.get_contributor_report(env, ctx)
+        calls_before_refresh = len(fake_fetch.calls)
+        await ctx.drain()
+        return served, calls_before_refresh
+
+    served, calls_before_refresh = asyncio.run(scenario())
+
+    assert served is stale_report
+    assert calls_before_refresh == 0
+    assert len(fake_fetch.calls) == 4
+    assert worker.CONTRIBUTOR_CACHE[cache_key]["report"]["rows"][0]["user"] == "alice"
+
+
+def test_d1_tier_serves_other_isolates(monkeypatch):
+    fake_fetch = _github_fetch()
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    env = github_env(DB=FakeD1())
+
+    asyncio.run(worker.get_contributor_report(env))
+    worker.reset_isolate_state()
+    report = asyncio.run(worker.get_contributor_report(env))
+
+    assert len(fake_fetch.calls) == 4
+    assert report["rows"][0]["user"] == "alice"
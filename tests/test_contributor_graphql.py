@@ -0,0 +1,165 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from src import worker
+from tests.fakes import FakeFetch, FakeFetchResponse, github_env, github_fetch
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2026, 10, 15, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    # The recordings cover the seven days before 2026-10-15.
+    monkeypatch.setattr(worker, "datetime", FrozenDatetime)
+
+
+def _fixture(name):
+    return (FIXTURES / name).read_text()
+
+
+def _env(**values):
+    return github_env(**dict({"GITHUB_TOKEN": "token"}, **values))
+
+
+def _rest_fetch():
+    return github_fetch(
+        prs=_fixture("github_rest_search_prs.json"),
+        issues=_fixture("github_rest_search_issues.json"),
+        comments=_fixture("github_rest_issue_comments.json"),
+        reviews=_fixture("github_rest_pull_comments.json"),
+    )
+
+
+def _graphql_fetch(pages):
+    def respond(url, options):
+        variables = json.loads(options["body"])["variables"]
+        page = "page2" if variables["prsCursor"] else "page1"
+        return FakeFetchResponse(200, pages[page])
+
+    return FakeFetch().add("/graphql", respond)
+
+
+def _recorded_pages():
+    return {
+        "page1": _fixture("github_graphql_activity_page1.json"),
+        "page2": _fixture("github_graphql_activity_page2.json"),
+    }
+
+
+def test_graphql_backend_returns_the_same_rows_as_rest(monkeypatch):
+    rest_fetch = _rest_fetch()
+    monkeypatch.setattr(worker, "fetch", rest_fetch)
+    rest = asyncio.run(worker.fetch_contributor_activity(_env()))
+
+    graphql_fetch = _graphql_fetch(_recorded_pages())
+    monkeypatch.setattr(worker, "fetch", graphql_fetch)
+    graphql = asyncio.run(
+        worker.fetch_contributor_activity(_env(GITHUB_ACTIVITY_BACKEND="graphql"))
+    )
+
+    assert graphql == rest
+    assert rest["rows"] == [
+        {
+            "user": "alice",
+            "prs": 2,
+            "issues": 1,
+            "comments": 0,
+            "reviews": 1,
+            "total": 4,
+        },
+        {"user": "bob", "prs": 0, "issues": 1, "comments": 2, "reviews": 0, "total": 3},
+        {
+            "user": "carol",
+            "prs": 0,
+            "issues": 0,
+            "comments": 1,
+            "reviews": 1,
+            "total": 2,
+        },
+        {
+            "user": "dependabot[bot]",
+            "prs": 1,
+            "issues": 0,
+            "comments": 1,
+            "reviews": 0,
+            "total": 2,
+        },
+        {
+            "user": "ghost",
+            "prs": 0,
+            "issues": 1,
+            "comments": 0,
+            "reviews": 0,
+            "total": 1,
+        },
+    ]
+    assert len(rest_fetch.calls) == 4
+    assert [url for url, _ in graphql_fetch.calls] == [worker.GITHUB_GRAPHQL_URL] * 2
+
+
+def test_graphql_backend_downloads_an_order_of_magnitude_less():
+    rest_bytes = sum(
+        len(json.dumps(json.loads(_fixture(name))))
+        for name in (
+            "github_rest_search_prs.json",
+            "github_rest_search_issues.json",
+            "github_rest_issue_comments.json",
+            "github_rest_pull_comments.json",
+        )
+    )
+    graphql_bytes = sum(
+        len(json.dumps(json.loads(body))) for body in _recorded_pages().values()
+    )
+
+    assert graphql_bytes * 10 < rest_bytes
+
+
+def test_later_pages_only_follow_open_cursors(monkeypatch):
+    graphql_fetch = _graphql_fetch(_recorded_pages())
+    monkeypatch.setattr(worker, "fetch", graphql_fetch)
+
+    asyncio.run(worker.fetch_contributor_activity_graphql(_env()))
+
+    first, second = [
+        json.loads(options["body"])["variables"] for _, options in graphql_fetch.calls
+    ]
+    assert first["withPrs"] and first["withIssues"] and first["withCommented"]
+    assert first["commented"] == "repo:OWASP-BLT/BLT-Lettuce updated:>=2026-10-08"
+    assert second["prsCursor"] == "Y3Vyc29yOjI="
+    assert not second["withIssues"] and not second["withCommented"]
+
+
+def test_graphql_errors_are_reported_with_partial_rows(monkeypatch):
+    payload = json.loads(_fixture("github_graphql_activity_page2.json"))
+    payload["errors"] = [{"message": "Something went wrong while executing"}]
+    monkeypatch.setattr(worker, "fetch", FakeFetch().add("/graphql", payload))
+
+    report = asyncio.run(worker.fetch_contributor_activity_graphql(_env()))
+
+    assert [row["user"] for row in report["rows"]] == ["dependabot[bot]"]
+    assert report["errors"] == [
+        "graphql returned errors: Something went wrong while executing"
+    ]
+
+
+def test_graphql_backend_needs_a_token(monkeypatch):
+    rest_fetch = _rest_fetch()
+    monkeypatch.setattr(worker, "fetch", rest_fetch)
+
+    asyncio.run(
+        worker.fetch_contributor_activity(
+            _env(GITHUB_ACTIVITY_BACKEND="graphql", GITHUB_TOKEN="")
+        )
+    )
+
+    assert len(rest_fetch.calls) == 4
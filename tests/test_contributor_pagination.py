@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
+
+from src import worker
+from tests.fakes import FakeFetchResponse, github_env
+
+
+def _link(url, last_page):
+    return '<{0}&page=2>; rel="next", <{0}&page={1}>; rel="last"'.format(
+        url.split("&page=")[0], last_page
+    )
+
+
+class PagedGitHub:
+    """Serves every search as `pages` pages of one PR by "user-<page>" and
+    records how many page requests were in flight at once."""
+
+    def __init__(self, pages, failing_page=None):
+        self.pages = pages
+        self.failing_page = failing_page
+        self.urls = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def __call__(self, url, options=None):
+        self.urls.append(url)
+        if "is%3Apr" not in url:
+            return FakeFetchResponse(200, {"items": []} if "/search/" in url else [])
+        page = int(parse_qs(urlparse(url).query).get("page", ["1"])[0])
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if page == self.failing_page:
+            return FakeFetchResponse(502, {"message": "Server Error"})
+        return FakeFetchResponse(
+            200,
+            {
+                "total_count": self.pages,
+                "items": [{"user": {"login": "user-{0}".format(page)}}],
+            },
+            {"Link": _link(url, self.pages)},
+        )
+
+
+def test_link_pages_are_read_concurrently_within_the_bound(monkeypatch):
+    github = PagedGitHub(pages=7)
+    monkeypatch.setattr(worker, "fetch", github)
+    monkeypatch.setattr(worker, "GITHUB_PAGE_CONCURRENCY", 2)
+
+    report = asyncio.run(worker.fetch_contributor_activity(github_env()))
+
+    pr_pages = sorted(
+        int(parse_qs(urlparse(url).query).get("page", ["1"])[0])
+        for url in github.urls
+        if "is%3Apr" in url
+    )
+    assert pr_pages == [1, 2, 3, 4, 5, 6, 7]
+    assert github.peak == 2
+    assert report["errors"] == []
+    assert "notice" not in report
+    assert sorted(row["user"] for row in report["rows"]) == [
+        "user-{0}".format(page) for page in range(1, 8)
+    ]
+    assert all(row["prs"] == 1 and row["total"] == 1 for row in report["rows"])
+
+
+def test_pages_past_the_cap_are_skipped_with_a_notice(monkeypatch):
+    github = PagedGitHub(pages=25)
+    monkeypatch.setattr(worker, "fetch", github)
+    monkeypatch.setattr(worker, "GITHUB_MAX_PAGES", 3)
+
+    report = asyncio.run(worker.fetch_contributor_activity(github_env()))
+
+    assert len([url for url in github.urls if "is%3Apr" in url]) == 3
+    assert len(report["rows"]) == 3
+    assert report["notice"] == (
+        "Only the first 300 pull requests were counted, try a shorter window."
+    )
+
+
+def test_failed_page_keeps_the_pages_already_folded(monkeypatch):
+    github = PagedGitHub(pages=4, failing_page=3)
+    monkeypatch.setattr(worker, "fetch", github)
+
+    report = asyncio.run(worker.fetch_contributor_activity(github_env()))
+
+    assert report["errors"] == ["pull requests returned HTTP 502"]
+    assert sorted(row["user"] for row in report["rows"]) == [
+        "user-1",
+        "user-2",
+        "user-4",
+    ]
+
+
+def test_contributors_days_argument_sets_the_window(monkeypatch):
+    github = PagedGitHub(pages=1)
+    monkeypatch.setattr(worker, "fetch", github)
+    since = (datetime.now(timezone.utc) - timedelta(days=30)).date().isoformat()
+
+    response = asyncio.run(
+        worker.command_response(
+            {"command": "/contributors", "text": "30d"}, github_env()
+        )
+    )
+
+    assert response["text"] == "Contributor activity for the last 30 days."
+    assert "merged%3A%3E%3D{0}".format(since) in github.urls[0]
+    assert worker.contributor_cache_key("OWASP-BLT", "BLT-Lettuce", 30) in (
+        worker.CONTRIBUTOR_CACHE
+    )
+
+
+def test_invalid_window_gets_usage_without_calling_github(monkeypatch):
+    github = PagedGitHub(pages=1)
+    monkeypatch.setattr(worker, "fetch", github)
+
+    for text in ("0", "366", "last week"):
+        response = asyncio.run(
+            worker.command_response({"command": "/stats", "text": text}, github_env())
+        )
+        assert response["text"] == "Usage: /stats [days], where days is 1 to 365."
+    assert github.urls == []
+    assert worker.parse_contributor_window(" 14 days ") == 14
+    assert worker.parse_contributor_window("") == worker.CONTRIBUTOR_WINDOW_DAYS
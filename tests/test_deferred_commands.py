@@ -0,0 +1,86 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from src import worker
+from tests.fakes import (
+    SIGNING_SECRET,
+    FakeContext,
+    FakeFetch,
+    github_env,
+    github_fetch,
+    signed_slack_request,
+)
+
+RESPONSE_URL = "https://hooks.slack.com/commands/T1/1/abc"
+
+
+def _env():
+    return github_env(
+        SLACK_SIGNING_SECRET=SIGNING_SECRET, GITHUB_FETCH_TIMEOUT_SECONDS="5"
+    )
+
+
+def _slow_github(delay):
+    return github_fetch(delay=delay, prs={"items": [{"user": {"login": "alice"}}]}).add(
+        RESPONSE_URL, "ok"
+    )
+
+
+def _contributors_request():
+    return signed_slack_request(
+        "/slack/commands",
+        {"command": "/stats", "text": "", "response_url": RESPONSE_URL},
+        SIGNING_SECRET,
+    )
+
+
+@pytest.mark.parametrize("upstream_delay", [0.2, 0.6])
+def test_deferred_ack_latency_is_independent_of_github(monkeypatch, upstream_delay):
+    fake_fetch = _slow_github(upstream_delay)
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    ctx = FakeContext()
+
+    async def scenario():
+        started = time.perf_counter()
+        response = await worker.handle_request(_contributors_request(), _env(), ctx)
+        ack_latency = time.perf_counter() - started
+        await ctx.drain()
+        return response, ack_latency
+
+    response, ack_latency = asyncio.run(scenario())
+
+    assert ack_latency < 0.1
+    assert "Working on `/stats`" in response.json()["text"]
+    url, options = fake_fetch.calls[-1]
+    assert url == RESPONSE_URL
+    assert options["method"] == "POST"
+    assert "alice" in json.loads(options["body"])["blocks"][0]["text"]["text"]
+
+
+def test_deferred_command_runs_inline_without_wait_until(monkeypatch):
+    monkeypatch.setattr(worker, "fetch", _slow_github(0.0))
+
+    response = asyncio.run(worker.handle_request(_contributors_request(), _env()))
+
+    assert response.json()["text"] == "Contributor activity for the last 7 days."
+
+
+def test_fast_commands_are_answered_inline(monkeypatch):
+    fake_fetch = FakeFetch()
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    ctx = FakeContext()
+    request = signed_slack_request(
+        "/slack/commands",
+        {"command": "/repo", "text": "python", "response_url": RESPONSE_URL},
+        SIGNING_SECRET,
+    )
+
+    response = asyncio.run(worker.handle_request(request, _env(), ctx))
+
+    assert worker.command_mode("/repo") == worker.FAST_COMMAND
+    assert response.json()["text"].startswith("*python repositories*")
+    assert ctx.tasks == []
+    assert fake_fetch.calls == []
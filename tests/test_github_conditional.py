@@ -0,0 +1,122 @@
+import asyncio
+
+from src import worker
+from tests.fakes import FakeD1, FakeFetch, FakeFetchResponse, github_env, github_fetch
+
+
+def _conditional(body, etag=None, last_modified=None):
+    validators = {}
+    if etag:
+        validators["ETag"] = etag
+    if last_modified:
+        validators["Last-Modified"] = last_modified
+
+    def respond(url, options):
+        headers = options.get("headers") or {}
+        if etag and headers.get("If-None-Match") == etag:
+            return FakeFetchResponse(304, None, validators)
+        if last_modified and headers.get("If-Modified-Since") == last_modified:
+            return FakeFetchResponse(304, None, validators)
+        return FakeFetchResponse(200, body, validators)
+
+    return respond
+
+
+def _github_fetch():
+    return github_fetch(
+        prs=_conditional({"items": [{"user": {"login": "alice"}}]}, etag='W/"pr-1"'),
+        issues=_conditional({"items": []}, etag='"issues-1"'),
+        comments=_conditional(
+            [{"user": {"login": "bob"}}],
+            last_modified="Tue, 13 Oct 2026 09:00:00 GMT",
+        ),
+        reviews=_conditional([], etag='"reviews-1"'),
+    )
+
+
+def _env(**values):
+    return github_env(GITHUB_TOKEN="token-a", **values)
+
+
+def _request_headers(fake_fetch):
+    return [options["headers"] for _, options in fake_fetch.calls]
+
+
+def test_unchanged_resources_are_revalidated_from_d1(monkeypatch):
+    fake_fetch = _github_fetch()
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    env = _env(DB=FakeD1())
+
+    first = asyncio.run(worker.fetch_contributor_activity(env))
+    worker.reset_isolate_state()
+    second = asyncio.run(worker.fetch_contributor_activity(env))
+
+    assert second == first
+    assert [row["user"] for row in second["rows"]] == ["alice", "bob"]
+    conditional = _request_headers(fake_fetch)[4:]
+    assert sorted(
+        headers.get("If-None-Match") or headers.get("If-Modified-Since")
+        for headers in conditional
+    ) == ['"issues-1"', '"reviews-1"', "Tue, 13 Oct 2026 09:00:00 GMT", 'W/"pr-1"']
+    assert len(env.DB.query("SELECT url FROM github_http_cache")) == 4
+
+
+def test_changed_resource_replaces_the_stored_copy(monkeypatch):
+    fake_fetch = FakeFetch().add(
+        "/repos/a/b", _conditional({"version": 1}, etag='"v1"')
+    )
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    env = _env()
+    headers = {"Accept": "application/vnd.github+json"}
+
+    asyncio.run(worker.fetch_github_page(env, "https://x/repos/a/b", headers))
+    fake_fetch.routes = []
+    fake_fetch.add("/repos/a/b", _conditional({"version": 2}, etag='"v2"'))
+    changed = asyncio.run(worker.fetch_github_page(env, "https://x/repos/a/b", headers))
+    unchanged = asyncio.run(
+        worker.fetch_github_page(env, "https://x/repos/a/b", headers)
+    )
+
+    assert changed == (True, {"version": 2}, 200, None)
+    assert unchanged == (True, {"version": 2}, 304, None)
+
+
+def test_validators_are_not_shared_across_tokens(monkeypatch):
+    fake_fetch = FakeFetch().add("/repos/a/b", _conditional({}, etag='"v1"'))
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    env = _env()
+
+    for token in ("token-a", "token-b"):
+        asyncio.run(
+            worker.fetch_github_page(
+                env,
+                "https://x/repos/a/b",
+                {"Authorization": "Bearer {0}".format(token)},
+            )
+        )
+
+    assert ["If-None-Match" in headers for headers in _request_headers(fake_fetch)] == [
+        False,
+        False,
+    ]
+
+
+def test_scheduled_run_prunes_stale_cache_rows_even_if_reconcile_fails(monkeypatch):
+    fake_fetch = _github_fetch()
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    env = _env(DB=FakeD1(), GITHUB_WEBHOOK_SECRET="secret")
+    asyncio.run(worker.fetch_contributor_activity(env))
+    env.DB.query(
+        "UPDATE github_http_cache SET stored_at = stored_at - ? WHERE url LIKE ?",
+        [worker.GITHUB_HTTP_CACHE_RETENTION_SECONDS + 60, "%is%3Apr%"],
+    )
+
+    async def failing_reconcile(env):
+        raise RuntimeError("github unavailable")
+
+    monkeypatch.setattr(worker, "reconcile_contributor_counters", failing_reconcile)
+    asyncio.run(worker.handle_scheduled(env))
+
+    urls = [row["url"] for row in env.DB.query("SELECT url FROM github_http_cache")]
+    assert len(urls) == 3
+    assert not any("is%3Apr" in url for url in urls)
@@ -0,0 +1,149 @@
+import asyncio
+import time
+
+import pytest
+
+from src import worker
+from tests.fakes import FakeFetch, FakeFetchResponse, github_env, github_fetch
+
+SEARCH_URL = "https://api.github.com/search/issues?q=repo%3AOWASP-BLT%2FBLT-Lettuce"
+CORE_URL = "https://api.github.com/repos/OWASP-BLT/BLT-Lettuce/issues/comments"
+TOKEN = {"Authorization": "Bearer ghp-test"}
+
+
+def _quota(remaining, reset_in=60.0, **extra):
+    headers = {
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(time.time() + reset_in)),
+    }
+    headers.update(extra)
+    return headers
+
+
+def test_quota_is_tracked_per_token_and_resource(monkeypatch):
+    fake_fetch = (
+        FakeFetch()
+        .add("/search/", {"items": []}, headers=_quota(9))
+        .add("/repos/", [], headers=_quota(4999))
+    )
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+
+    async def scenario():
+        await worker.fetch_github_response(SEARCH_URL, headers=TOKEN)
+        await worker.fetch_github_response(CORE_URL, headers=TOKEN)
+        await worker.fetch_github_response(SEARCH_URL)
+
+    asyncio.run(scenario())
+
+    token_id, _ = worker.github_rate_limit_key(SEARCH_URL, TOKEN)
+    assert worker.GITHUB_RATE_LIMITS[(token_id, "search")]["remaining"] == 9
+    assert worker.GITHUB_RATE_LIMITS[(token_id, "core")]["remaining"] == 4999
+    assert ("anonymous", "search") in worker.GITHUB_RATE_LIMITS
+
+
+def test_exhausted_budget_refuses_calls_until_reset(monkeypatch):
+    fake_fetch = FakeFetch().add(
+        "/search/", {"items": []}, headers=_quota(1), delay=0.01
+    )
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+
+    async def scenario():
+        first = await worker.fetch_github_response(SEARCH_URL, headers=TOKEN)
+        # The one remaining call is spent by the first of two concurrent ones.
+        second, third = await asyncio.gather(
+            worker.fetch_github_response(SEARCH_URL, headers=TOKEN),
+            worker.fetch_github_response(SEARCH_URL, headers=TOKEN),
+        )
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+
+    assert first[2] == 200
+    assert sorted([second[2], third[2]]) == [200, 429]
+    assert len(fake_fetch.calls) == 2
+
+    key = worker.github_rate_limit_key(SEARCH_URL, TOKEN)
+    worker.GITHUB_RATE_LIMITS[key]["reset_at"] = time.time() - 1
+    asyncio.run(worker.fetch_github_response(SEARCH_URL, headers=TOKEN))
+    assert len(fake_fetch.calls) == 3
+
+
+def test_429_backs_off_with_jitter_and_short_waits_are_deferred(monkeypatch):
+    replies = [
+        FakeFetchResponse(429, {"message": "slow down"}, {"Retry-After": "30"}),
+        FakeFetchResponse(200, [], _quota(100)),
+    ]
+    fake_fetch = FakeFetch().add("/repos/", lambda url, options: replies.pop(0))
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    key = worker.github_rate_limit_key(CORE_URL, TOKEN)
+
+    before = time.time()
+    status = asyncio.run(worker.fetch_github_response(CORE_URL, headers=TOKEN))[2]
+    retry_at = worker.GITHUB_RATE_LIMITS[key]["retry_at"]
+
+    assert status == 429
+    assert before + 30 <= retry_at <= time.time() + 30 * 1.25
+
+    refused = asyncio.run(worker.fetch_github_response(CORE_URL, headers=TOKEN))
+    assert refused[2] == 429
+    assert "rate limit" in refused[1]["message"]
+    assert len(fake_fetch.calls) == 1
+
+    worker.GITHUB_RATE_LIMITS[key]["retry_at"] = time.time() + 0.05
+    started = time.perf_counter()
+    deferred = asyncio.run(worker.fetch_github_response(CORE_URL, headers=TOKEN))
+    assert deferred[2] == 200
+    assert time.perf_counter() - started >= 0.05
+
+
+@pytest.mark.parametrize("status", [403, 429])
+def test_rate_limited_stats_show_cached_counts(monkeypatch, status):
+    limited = {"message": "API rate limit exceeded for user."}
+    fake_fetch = github_fetch(
+        statuses={"prs": status, "issues": status},
+        headers={"prs": _quota(0), "issues": _quota(0)},
+        prs=limited,
+        issues=limited,
+        comments=[{"user": {"login": "carol"}}],
+    )
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    env = github_env(
+        CONTRIBUTOR_CACHE_TTL_SECONDS="60", CONTRIBUTOR_CACHE_STALE_SECONDS="0"
+    )
+    cache_key = worker.contributor_cache_key("OWASP-BLT", "BLT-Lettuce", 7)
+    cached_rows = [
+        {
+            "user": "alice",
+            "prs": 3,
+            "issues": 1,
+            "comments": 2,
+            "reviews": 0,
+            "total": 6,
+        }
+    ]
+    worker.CONTRIBUTOR_CACHE[cache_key] = {
+        "report": {"rows": cached_rows, "errors": []},
+        "stored_at": time.time() - 600,
+    }
+
+    response = asyncio.run(
+        worker.command_response({"command": "/stats", "text": ""}, env)
+    )
+
+    assert "alice" in response["blocks"][0]["text"]["text"]
+    notice = response["blocks"][-1]["elements"][0]["text"]
+    assert "rate limit reached, showing cached data from 10 min ago" in notice
+
+
+def test_rate_limit_without_cache_is_reported_instead_of_zeros(monkeypatch):
+    limited = {"message": "secondary rate limit"}
+    fake_fetch = github_fetch(
+        statuses={"prs": 429, "issues": 429}, prs=limited, issues=limited
+    )
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+
+    report = asyncio.run(worker.fetch_contributor_activity(github_env()))
+
+    assert report["errors"] == ["pull requests rate limited", "issues rate limited"]
+    blocks = worker.format_contributor_blocks(report["rows"], report["errors"])
+    assert blocks["text"] == "Contributor activity could not be loaded from GitHub."
@@ -0,0 +1,344 @@
+import asyncio
+import hashlib
+import hmac
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src import worker
+from tests.fakes import FakeD1, FakeFetch, FakeRequest, github_env, github_fetch
+
+FIXTURES = Path(__file__).parent / "fixtures"
+WEBHOOK_SECRET = "test-webhook-secret"
+RECORDINGS = [
+    ("pull_request", "github_webhook_pull_request_merged.json"),
+    ("issues", "github_webhook_issues_closed.json"),
+    ("issue_comment", "github_webhook_issue_comment_created.json"),
+    (
+        "pull_request_review_comment",
+        "github_webhook_pull_request_review_comment_created.json",
+    ),
+]
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2026, 10, 15, 12, 0, tzinfo=timezone.utc)
+
+
+def _env(**values):
+    settings = {"DB": FakeD1(), "GITHUB_WEBHOOK_SECRET": WEBHOOK_SECRET}
+    settings.update(values)
+    return github_env(**settings)
+
+
+def _delivery(event, body, delivery_id, secret=WEBHOOK_SECRET):
+    if not isinstance(body, str):
+        body = json.dumps(body)
+    signature = hmac.new(
+        secret.encode("utf-8"), body.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+    return FakeRequest(
+        "https://sammich.example.com/github/webhook",
+        method="POST",
+        body=body,
+        headers={
+            "content-type": "application/json",
+            "x-github-event": event,
+            "x-github-delivery": delivery_id,
+            "x-hub-signature-256": "sha256=" + signature,
+        },
+    )
+
+
+async def _replay(env, deliveries):
+    results = []
+    for event, body, delivery_id in deliveries:
+        response = await worker.handle_request(_delivery(event, body, delivery_id), env)
+        results.append((response.status, json.loads(response.body)))
+    return results
+
+
+def _recorded_deliveries():
+    return [
+        (event, (FIXTURES / name).read_text(), "delivery-{0}".format(index))
+        for index, (event, name) in enumerate(RECORDINGS)
+    ]
+
+
+def _counters(env):
+    return env.DB.query(
+        "SELECT repo, day, login, prs, issues, comments, reviews "
+        "FROM github_contributor_daily ORDER BY day, login"
+    )
+
+
+def test_unsigned_or_missigned_deliveries_are_rejected():
+    env = _env()
+    body = (FIXTURES / "github_webhook_issues_closed.json").read_text()
+
+    async def scenario():
+        missigned = _delivery("issues", body, "delivery-1", secret="other-secret")
+        unconfigured = _delivery("issues", body, "delivery-2")
+        return (
+            await worker.handle_request(missigned, env),
+            await worker.handle_request(unconfigured, _env(GITHUB_WEBHOOK_SECRET="")),
+        )
+
+    missigned, unconfigured = asyncio.run(scenario())
+
+    assert missigned.status == 401
+    assert unconfigured.status == 401
+    assert env.DB.batches == []
+
+
+def test_recorded_deliveries_build_per_day_counters_once():
+    env = _env()
+    deliveries = _recorded_deliveries()
+
+    results = asyncio.run(_replay(env, deliveries + deliveries[:2]))
+
+    assert [counted for _, counted in results] == [
+        {"ok": True, "counted": True}
+    ] * 4 + [{"ok": True, "counted": False}] * 2
+    assert _counters(env) == [
+        {
+            "repo": "owasp-blt/blt-lettuce",
+            "day": "2026-10-13",
+            "login": "alice",
+            "prs": 0,
+            "issues": 0,
+            "comments": 0,
+            "reviews": 1,
+        },
+        {
+            "repo": "owasp-blt/blt-lettuce",
+            "day": "2026-10-13",
+            "login": "carol",
+            "prs": 0,
+            "issues": 0,
+            "comments": 1,
+            "reviews": 0,
+        },
+        {
+            "repo": "owasp-blt/blt-lettuce",
+            "day": "2026-10-14",
+            "login": "alice",
+            "prs": 1,
+            "issues": 0,
+            "comments": 0,
+            "reviews": 0,
+        },
+        {
+            "repo": "owasp-blt/blt-lettuce",
+            "day": "2026-10-14",
+            "login": "bob",
+            "prs": 0,
+            "issues": 1,
+            "comments": 0,
+            "reviews": 0,
+        },
+    ]
+
+
+def test_other_actions_are_acknowledged_without_counting():
+    env = _env()
+    merged = json.loads(
+        (FIXTURES / "github_webhook_pull_request_merged.json").read_text()
+    )
+    unmerged = dict(
+        merged, pull_request=dict(merged["pull_request"], merged=False, merged_at=None)
+    )
+    reopened = dict(merged, action="reopened")
+    ping = {"zen": "Keep it logically awesome.", "repository": merged["repository"]}
+
+    results = asyncio.run(
+        _replay(
+            env,
+            [
+                ("ping", ping, "delivery-1"),
+                ("pull_request", unmerged, "delivery-2"),
+                ("pull_request", reopened, "delivery-3"),
+                ("star", {"action": "created"}, "delivery-4"),
+            ],
+        )
+    )
+
+    assert results == [(200, {"ok": True, "counted": False})] * 4
+    assert _counters(env) == []
+    assert env.DB.query("SELECT repo FROM github_counter_coverage") == [
+        {"repo": "owasp-blt/blt-lettuce"}
+    ]
+
+
+def test_contributors_reads_counters_once_they_cover_the_window(monkeypatch):
+    monkeypatch.setattr(worker, "datetime", FrozenDatetime)
+    github = FakeFetch()
+    monkeypatch.setattr(worker, "fetch", github)
+    env = _env()
+    asyncio.run(_replay(env, _recorded_deliveries()))
+    command = {"command": "/contributors", "text": "7"}
+
+    # Counters start the day after the first delivery, so GitHub is asked.
+    asyncio.run(worker.command_response(command, env))
+    assert github.calls
+
+    github.calls.clear()
+    env.DB.query("UPDATE github_counter_coverage SET since_day = '2026-10-01'")
+    report = asyncio.run(worker.get_contributor_report(env, days=7))
+
+    assert github.calls == []
+    assert report == {
+        "rows": [
+            {
+                "user": "alice",
+                "prs": 1,
+                "issues": 0,
+                "comments": 0,
+                "reviews": 1,
+                "total": 2,
+            },
+            {
+                "user": "bob",
+                "prs": 0,
+                "issues": 1,
+                "comments": 0,
+                "reviews": 0,
+                "total": 1,
+            },
+            {
+                "user": "carol",
+                "prs": 0,
+                "issues": 0,
+                "comments": 1,
+                "reviews": 0,
+                "total": 1,
+            },
+        ],
+        "errors": [],
+    }
+
+
+def test_an_issue_closed_twice_is_counted_once():
+    env = _env()
+    closed = json.loads((FIXTURES / "github_webhook_issues_closed.json").read_text())
+    reclosed = dict(
+        closed, issue=dict(closed["issue"], closed_at="2026-10-14T17:45:00Z")
+    )
+
+    results = asyncio.run(
+        _replay(
+            env,
+            [("issues", closed, "delivery-1"), ("issues", reclosed, "delivery-2")],
+        )
+    )
+
+    assert [counted for _, counted in results] == [
+        {"ok": True, "counted": True},
+        {"ok": True, "counted": False},
+    ]
+    assert [row["issues"] for row in _counters(env)] == [1]
+
+
+def _github_since(monkeypatch, failing=None):
+    github = github_fetch(
+        statuses={failing: 502} if failing else None,
+        prs={
+            "total_count": 1,
+            "items": [
+                {
+                    "number": 151,
+                    "user": {"login": "alice"},
+                    "closed_at": "2026-10-14T16:05:11Z",
+                    "pull_request": {"merged_at": "2026-10-14T16:05:11Z"},
+                }
+            ],
+        },
+        issues={
+            "total_count": 2,
+            "items": [
+                {
+                    "number": 148,
+                    "user": {"login": "bob"},
+                    "closed_at": "2026-10-14T09:30:01Z",
+                },
+                {
+                    "number": 140,
+                    "user": {"login": "dave"},
+                    "closed_at": "2026-10-02T10:00:00Z",
+                },
+            ],
+        },
+        # Carol's comment was deleted after its delivery.
+        comments=[],
+        reviews=[
+            {
+                "id": 7003,
+                "user": {"login": "alice"},
+                "created_at": "2026-10-13T11:02:40Z",
+            },
+            {
+                "id": 7010,
+                "user": {"login": "erin"},
+                "created_at": "2026-10-15T08:00:00Z",
+            },
+        ],
+    )
+    monkeypatch.setattr(worker, "fetch", github)
+    monkeypatch.setattr(worker, "datetime", FrozenDatetime)
+    return github
+
+
+def test_reconciliation_rewrites_and_backfills_the_covered_days(monkeypatch):
+    _github_since(monkeypatch)
+    env = _env()
+    asyncio.run(_replay(env, _recorded_deliveries()))
+
+    reconciled = asyncio.run(worker.reconcile_contributor_counters(env, days=14))
+    redelivered = asyncio.run(
+        _replay(env, [_recorded_deliveries()[1][:2] + ("delivery-9",)])
+    )
+
+    assert reconciled is True
+    assert [
+        (row["day"], row["login"], row["prs"], row["issues"], row["reviews"])
+        for row in _counters(env)
+    ] == [
+        ("2026-10-02", "dave", 0, 1, 0),
+        ("2026-10-13", "alice", 0, 0, 1),
+        ("2026-10-14", "alice", 1, 0, 0),
+        ("2026-10-14", "bob", 0, 1, 0),
+    ]
+    assert env.DB.query("SELECT since_day FROM github_counter_coverage") == [
+        {"since_day": "2026-10-01"}
+    ]
+    assert redelivered == [(200, {"ok": True, "counted": False})]
+
+
+def test_incomplete_reconciliation_leaves_the_counters_alone(monkeypatch):
+    _github_since(monkeypatch, failing="comments")
+    env = _env()
+    asyncio.run(_replay(env, _recorded_deliveries()))
+    coverage = "SELECT since_day FROM github_counter_coverage"
+    before = (_counters(env), env.DB.query(coverage))
+
+    reconciled = asyncio.run(worker.reconcile_contributor_counters(env, days=14))
+
+    assert reconciled is False
+    assert (_counters(env), env.DB.query(coverage)) == before
+
+
+def test_reconciliation_writes_in_bounded_batches(monkeypatch):
+    _github_since(monkeypatch)
+    monkeypatch.setattr(worker, "GITHUB_RECONCILE_ROWS_PER_INSERT", 2)
+    monkeypatch.setattr(worker, "GITHUB_RECONCILE_STATEMENTS_PER_BATCH", 2)
+    env = _env()
+    asyncio.run(worker.ensure_schema(env))
+    env.DB.batches.clear()
+
+    assert asyncio.run(worker.reconcile_contributor_counters(env, days=14))
+
+    # The delete plus two INSERTs of two and one rows, then the rebuild.
+    assert [len(batch) for batch in env.DB.batches] == [2, 1, 3]
+    assert [row["login"] for row in _counters(env)] == ["dave", "alice", "alice", "bob"]
@@ -0,0 +1,59 @@
+import json
+import subprocess
+import sys
+
+from script.profile_cold_start import (
+    ROOT_DIR,
+    WORKER_MODULE,
+    import_profile,
+    over_budget,
+)
+
+DEFERRED_MODULES = ("pickle", "zlib")
+
+
+# Wall-clock budgets depend on the host, so they are checked by a CI step
+# (profile_cold_start.py --check) rather than by this suite.
+def test_import_profile_reports_the_worker_module():
+    profile = import_profile(rounds=1)
+
+    body_us, total_us = profile[WORKER_MODULE]
+    assert 0 < body_us <= total_us
+    assert not set(DEFERRED_MODULES) & set(profile)
+
+
+def test_over_budget_names_each_exceeded_budget():
+    profile = {WORKER_MODULE: (12000, 30000)}
+
+    assert over_budget(profile, import_budget_ms=60, body_budget_ms=15) == []
+    assert over_budget(profile, import_budget_ms=25, body_budget_ms=10) == [
+        "import took 30.0 ms, over its 25 ms budget",
+        "module body took 12.0 ms, over its 10 ms budget",
+    ]
+
+
+def test_import_defers_data_loads_and_rare_modules():
+    script = "\n".join(
+        [
+            "import asyncio, json, sys",
+            "from src import worker",
+            "print(json.dumps(dict(",
+            "    modules=[name for name in {0!r} if name in sys.modules],",
+            "    catalogs=[worker.PROJECT_DATA, worker.REPO_DATA],",
+            "    migrations=worker.SCHEMA_MIGRATIONS,",
+            ")))",
+        ]
+    ).format(DEFERRED_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=str(ROOT_DIR),
+    ).stdout
+
+    assert json.loads(output) == {
+        "modules": [],
+        "catalogs": [None, None],
+        "migrations": None,
+    }
@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+from src import worker
+from tests.fakes import (
+    SIGNING_SECRET,
+    FakeContext,
+    FakeRequest,
+    github_env,
+    github_fetch,
+    signed_slack_request,
+)
+
+RESPONSE_URL = "https://hooks.slack.com/commands/T1/1/abc"
+
+
+def _env(**values):
+    return github_env(SLACK_SIGNING_SECRET=SIGNING_SECRET, **values)
+
+
+def _command(command, text="", **form):
+    return signed_slack_request(
+        "/slack/commands", dict(command=command, text=text, **form), SIGNING_SECRET
+    )
+
+
+def _server_timing_phases(response):
+    return [
+        item.split(";")[0] for item in response.headers["Server-Timing"].split(", ")
+    ]
+
+
+def test_slack_command_reports_every_phase_in_server_timing():
+    response = asyncio.run(worker.handle_request(_command("/project", "zap"), _env()))
+
+    assert response.status == 200
+    assert _server_timing_phases(response) == [
+        "body_read",
+        "verify",
+        "parse",
+        "activity_log",
+        "handler",
+        "serialize",
+        "total",
+    ]
+
+
+def test_rejected_signature_still_reports_timing():
+    request = FakeRequest(
+        "https://sammich.example.com/slack/commands",
+        method="POST",
+        body="command=%2Fproject",
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+
+    response = asyncio.run(worker.handle_request(request, _env()))
+
+    assert response.status == 401
+    assert _server_timing_phases(response) == [
+        "body_read",
+        "verify",
+        "serialize",
+        "total",
+    ]
+
+
+def test_histograms_are_kept_per_route_and_per_command():
+    env = _env()
+
+    async def scenario():
+        await worker.handle_request(_command("/project", "zap"), env)
+        await worker.handle_request(_command("/project", "web"), env)
+        await worker.handle_request(_command("/repo", "python"), env)
+
+    asyncio.run(scenario())
+
+    route = worker.LATENCY_HISTOGRAMS["route:/slack/commands"]
+    assert route["total"]["count"] == 3
+    assert sum(route["handler"]["counts"]) == 3
+    assert worker.LATENCY_HISTOGRAMS["command:/project"]["total"]["count"] == 2
+    assert worker.LATENCY_HISTOGRAMS["command:/repo"]["verify"]["count"] == 1
+
+
+def test_deferred_command_records_its_own_timing(monkeypatch):
+    fake_fetch = github_fetch(prs={"items": [{"user": {"login": "alice"}}]}).add(
+        RESPONSE_URL, "ok"
+    )
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    ctx = FakeContext()
+
+    async def scenario():
+        await worker.handle_request(
+            _command("/stats", response_url=RESPONSE_URL), _env(), ctx
+        )
+        await ctx.drain()
+
+    asyncio.run(scenario())
+
+    deferred = worker.LATENCY_HISTOGRAMS["route:deferred_command"]
+    assert set(deferred) == {"handler", "serialize", "deliver", "total"}
+    assert worker.LATENCY_HISTOGRAMS["command:/stats"]["deliver"]["count"] == 1
+
+
+def test_histograms_are_logged_once_per_interval_and_reset(capsys):
+    env = _env(LATENCY_LOG_INTERVAL_SECONDS="60")
+    worker.maybe_emit_latency_histograms(env, now=1000.0)
+    worker.observe_latency("route:/slack/commands", "total", 3.0)
+    worker.observe_latency("route:/slack/commands", "total", 7000.0)
+
+    assert worker.maybe_emit_latency_histograms(env, now=1030.0) is False
+    assert worker.maybe_emit_latency_histograms(env, now=1060.0) is True
+    assert worker.maybe_emit_latency_histograms(env, now=1061.0) is False
+
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record["context"] == "latency_histograms"
+    assert record["isolate"] == worker.ISOLATE_ID
+    assert record["window_seconds"] == 60.0
+    total = record["histograms"]["route:/slack/commands"]["total"]
+    assert total["counts"][2] == 1
+    assert total["counts"][-1] == 1
+    assert total["count"] == 2
+    assert worker.LATENCY_HISTOGRAMS == {}
@@ -0,0 +1,59 @@
+import pytest
+
+from src import worker
+
+
+@pytest.fixture
+def template_dir(monkeypatch, tmp_path):
+    (tmp_path / "message-T1-team_join.md").write_text("Welcome {username}!\n")
+    (tmp_path / "message-T1-member_joined_channel.md").write_text(
+        "Hi {username!r}, you are #{position:03d} in {channel}"
+    )
+    (tmp_path / "message-T2-team_join.md").write_text("Hello {username}, {unknown}")
+    (tmp_path / "projects.json").write_text("{}")
+    monkeypatch.setattr(worker, "MESSAGE_TEMPLATE_DIR", tmp_path)
+    return tmp_path
+
+
+def test_templates_are_read_once_for_bulk_invites(monkeypatch, template_dir):
+    reads = []
+    load_text_file = worker.load_text_file
+    monkeypatch.setattr(
+        worker,
+        "load_text_file",
+        lambda path: reads.append(path.name) or load_text_file(path),
+    )
+
+    messages = [
+        worker.render_team_join_message(
+            {"user": {"name": "user{0}".format(index)}}, team
+        )
+        for index in range(500)
+        for team in ("T1", "T3")
+    ]
+
+    assert messages[:4] == ["Welcome user0!", None, "Welcome user1!", None]
+    assert sorted(reads) == [
+        "message-T1-member_joined_channel.md",
+        "message-T1-team_join.md",
+        "message-T2-team_join.md",
+    ]
+
+
+def test_registry_renders_other_event_types(template_dir):
+    assert (
+        worker.render_team_message(
+            "T1",
+            "member_joined_channel",
+            {"username": "ann", "position": 7, "channel": "general"},
+        )
+        == "Hi 'ann', you are #007 in general"
+    )
+    assert worker.render_team_message("T1", "app_mention", {}) is None
+    assert worker.get_team_message_template("T1", "team_join") == "Welcome {username}!"
+
+
+def test_unknown_placeholders_are_left_in_place(template_dir):
+    message = worker.render_team_join_message({"user": {"id": "U9"}}, "T2")
+
+    assert message == "Hello U9, {unknown}"
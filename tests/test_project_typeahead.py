@@ -0,0 +1,60 @@
+import json
+import time
+
+from src import worker
+
+
+def _catalog(size):
+    return dict(
+        ("www-project-{0:05d}".format(index), ["Project {0}".format(index), ""])
+        for index in range(size)
+    )
+
+
+def test_project_response_size_does_not_depend_on_catalog_size(monkeypatch):
+    monkeypatch.setattr(worker, "PROJECT_DATA", _catalog(10))
+    small = json.dumps(worker.project_response(""))
+    monkeypatch.setattr(worker, "PROJECT_DATA", _catalog(5000))
+    large = json.dumps(worker.project_response(""))
+
+    assert small == large
+    accessory = worker.project_response("")["blocks"][0]["accessory"]
+    assert accessory["type"] == "external_select"
+
+
+def test_block_suggestion_returns_ranked_options(monkeypatch):
+    monkeypatch.setattr(
+        worker,
+        "PROJECT_DATA",
+        {"www-project-zap": ["", ""], "zap": ["", ""], "www-project-amass": ["", ""]},
+    )
+
+    response = worker.block_suggestion_response(
+        {
+            "type": "block_suggestion",
+            "action_id": "project_select_action_0",
+            "value": "za",
+        }
+    )
+
+    assert [option["value"] for option in response["options"]] == [
+        "zap",
+        "www-project-zap",
+    ]
+    assert worker.block_suggestion_response({"action_id": "other"}) == {"options": []}
+
+
+def test_block_suggestion_caps_options_and_stays_fast(monkeypatch):
+    monkeypatch.setattr(worker, "PROJECT_DATA", _catalog(10000))
+    payload = {"action_id": "project_select_action_0", "value": ""}
+    worker.block_suggestion_response(payload)
+
+    started = time.perf_counter()
+    for query in ("", "www", "www-project-01", "42", "project 9"):
+        payload["value"] = query
+        response = worker.block_suggestion_response(payload)
+        assert len(response["options"]) <= worker.PROJECT_SUGGESTION_LIMIT
+    elapsed = (time.perf_counter() - started) / 5
+
+    assert elapsed < 0.001
+    assert len(worker.block_suggestion_response(payload)["options"]) == 50
@@ -0,0 +1,117 @@
+import asyncio
+import json
+from pathlib import Path
+
+from src import worker
+from tests.fakes import FakeFetch, FakeHeaders
+
+FIXTURES = Path(__file__).parent / "fixtures"
+SEARCH_URL = "https://api.github.com/search/issues?q=is%3Apr"
+
+
+class KeyFilterJSON:
+    """Mimics JSON.stringify(value, keys): only listed keys survive, at any
+    depth, while array elements are always kept."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _filter(self, value, keys):
+        if isinstance(value, list):
+            return [self._filter(item, keys) for item in value]
+        if isinstance(value, dict):
+            return dict(
+                (key, self._filter(item, keys))
+                for key, item in value.items()
+                if key in keys
+            )
+        return value
+
+    def stringify(self, value, keys):
+        self.calls += 1
+        return json.dumps(self._filter(value, set(keys)))
+
+
+class NativeResponse:
+    def __init__(self, body, status=200):
+        self.status = status
+        self.ok = 200 <= status < 300
+        self.headers = FakeHeaders({"Content-Length": str(len(json.dumps(body)))})
+        self._body = body
+
+    async def json(self):
+        return self._body
+
+    async def text(self):
+        raise AssertionError("the projected path must not read the body as text")
+
+
+def test_projection_keys_cover_every_level():
+    spec = worker.compile_field_projection(["items.user.login", "total_count"])
+
+    assert worker.projection_keys(spec) == ["items", "login", "total_count", "user"]
+
+
+def test_projected_fetch_keeps_only_requested_fields(monkeypatch):
+    fixture = json.loads((FIXTURES / "github_rest_search_prs.json").read_text())
+    fake_fetch = (
+        FakeFetch()
+        .add("is%3Apr", fixture)
+        .add("/missing", {"message": "Not Found", "documentation_url": "x"}, 404)
+    )
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    projection = worker.GITHUB_SEARCH_AUTHOR_PROJECTION
+
+    async def scenario():
+        found = await worker.fetch_json_response(SEARCH_URL, projection=projection)
+        missing = await worker.fetch_json_response(
+            "https://api.github.com/missing", projection=projection
+        )
+        return found, missing
+
+    found, missing = asyncio.run(scenario())
+
+    assert found[1] == {
+        "total_count": fixture["total_count"],
+        "items": [
+            {"user": {"login": item["user"]["login"]}} for item in fixture["items"]
+        ],
+    }
+    assert missing[1]["message"] == "Not Found"
+
+
+def test_runtime_path_parses_natively_and_never_reads_text(monkeypatch):
+    fixture = json.loads((FIXTURES / "github_rest_search_prs.json").read_text())
+    native_json = KeyFilterJSON()
+    monkeypatch.setattr(worker, "JSON", native_json)
+
+    async def fake_fetch(url, options=None):
+        return NativeResponse(fixture)
+
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+
+    ok, payload, status, _ = asyncio.run(
+        worker.fetch_json_response(
+            SEARCH_URL, projection=worker.GITHUB_SEARCH_AUTHOR_PROJECTION
+        )
+    )
+
+    assert ok and status == 200
+    assert native_json.calls == 1
+    assert [item["user"]["login"] for item in payload["items"]] == [
+        item["user"]["login"] for item in fixture["items"]
+    ]
+    assert set(payload) == {"items", "total_count"}
+
+
+def test_projected_and_full_bodies_are_cached_separately():
+    headers = {"Accept": "application/vnd.github+json"}
+    full = worker.github_cache_key(SEARCH_URL, headers)
+    projected = worker.github_cache_key(
+        SEARCH_URL, headers, worker.GITHUB_SEARCH_AUTHOR_PROJECTION
+    )
+
+    assert full != projected
+    assert projected == worker.github_cache_key(
+        SEARCH_URL, headers, worker.GITHUB_SEARCH_AUTHOR_PROJECTION
+    )
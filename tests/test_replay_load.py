@@ -0,0 +1,87 @@
+import asyncio
+import json
+from pathlib import Path
+from urllib.parse import unquote
+
+from script.replay_load import (
+    load_activity_export,
+    replay_request,
+    run_replay,
+    summarize,
+    with_fresh_ids,
+)
+from src import worker
+
+EXPORT = Path(__file__).parent / "fixtures" / "slack_activity_export.json"
+
+
+def test_export_rows_are_rebuilt_into_slack_requests():
+    rows = load_activity_export(EXPORT)
+
+    requests = [replay_request(row) for row in rows]
+
+    assert len(rows) == 5
+    assert [request["label"] for request in requests if request] == [
+        "/slack/commands /project",
+        "/slack/commands /contributors",
+        "/slack/events interaction:block_actions",
+        "/slack/events event:message",
+    ]
+    assert requests[-1] is None
+    assert "hooks.slack.test" in requests[1]["body"]
+
+
+def test_each_send_gets_fresh_delivery_ids():
+    rows = load_activity_export(EXPORT)
+    interaction, event = [replay_request(row) for row in rows[2:4]]
+
+    first, second = (with_fresh_ids(event, sequence) for sequence in (0, 1))
+
+    assert json.loads(first["body"])["event_id"] == "Ev0004-0"
+    assert json.loads(second["body"])["event_id"] == "Ev0004-1"
+    assert "1001.2002.abc-7" in unquote(with_fresh_ids(interaction, 7)["body"])
+    assert event["payload"]["event_id"] == "Ev0004"
+
+
+def test_replay_drives_every_route_through_the_local_server(monkeypatch):
+    for name in ("Response", "fetch"):
+        monkeypatch.setattr(worker, name, getattr(worker, name))
+    handled = []
+    interaction_response = worker.interaction_response
+    handle_event_payload = worker.handle_event_payload
+
+    def count_interaction(payload):
+        handled.append("interaction")
+        return interaction_response(payload)
+
+    async def count_event(payload, env, timing=None):
+        handled.append("event")
+        return await handle_event_payload(payload, env, timing)
+
+    monkeypatch.setattr(worker, "interaction_response", count_interaction)
+    monkeypatch.setattr(worker, "handle_event_payload", count_event)
+    rows = load_activity_export(EXPORT)
+    requests = [request for request in map(replay_request, rows) if request]
+
+    report = asyncio.run(run_replay(requests, total=8, rate=0, concurrency=4))
+
+    assert report["all"]["requests"] == 8
+    assert report["all"]["errors"] == 0
+    assert report["/slack/commands /contributors"]["requests"] == 2
+    # Replayed rows carry their delivery IDs, and none is acknowledged as a
+    # duplicate instead of being handled.
+    assert sorted(handled) == ["event", "event", "interaction", "interaction"]
+
+
+def test_summarize_reports_percentiles_and_errors():
+    samples = [("/slack/commands /project", 200, float(ms)) for ms in range(1, 101)]
+    samples.append(("/slack/commands /project", 500, 250.0))
+
+    report = summarize(samples, elapsed=2.0)
+
+    project = report["/slack/commands /project"]
+    assert project["requests"] == 101
+    assert project["errors"] == 1
+    assert project["p50_ms"] == 51.0
+    assert project["max_ms"] == 250.0
+    assert project["rps"] == 50.5
@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+from src import worker
+
+
+def test_pure_command_body_matches_command_response():
+    form = {"command": "/project", "text": "  WWW-Project-ZAP "}
+    body = worker.pure_command_body(form["command"], form["text"])
+
+    assert json.loads(body) == asyncio.run(worker.command_response(form, None))
+    assert worker.pure_command_body("/installed_apps", "") is None
+
+
+def test_pure_command_body_reuses_serialized_body(monkeypatch):
+    calls = []
+    normalize, build = worker.PURE_COMMAND_HANDLERS["/project"]
+
+    def counting_build(text):
+        calls.append(text)
+        return build(text)
+
+    monkeypatch.setitem(
+        worker.PURE_COMMAND_HANDLERS, "/project", (normalize, counting_build)
+    )
+
+    first = worker.pure_command_body("/project", "")
+    second = worker.pure_command_body("/project", "   ")
+
+    assert first is second
+    assert calls == [""]
+
+
+def test_pure_command_body_is_invalidated_when_catalog_changes(monkeypatch):
+    before = worker.pure_command_body("/project", "amass-cli")
+    monkeypatch.setattr(worker, "PROJECT_DATA", {"amass-cli": ["CLI", ""]})
+    after = worker.pure_command_body("/project", "amass-cli")
+
+    assert "Project not found" in before
+    assert "*amass-cli*" in json.loads(after)["text"]
+
+
+def test_pure_command_body_is_invalidated_by_same_size_catalog_edit(monkeypatch):
+    monkeypatch.setattr(worker, "PROJECT_DATA", {"amass": ["Old", ""]})
+    before = worker.pure_command_body("/project", "amass")
+    monkeypatch.setattr(worker, "PROJECT_DATA", {"amass": ["New", ""]})
+    after = worker.pure_command_body("/project", "amass")
+
+    assert "Old" in json.loads(before)["text"]
+    assert "New" in json.loads(after)["text"]
+
+
+def test_pure_command_body_survives_reload_of_identical_catalog(monkeypatch):
+    monkeypatch.setattr(worker, "PROJECT_DATA", {"amass": ["Mapping", ""]})
+    first = worker.pure_command_body("/project", "amass")
+    monkeypatch.setattr(worker, "PROJECT_DATA", {"amass": ["Mapping", ""]})
+
+    assert worker.pure_command_body("/project", "amass") is first
+
+
+def test_pure_command_body_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(worker, "RESPONSE_CACHE_SIZE", 2)
+
+    worker.pure_command_body("/repo", "python")
+    worker.pure_command_body("/repo", "django")
+    worker.pure_command_body("/repo", "python")
+    worker.pure_command_body("/repo", "dart")
+
+    assert list(worker.RESPONSE_CACHE) == [("/repo", "python"), ("/repo", "dart")]
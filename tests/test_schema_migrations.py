@@ -0,0 +1,155 @@
+import asyncio
+
+from src import worker
+from tests.fakes import FakeD1, FakeEnv
+
+
+def _tables(database):
+    return [
+        row["name"]
+        for row in database.query(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )
+    ]
+
+
+def test_fresh_database_is_migrated_in_one_batch():
+    database = FakeD1()
+    env = FakeEnv(DB=database)
+
+    asyncio.run(worker.ensure_schema(env))
+
+    assert len(database.batches) == 1
+    applied = database.query("SELECT version, name FROM schema_migrations")
+    assert applied[:3] == [
+        {"version": 1, "name": "0001_initial.sql"},
+        {"version": 2, "name": "0002_contributor_cache.sql"},
+        {"version": 3, "name": "0003_activity_rollups.sql"},
+    ]
+    assert [row["name"] for row in applied] == sorted(
+        path.name for path in (worker.ROOT_DIR / "migrations").glob("*.sql")
+    )
+    assert {
+        "contributor_cache",
+        "slack_activity",
+        "slack_activity_daily",
+        "slack_team_activity",
+        "workspace_installations",
+    } <= set(_tables(database))
+
+
+def test_current_database_costs_one_read_per_isolate():
+    database = FakeD1()
+    env = FakeEnv(DB=database)
+    asyncio.run(worker.ensure_schema(env))
+    worker.reset_isolate_state()
+    database.executed.clear()
+
+    asyncio.run(worker.ensure_schema(env))
+    asyncio.run(worker.ensure_schema(env))
+
+    assert database.executed == [worker.SCHEMA_STATE_QUERIES[0]]
+    assert len(database.batches) == 1
+
+
+def test_only_pending_migrations_are_applied(monkeypatch, tmp_path):
+    (tmp_path / "0001_first.sql").write_text(
+        "-- first\nCREATE TABLE first_table (id INTEGER);\n"
+    )
+    (tmp_path / "0002_second.sql").write_text(
+        "CREATE TABLE second_table (id INTEGER);\n"
+        "INSERT INTO second_table (id) VALUES (1);\n"
+    )
+    (tmp_path / "notes.txt").write_text("ignored")
+    database = FakeD1()
+    env = FakeEnv(DB=database)
+    migrations = worker.load_schema_migrations(tmp_path)
+    monkeypatch.setattr(worker, "SCHEMA_MIGRATIONS", migrations[:1])
+    asyncio.run(worker.ensure_schema(env))
+
+    worker.reset_isolate_state()
+    monkeypatch.setattr(worker, "SCHEMA_MIGRATIONS", migrations)
+    asyncio.run(worker.ensure_schema(env))
+
+    assert database.batches[-1][2:] == [
+        "CREATE TABLE second_table (id INTEGER)",
+        "INSERT INTO second_table (id) VALUES (1)",
+        "INSERT OR IGNORE INTO schema_migrations "
+        "(version, name, applied_at) VALUES (?, ?, ?)",
+        "INSERT OR IGNORE INTO d1_migrations (name) VALUES (?)",
+    ]
+    assert database.query("SELECT version FROM schema_migrations") == [
+        {"version": 1},
+        {"version": 2},
+    ]
+
+
+def test_concurrent_requests_share_one_migration():
+    database = FakeD1(delay=0.01)
+    env = FakeEnv(DB=database)
+
+    async def scenario():
+        await asyncio.gather(*[worker.ensure_schema(env) for _ in range(5)])
+
+    asyncio.run(scenario())
+
+    assert len(database.batches) == 1
+    assert worker.SCHEMA_READY
+
+
+def test_database_migrated_outside_the_worker_still_opens():
+    # `wrangler d1 migrations apply` leaves no schema_migrations rows, so the
+    # worker then replays every file over the existing tables.
+    database = FakeD1()
+    for path in sorted((worker.ROOT_DIR / "migrations").glob("*.sql")):
+        database.connection.executescript(path.read_text())
+    env = FakeEnv(DB=database)
+
+    asyncio.run(worker.ensure_schema(env))
+
+    assert worker.SCHEMA_READY
+    columns = [
+        row["name"] for row in database.query("PRAGMA table_info(github_http_cache)")
+    ]
+    assert "link" in columns
+
+
+def _apply_with_wrangler(database, paths):
+    # What `wrangler d1 migrations apply` does: run each file, then record
+    # its name in d1_migrations.
+    database.connection.executescript(worker.D1_MIGRATIONS_TABLE_SQL + ";")
+    for path in paths:
+        database.connection.executescript(path.read_text())
+        database.connection.execute(
+            "INSERT INTO d1_migrations (name) VALUES (?)", (path.name,)
+        )
+    database.connection.commit()
+
+
+def test_migrations_applied_by_wrangler_are_not_replayed():
+    database = FakeD1()
+    paths = sorted((worker.ROOT_DIR / "migrations").glob("*.sql"))
+    _apply_with_wrangler(database, paths[:-1])
+    env = FakeEnv(DB=database)
+
+    asyncio.run(worker.ensure_schema(env))
+    worker.reset_isolate_state()
+    asyncio.run(worker.ensure_schema(env))
+
+    (batch,) = database.batches
+    last = worker.split_sql_statements(paths[-1].read_text())
+    first = worker.split_sql_statements(paths[0].read_text())
+    assert all(sql in batch for sql in last)
+    assert not any(sql in batch for sql in first)
+    # Wrangler now sees the worker's migration as applied too.
+    assert [
+        row["name"] for row in database.query("SELECT name FROM d1_migrations")
+    ] == [path.name for path in paths]
+
+
+def test_every_migration_can_be_rerun():
+    database = FakeD1()
+    for path in sorted((worker.ROOT_DIR / "migrations").glob("*.sql")):
+        database.connection.executescript(path.read_text())
+        database.connection.executescript(path.read_text())
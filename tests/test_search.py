@@ -0,0 +1,47 @@
+from src import worker
+
+
+def _catalog():
+    return {
+        "www-project-zap": ["OWASP Zed Attack Proxy project landing page.", ""],
+        "zap-extensions": ["Add-ons for the proxy", ""],
+        "zap": ["The scanner itself", ""],
+        "www-project-amass": ["Attack surface mapping", ""],
+        "www-project-juice-shop": ["Insecure web application", ""],
+        "owasp-zapper": ["Unrelated tool", ""],
+    }
+
+
+def test_search_projects_ranks_exact_then_prefix_then_token(monkeypatch):
+    monkeypatch.setattr(worker, "PROJECT_DATA", _catalog())
+
+    assert worker.search_projects("zap") == [
+        "zap",
+        "zap-extensions",
+        "owasp-zapper",
+        "www-project-zap",
+    ]
+
+
+def test_search_projects_matches_descriptions_after_names(monkeypatch):
+    monkeypatch.setattr(worker, "PROJECT_DATA", _catalog())
+
+    assert worker.search_projects("attack") == [
+        "www-project-amass",
+        "www-project-zap",
+    ]
+    assert worker.search_projects("juice shop") == ["www-project-juice-shop"]
+    assert worker.search_projects("proxy", limit=1) == ["www-project-zap"]
+
+
+def test_search_index_is_rebuilt_when_catalog_changes(monkeypatch):
+    monkeypatch.setattr(worker, "PROJECT_DATA", _catalog())
+    assert worker.search_projects("amass") == ["www-project-amass"]
+
+    monkeypatch.setattr(worker, "PROJECT_DATA", {"amass-cli": ["", ""]})
+    assert worker.search_projects("amass") == ["amass-cli"]
+
+
+def test_search_repo_technologies_uses_the_index():
+    assert worker.search_repo_technologies("py") == ["python"]
+    assert worker.search_repo_technologies("   ") == []
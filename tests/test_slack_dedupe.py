@@ -0,0 +1,166 @@
+import asyncio
+import json
+
+import pytest
+
+from src import worker
+from tests.fakes import (
+    SIGNING_SECRET,
+    FakeContext,
+    FakeD1,
+    FakeEnv,
+    FakeFetch,
+    FakeFetchResponse,
+    signed_slack_request,
+)
+
+
+def _env(database):
+    return FakeEnv(
+        DB=database,
+        SLACK_SIGNING_SECRET=SIGNING_SECRET,
+        SLACK_BOT_TOKEN="xoxb-test",
+        ACTIVITY_FLUSH_MAX_AGE_SECONDS="0.01",
+    )
+
+
+def _mention(retry_num=None):
+    body = json.dumps(
+        {
+            "type": "event_callback",
+            "team_id": "T1",
+            "event_id": "Ev0001",
+            "event": {"type": "app_mention", "user": "U1", "channel": "C1"},
+        }
+    )
+    headers = {"x-slack-retry-num": retry_num} if retry_num else None
+    return signed_slack_request(
+        "/slack/events",
+        body,
+        SIGNING_SECRET,
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def _posts(fake_fetch):
+    return [url for url, _ in fake_fetch.calls if "chat.postMessage" in url]
+
+
+def test_retried_event_is_acknowledged_without_repeating_work(monkeypatch):
+    fake_fetch = FakeFetch().add("chat.postMessage", {"ok": True})
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    database = FakeD1()
+    env = _env(database)
+    ctx = FakeContext()
+
+    async def scenario():
+        first = await worker.handle_request(_mention(), env, ctx)
+        retry = await worker.handle_request(_mention(retry_num="1"), env, ctx)
+        await ctx.drain()
+        return first, retry
+
+    first, retry = asyncio.run(scenario())
+
+    assert first.status == retry.status == 200
+    assert retry.json() == {"ok": True}
+    assert len(_posts(fake_fetch)) == 1
+    assert database.query("SELECT COUNT(*) AS rows FROM slack_activity") == [
+        {"rows": 1}
+    ]
+
+
+def test_retry_on_another_isolate_is_caught_by_d1(monkeypatch):
+    fake_fetch = FakeFetch().add("chat.postMessage", {"ok": True})
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    database = FakeD1()
+    ctx = FakeContext()
+
+    async def first_isolate():
+        await worker.handle_request(_mention(), _env(database), ctx)
+        await ctx.drain()
+
+    asyncio.run(first_isolate())
+    worker.reset_isolate_state()
+    response = asyncio.run(
+        worker.handle_request(_mention(retry_num="2"), _env(database), FakeContext())
+    )
+
+    assert response.json() == {"ok": True}
+    assert len(_posts(fake_fetch)) == 1
+    assert database.query("SELECT delivery_key FROM slack_deliveries") == [
+        {"delivery_key": "event:Ev0001"}
+    ]
+
+
+def test_failed_delivery_is_handled_again_on_retry(monkeypatch):
+    attempts = []
+
+    def post_message(url, options):
+        attempts.append(url)
+        if len(attempts) == 1:
+            raise RuntimeError("slack unavailable")
+        return FakeFetchResponse(200, {"ok": True})
+
+    fake_fetch = FakeFetch().add("chat.postMessage", post_message)
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    database = FakeD1()
+    env = _env(database)
+    ctx = FakeContext()
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await worker.handle_request(_mention(), env, ctx)
+        await ctx.drain()
+        released = database.query("SELECT delivery_key FROM slack_deliveries")
+        retry = await worker.handle_request(_mention(retry_num="1"), env, ctx)
+        await ctx.drain()
+        return released, retry
+
+    released, retry = asyncio.run(scenario())
+
+    assert released == []
+    assert retry.status == 200
+    assert len(attempts) == 2
+    assert database.query("SELECT delivery_key FROM slack_deliveries") == [
+        {"delivery_key": "event:Ev0001"}
+    ]
+
+
+def test_first_sighting_of_a_retry_is_processed(monkeypatch):
+    fake_fetch = FakeFetch().add("chat.postMessage", {"ok": True})
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+
+    asyncio.run(worker.handle_request(_mention(retry_num="1"), _env(FakeD1()), None))
+
+    assert len(_posts(fake_fetch)) == 1
+
+
+def test_interactions_are_deduplicated_by_trigger_id():
+    payload = {
+        "type": "block_actions",
+        "trigger_id": "1337.42",
+        "actions": [{"action_id": "plugin_repo_button_0", "value": "python"}],
+    }
+    env = _env(FakeD1())
+
+    async def scenario():
+        responses = []
+        for _ in range(2):
+            request = signed_slack_request(
+                "/slack/events", {"payload": json.dumps(payload)}, SIGNING_SECRET
+            )
+            responses.append(await worker.handle_request(request, env, FakeContext()))
+        return responses
+
+    first, second = asyncio.run(scenario())
+
+    assert "text" in first.json()
+    assert second.json() == {"ok": True}
+
+
+def test_deliveries_outside_the_window_are_handled_again():
+    assert worker.remember_slack_delivery("event:Ev1", 1000.0) is True
+    assert worker.remember_slack_delivery("event:Ev1", 1010.0) is False
+    later = 1000.0 + worker.SLACK_DELIVERY_WINDOW_SECONDS
+    assert worker.remember_slack_delivery("event:Ev1", later) is True
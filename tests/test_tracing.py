@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+import pytest
+
+from src import worker
+from tests.fakes import FakeD1, FakeEnv, FakeFetch, FakeRequest
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+def _spans(capsys):
+    lines = capsys.readouterr().out.strip().splitlines()
+    records = [json.loads(line) for line in lines]
+    return [record for record in records if record.get("context") == "span"]
+
+
+def test_tracing_is_a_no_op_when_not_sampled(monkeypatch, capsys):
+    fake_fetch = FakeFetch().add("api.github.com", {"ok": True})
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    env = FakeEnv(DB=FakeD1())
+
+    async def scenario():
+        await worker.handle_request(
+            FakeRequest("https://sammich.example.com/health"), env
+        )
+        assert worker.start_span("d1", worker.describe_sql, "SELECT 1") is None
+        await worker.fetch_json("https://api.github.com/rate_limit")
+        await worker.d1_run(env, "SELECT 1")
+
+    asyncio.run(scenario())
+
+    assert _spans(capsys) == []
+
+
+def test_fetch_and_d1_spans_nest_under_the_request_trace(monkeypatch, capsys):
+    fake_fetch = FakeFetch().add("hooks.slack.com", "ok")
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    env = FakeEnv(DB=FakeD1(), TRACE_SAMPLE_RATE="1")
+
+    async def scenario():
+        root = worker.start_trace(
+            env,
+            None,
+            worker.describe_http_request,
+            "POST",
+            "https://sammich.example.com/slack/commands",
+        )
+        await worker.fetch_json(
+            "https://hooks.slack.com/commands/T0ABC123/4242/AbCdEfGhIjKlMnOpQrStUvWx",
+            method="POST",
+            body="{}",
+        )
+        await worker.d1_run(
+            env, "SELECT name FROM sqlite_master WHERE type = 'table' LIMIT 5"
+        )
+        worker.end_span(root, status=200)
+        return root
+
+    root = asyncio.run(scenario())
+
+    http_span, d1_span, request_span = _spans(capsys)
+    assert request_span["span_id"] == root["span_id"]
+    assert "parent_id" not in request_span
+    for span in (http_span, d1_span):
+        assert span["trace_id"] == root["trace_id"]
+        assert span["parent_id"] == root["span_id"]
+    assert http_span["host"] == "hooks.slack.com"
+    assert http_span["path"] == "/commands/:id/:id/:id"
+    assert http_span["status"] == 200
+    assert http_span["bytes"] == 2
+    assert d1_span["name"] == "d1 SELECT"
+    assert d1_span["sql"] == "SELECT name FROM sqlite_master WHERE type = ? LIMIT ?"
+    assert (
+        d1_span["fingerprint"]
+        == worker.sql_fingerprint(
+            "SELECT name FROM sqlite_master WHERE type = 'index' LIMIT 10"
+        )[1]
+    )
+
+
+def test_incoming_traceparent_decides_sampling(capsys):
+    env = FakeEnv(TRACE_SAMPLE_RATE="1")
+
+    async def scenario(flags):
+        request = FakeRequest(
+            "https://sammich.example.com/health",
+            headers={
+                "traceparent": "00-{0}-00f067aa0ba902b7-{1}".format(TRACE_ID, flags)
+            },
+        )
+        return await worker.handle_request(request, env)
+
+    asyncio.run(scenario("00"))
+    assert _spans(capsys) == []
+
+    asyncio.run(scenario("01"))
+    (span,) = _spans(capsys)
+    assert span["trace_id"] == TRACE_ID
+    assert span["parent_id"] == "00f067aa0ba902b7"
+    assert span["path"] == "/health"
+    assert span["status"] == 200
+
+
+def test_failed_fetch_is_recorded_and_reraised(monkeypatch, capsys):
+    fake_fetch = FakeFetch().add("api.github.com", RuntimeError("connection reset"))
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    env = FakeEnv(TRACE_SAMPLE_RATE="1")
+
+    async def scenario():
+        root = worker.start_trace(env, None, worker.describe_http_request, "GET", "/")
+        with pytest.raises(RuntimeError):
+            await worker.fetch_json(
+                "https://api.github.com/repos/OWASP-BLT/BLT/issues/17"
+            )
+        worker.end_span(root)
+        return worker.CURRENT_SPAN.get()
+
+    assert asyncio.run(scenario()) is None
+    http_span = _spans(capsys)[0]
+    assert http_span["error"] == "RuntimeError"
+    assert http_span["path"] == "/repos/OWASP-BLT/BLT/issues/:id"
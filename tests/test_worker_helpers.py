@@ -59,11 +59,6 @@ def test_interaction_response_returns_project_detail():
 
 
 def test_build_blocks_are_chunked_and_capped():
-    project_blocks = worker.build_project_selection_blocks(
-        ["project-{0}".format(index) for index in range(201)]
-    )
-    assert len(project_blocks) == 3
-
     repo_blocks = worker.build_repo_selection_blocks(
         {"python": ["https://example.com"]}
     )
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+from src import worker
+from tests.fakes import FakeD1, FakeEnv, FakeFetch
+
+INSTALLER_LOOKUP = "FROM workspace_installations"
+
+
+def _message(user, team_id="T1", **fields):
+    event = {"type": "message", "user": user, "channel": "C1"}
+    event.update(fields)
+    return {"type": "event_callback", "team_id": team_id, "event": event}
+
+
+def _lookups(database):
+    return [sql for sql in database.executed if INSTALLER_LOOKUP in sql]
+
+
+def test_installer_lookup_is_cached_per_team(monkeypatch):
+    fake_fetch = FakeFetch().add("chat.postMessage", {"ok": True})
+    monkeypatch.setattr(worker, "fetch", fake_fetch)
+    database = FakeD1()
+    env = FakeEnv(DB=database, SLACK_BOT_TOKEN="xoxb-test")
+
+    async def scenario():
+        await worker.save_workspace_installer(env, "T1", "U1")
+        worker.WORKSPACE_CACHE.clear()
+        for user in ("U2", "U3", "U1", "U2", "U1"):
+            await worker.handle_event_payload(_message(user), env)
+
+    asyncio.run(scenario())
+
+    assert len([sql for sql in _lookups(database) if "SELECT" in sql]) == 1
+    assert len(fake_fetch.calls) == 2
+
+
+def test_teams_without_installation_are_negatively_cached(monkeypatch):
+    monkeypatch.setattr(worker, "fetch", FakeFetch())
+    database = FakeD1()
+    env = FakeEnv(DB=database, WORKSPACE_NEGATIVE_CACHE_TTL_SECONDS="60")
+
+    async def scenario():
+        for user in ("U1", "U2", "U3"):
+            await worker.handle_event_payload(_message(user, team_id="T9"), env)
+        worker.WORKSPACE_CACHE["T9"]["stored_at"] = time.time() - 120
+        await worker.handle_event_payload(_message("U1", team_id="T9"), env)
+
+    asyncio.run(scenario())
+
+    assert len(_lookups(database)) == 2
+
+
+def test_reinstall_invalidates_cached_installer(monkeypatch):
+    monkeypatch.setattr(worker, "fetch", FakeFetch())
+    database = FakeD1()
+    env = FakeEnv(DB=database)
+
+    async def scenario():
+        before = await worker.get_workspace_installer(env, "T1")
+        await worker.save_workspace_installer(env, "T1", "U7")
+        after = await worker.get_workspace_installer(env, "T1")
+        return before, after
+
+    before, after = asyncio.run(scenario())
+
+    assert (before, after) == (None, "U7")
+    assert len([sql for sql in _lookups(database) if "SELECT" in sql]) == 1
+
+
+def test_bot_messages_never_reach_d1(monkeypatch):
+    monkeypatch.setattr(worker, "fetch", FakeFetch())
+    database = FakeD1()
+    env = FakeEnv(DB=database)
+
+    async def scenario():
+        await worker.handle_event_payload(_message("U1", bot_id="B1"), env)
+        await worker.handle_event_payload(_message(""), env)
+
+    asyncio.run(scenario())
+
+    assert database.executed == []